@@ -0,0 +1,40 @@
+"""add hot path indexes
+
+Revision ID: b8e1f2c3d4a5
+Revises: 7c4e2a9d1b36
+Create Date: 2026-10-17 11:03:18.517260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e1f2c3d4a5'
+down_revision: Union[str, None] = '7c4e2a9d1b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_plan_participants_user_id_plan_id', 'plan_participants', ['user_id', 'plan_id']),
+    ('ix_notifications_user_id_is_read_created_at', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('ix_penalty_approval_requests_plan_id_penalty_user_id_status', 'penalty_approval_requests', ['plan_id', 'penalty_user_id', 'status']),
+    ('ix_locations_plan_id_created_at', 'locations', ['plan_id', 'created_at']),
+    ('ix_friend_invites_receiver_id_status', 'friend_invites', ['receiver_id', 'status']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY doesn't block writes but can't run inside a
+    # transaction. If a build fails it leaves an INVALID index behind; drop it
+    # and re-run the migration.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,32 @@
+"""add trigram indexes for user search
+
+Revision ID: c5d6e7f8a9b0
+Revises: b8e1f2c3d4a5
+Create Date: 2026-10-17 11:48:52.093614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d6e7f8a9b0'
+down_revision: Union[str, None] = 'b8e1f2c3d4a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Built concurrently (outside a transaction) so signups aren't blocked
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_username_trgm', 'users', ['username'], unique=False, postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_users_display_name_trgm', 'users', ['display_name'], unique=False, postgresql_using='gin', postgresql_ops={'display_name': 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_display_name_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_username_trgm', table_name='users', postgresql_concurrently=True)
+    # pg_trgm is left installed; other objects may depend on it
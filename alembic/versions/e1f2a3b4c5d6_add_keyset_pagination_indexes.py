@@ -0,0 +1,36 @@
+"""add keyset pagination indexes
+
+Revision ID: e1f2a3b4c5d6
+Revises: d7e8f9a0b1c2
+Create Date: 2026-10-17 13:02:44.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f2a3b4c5d6'
+down_revision: Union[str, None] = 'd7e8f9a0b1c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Match the (key..., id) orderings used by cursor pagination
+INDEXES = [
+    ('ix_notifications_user_id_created_at_id', 'notifications', ['user_id', 'created_at', 'id']),
+    ('ix_plans_start_time_id', 'plans', ['start_time', 'id']),
+]
+
+
+def upgrade() -> None:
+    # See b8e1f2c3d4a5: CONCURRENTLY needs to run outside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
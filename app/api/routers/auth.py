@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional, Set
+from typing import Optional
 from fastapi import APIRouter, Depends, Form, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
@@ -10,21 +10,17 @@ from jose import JWTError, jwt
 
 from app.core.config import settings
 from app.db.session import get_db
+from app.db.refresh_tokens import revoke_refresh_token
 from app.models import User as UserModel, UserTrustStats
 from app.schemas import Token, UserCreate, User as UserSchema, RefreshToken
 import re
-from app.core.auth import create_refresh_token, create_access_token, verify_password, get_password_hash, get_current_username
-
-# TODO: Simple in-memory blacklist. Replace with Redis or DB in prod.
-BLACKLISTED_REFRESH_TOKENS: Set[str] = set()
+from app.core.auth import create_refresh_token, create_user_access_token, verify_password_async, get_password_hash_async, get_current_username
 
 router = APIRouter()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login/username")
 
-BLACKLIST_KEY = "blacklisted_refresh_tokens"
-
 @router.post("/signup", response_model=Token)
 async def signup(
     user: UserCreate,
@@ -43,7 +39,7 @@ async def signup(
         )
 
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = UserModel(
         email=user.email,
         display_name=user.display_name,
@@ -62,7 +58,7 @@ async def signup(
     await db.refresh(db_user)
 
     # Create tokens
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_user_access_token(db_user)
     refresh_token = create_refresh_token(data={"sub": user.username})
 
     return {
@@ -81,7 +77,7 @@ async def login(
         select(UserModel).where(UserModel.username == form_data.username)
     )
     user = result.scalar_one_or_none()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -89,7 +85,7 @@ async def login(
         )
 
     # Create tokens
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_user_access_token(user)
     refresh_token = create_refresh_token(data={"sub": user.username})
 
     return {
@@ -109,7 +105,7 @@ async def login(
         select(UserModel).where(UserModel.email == email)
     )
     user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -117,7 +113,7 @@ async def login(
         )
 
     # Create tokens
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_user_access_token(user)
     refresh_token = create_refresh_token(data={"sub": user.username})
 
     return {
@@ -133,11 +129,7 @@ async def refresh_token(
 ):
     old_rt = token_data.refresh_token
 
-    # 1) Reject if already revoked    
-    if old_rt in BLACKLISTED_REFRESH_TOKENS:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked")
-
-    # 2) Decode and validate
+    # 1) Decode and validate
     try:
         payload = jwt.decode(
             old_rt,
@@ -153,6 +145,10 @@ async def refresh_token(
             detail="Invalid refresh token"
         )
 
+    # 2) Revoke the old refresh token; rejects it if it was already revoked
+    if not await revoke_refresh_token(old_rt, payload):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked")
+
     # 3) Make sure user still exists
     result = await db.execute(select(UserModel).where(UserModel.username == username))
     user = result.scalar_one_or_none()
@@ -162,11 +158,8 @@ async def refresh_token(
             detail="User not found"
         )
 
-    # 4) Revoke the old refresh token
-    BLACKLISTED_REFRESH_TOKENS.add(old_rt)
-
-    # 5) Issue new tokens
-    new_access = create_access_token(data={"sub": username})
+    # 4) Issue new tokens
+    new_access = create_user_access_token(user)
     new_refresh = create_refresh_token(data={"sub": username})
 
     return {
@@ -198,8 +191,8 @@ async def logout(
     except JWTError:
         raise HTTPException(status_code=400, detail="Invalid refresh token")
 
-    # Add to Redis set
-    BLACKLISTED_REFRESH_TOKENS.add(refresh_token)
+    # Revocation entry expires together with the token
+    await revoke_refresh_token(refresh_token, payload)
 
     return {"message": "Successfully logged out"}
 
@@ -5,34 +5,28 @@ from sqlalchemy.orm import selectinload
 from typing import List
 
 from app.core.auth import get_current_username
-from app.db.db_users import get_current_user
+from app.db.db_users import get_current_user, get_current_user_id
+from app.db.replica import get_read_db
 from app.db.session import get_db
-from app.models import User, FriendInvite as FriendInviteModel
+from app.models import User, FriendInvite as FriendInviteModel, user_friends
 from app.schemas import FriendInvite, FriendInviteCreate, UserResponse
-from app.services.push_notification import send_friend_invite_notification
+from app.services.push_notification import friend_invite_message
+from app.services.push_notification.outbox import enqueue_push
 
 router = APIRouter()
 
 @router.get("/list", response_model=list[UserResponse])
 async def read_friends(
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Get current user with friends relationship loaded
+    # Get friends through the association table
     result = await db.execute(
         select(User)
-        .options(selectinload(User.friends))
-        .where(User.username == current_user)
+        .join(user_friends, user_friends.c.friend_id == User.id)
+        .where(user_friends.c.user_id == user_id)
     )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return user.friends
+    return result.scalars().all()
 
 @router.post("/friend-invites", response_model=FriendInvite)
 async def create_friend_invite(
@@ -72,42 +66,24 @@ async def create_friend_invite(
         receiver_id=receiver.id
     )
     db.add(db_invite)
+    await db.flush()  # Flush to get ID
+
+    # Queue the push with the invite; it is sent after commit, off the request path
+    await enqueue_push(db, [receiver.id], friend_invite_message(sender.username, db_invite.id))
     await db.commit()
     await db.refresh(db_invite)
 
-    # Send push notification if receiver has a device token
-    if receiver.push_token:
-        await send_friend_invite_notification(
-            device_token=receiver.push_token,
-            sender_username=sender.username,
-            invite_id=db_invite.id
-        )
-
     return db_invite
 
 @router.get("/friend-invites/received", response_model=List[FriendInvite])
 async def read_received_invites(
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    # Get current user with friends relationship loaded
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.received_invites))
-        .where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Get only pending received invites
     invite_result = await db.execute(
         select(FriendInviteModel).where(
-            FriendInviteModel.receiver_id == user.id,
+            FriendInviteModel.receiver_id == user_id,
             FriendInviteModel.status == "pending"  # Filter only pending
         )
     )
@@ -117,27 +93,13 @@ async def read_received_invites(
 
 @router.get("/friend-invites/sent", response_model=List[FriendInvite])
 async def read_sent_invites(
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Get current user with friends relationship loaded
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.sent_invites))
-        .where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Get only pending sent invites
     invite_result = await db.execute(
         select(FriendInviteModel).where(
-            FriendInviteModel.sender_id == user.id,
+            FriendInviteModel.sender_id == user_id,
             FriendInviteModel.status == "pending"  # Filter only pending
         )
     )
@@ -207,20 +169,9 @@ async def accept_friend_invite(
 @router.post("/friend-invites/{invite_id}/decline")
 async def decline_friend_invite(
     invite_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get the invite
     invite_result = await db.execute(
         select(FriendInviteModel).where(
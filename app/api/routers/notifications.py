@@ -1,69 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 
-from app.core.auth import get_current_username
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate, split_page
+from app.db.db_notifications import adjust_unread_count, delete_notifications, mark_notifications_read
+from app.db.db_users import get_current_user, get_current_user_id
+from app.db.replica import get_read_db
 from app.db.session import get_db
 from app.models import User, Notification
 from app.schemas import NotificationResponse
 from app.schemas import NotificationBase as NotificationSchema
-from app.schemas import NotificationCreate
+from app.schemas import NotificationCreate, NotificationIds
 
 router = APIRouter()
 
 @router.get("/notifications", response_model=List[NotificationSchema])
 async def read_notifications(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Get current user
+    """
+    Notifications, newest first. Pass the previous response's X-Next-Cursor
+    header as `cursor` for the next page; `skip` still works for older clients.
+    """
+    keyset = (Notification.created_at, Notification.id)
     result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+        paginate(
+            select(Notification).where(Notification.user_id == user_id),
+            keyset, cursor, limit, skip
         )
-
-    # Get notifications
-    result = await db.execute(
-        select(Notification)
-        .where(Notification.user_id == user.id)
-        .order_by(Notification.created_at.desc())
-        .offset(skip)
-        .limit(limit)
     )
-    notifications = result.scalars().all()
+    notifications, next_cursor = split_page(result.scalars().all(), limit, keyset)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return notifications
 
 @router.post("/notifications", response_model=NotificationSchema)
 async def create_notification(
     notification: NotificationCreate,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    # Create notification
+    # Create notification (data has no column; user_id always comes from the caller)
     db_notification = Notification(
-        **notification.model_dump(),
+        **notification.model_dump(exclude={"user_id", "data"}),
         user_id=user.id
     )
     db.add(db_notification)
+    await adjust_unread_count(db, user.id, 1)
     await db.commit()
     await db.refresh(db_notification)
     return db_notification
@@ -71,20 +60,9 @@ async def create_notification(
 @router.put("/notifications/{notification_id}/read")
 async def mark_notification_as_read(
     notification_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get notification
     result = await db.execute(
         select(Notification).where(
@@ -99,100 +77,70 @@ async def mark_notification_as_read(
             detail="Notification not found"
         )
 
-    # Mark as read
-    notification.is_read = True
+    # Mark as read; conditional so concurrent requests decrement the counter once
+    await mark_notifications_read(db, user.id, [notification_id])
     await db.commit()
     return {"message": "Notification marked as read"}
 
 @router.put("/notifications/read-all")
 async def mark_all_notifications_as_read(
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    # Mark all unread notifications as read in one statement
+    updated = await mark_notifications_read(db, user.id)
+    await db.commit()
+    return {"message": "All notifications marked as read", "updated": updated}
 
-    # Get all unread notifications
-    result = await db.execute(
-        select(Notification).where(
-            Notification.user_id == user.id,
-            Notification.is_read == False
-        )
-    )
-    notifications = result.scalars().all()
+@router.put("/notifications/read")
+async def mark_notifications_as_read(
+    payload: NotificationIds,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Mark several notifications as read; ids that aren't yours or are already read are skipped
+    """
+    updated = await mark_notifications_read(db, user.id, payload.ids)
+    await db.commit()
+    return {"updated": updated}
 
-    # Mark all as read
-    for notification in notifications:
-        notification.is_read = True
+@router.post("/notifications/delete")
+async def delete_notifications_bulk(
+    payload: NotificationIds,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete several notifications; ids that aren't yours are skipped
+    """
+    deleted = await delete_notifications(db, user.id, payload.ids)
     await db.commit()
-    return {"message": "All notifications marked as read"}
+    return {"deleted": deleted}
 
 @router.delete("/notifications/{notification_id}")
 async def delete_notification(
     notification_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    # Get notification
-    result = await db.execute(
-        select(Notification).where(
-            Notification.id == notification_id,
-            Notification.user_id == user.id
-        )
-    )
-    notification = result.scalar_one_or_none()
-    if not notification:
+    # Delete notification (and adjust the unread counter if it was unread)
+    if not await delete_notifications(db, user.id, [notification_id]):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification not found"
         )
-
-    # Delete notification
-    await db.delete(notification)
     await db.commit()
     return {"message": "Notification deleted"}
 
 @router.get("/notifications/unread-count")
 async def get_unread_notifications_count(
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    # Count unread notifications
+    # Maintained counter; a primary-key lookup instead of counting rows
     result = await db.execute(
-        select(Notification).where(
-            Notification.user_id == user.id,
-            Notification.is_read == False
-        )
+        select(User.unread_notification_count).where(User.id == user_id)
     )
-    unread_count = len(result.scalars().all())
+    unread_count = result.scalar_one_or_none() or 0
     return {"unread_count": unread_count} 
\ No newline at end of file
@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
-from app.core.auth import get_current_username
+from app.db.db_users import get_current_user_id
 from app.db.session import get_db
 from app.models import Plan, User, UserTrustStats, plan_participants
 from app.schemas import LocationCheck, LocationCheckResponse
-from app.services.push_notification import send_arrival_check_notification
+from app.services.push_notification import arrival_check_message
+from app.services.push_notification.outbox import enqueue_push
 from app.services.trust_level import update_trust_level
 from datetime import datetime, timezone
 
@@ -16,7 +17,7 @@ router = APIRouter()
 async def check_arrival(
     plan_id: int,
     location: LocationCheck,
-    current_user: str = Depends(get_current_username),
+    user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -24,18 +25,6 @@ async def check_arrival(
     Compare user's current location with plan destination to determine arrival
     """
     try:
-        # Get current user
-        result = await db.execute(
-            select(User).where(User.username == current_user)
-        )
-        user = result.scalar_one_or_none()
-        if not user:
-            print(f"User not found: {current_user}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-
         # Get plan (including location information and participants)
         result = await db.execute(
             select(Plan)
@@ -53,8 +42,9 @@ async def check_arrival(
                 detail="Plan not found"
             )
 
-        # Check if user is a participant in the plan
-        if user not in plan.participants:
+        # Check if user is a participant in the plan (participants are already loaded)
+        user = next((p for p in plan.participants if p.id == user_id), None)
+        if user is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="User is not a participant of this plan"
@@ -83,17 +73,9 @@ async def check_arrival(
         # Update statistics
         await update_trust_stats(user, plan, is_arrived, db)
         
-        # Send push notification to the user who checked arrival
-        if user.push_token:
-            try:
-                await send_arrival_check_notification(
-                    plan=plan,
-                    device_token=user.push_token,
-                    is_arrived=is_arrived
-                )
-            except Exception as e:
-                # Log error but don't fail the entire request
-                print(f"Failed to send notification to {user.username}: {str(e)}")
+        # Queue push notification to the user who checked arrival; it goes
+        # out only if the changes below commit
+        await enqueue_push(db, [user.id], arrival_check_message(plan, is_arrived))
             
         # Save changes to database
         await db.commit()
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import selectinload
 import logging
 from datetime import datetime, timezone
 import json
 
-from app.core.auth import get_current_username
+from app.db.db_users import get_current_user, get_users_by_ids
 from app.db.session import get_db
 from app.models import User, Plan, Location, Penalty, PlanInvite
 from app.schemas import Plan as PlanSchema, PlanCreate
-from app.services.push_notification import send_plan_invite_notification
-from app.services.scheduler.eventbridge_scheduler import schedule_silent_for_plan
+from app.services.push_notification import plan_invite_message
+from app.services.push_notification.outbox import enqueue_push
+from app.services.scheduler.backend import schedule_silent_for_plan
 
 logger = logging.getLogger(__name__)
 
@@ -31,19 +32,11 @@ def log_operation(operation: str, data: dict, user_id: int = None, plan_id: int
 @router.post("/create", response_model=PlanSchema)
 async def create_plan(
     plan: PlanCreate,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        # 1) Get creator
-        result = await db.execute(select(User).where(User.username == current_user))
-        user: User = result.scalar_one_or_none()
-        if not user:
-            error_msg = f"User not found: {current_user}"
-            logger.error(error_msg)
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error_msg)
-
-        # 2) Create Plan record
+        # 1) Create Plan record
         db_plan = Plan(title=plan.title, start_time=plan.start_time)
         db_plan.participants.append(user)
         db.add(db_plan)
@@ -51,23 +44,24 @@ async def create_plan(
         
         log_operation("plan_created", {"title": plan.title, "start_time": plan.start_time}, user.id, db_plan.id)
 
-        # 3) Invite other participants
+        # 2) Invite other participants: one SELECT for the users, one
+        # multi-row INSERT for the invites, whatever the group size
+        invitees = []
         if plan.participants:
             other_participant_ids = set(pid for pid in plan.participants if pid != user.id)
             log_operation("processing_participants", {"count": len(other_participant_ids)}, user.id, db_plan.id)
-            
-            for uid in other_participant_ids:
-                try:
-                    other = await db.get(User, uid)
-                    if other:
-                        invite = PlanInvite(plan_id=db_plan.id, user_id=other.id)
-                        db.add(invite)
-                        log_operation("invite_created", {"invited_user_id": other.id}, user.id, db_plan.id)
-                except Exception as e:
-                    logger.error(f"Error inviting user {uid}: {str(e)}", exc_info=True)
-                    continue
 
-        # 4) Add Location and Penalty
+            invitees = await get_users_by_ids(db, other_participant_ids)
+            if invitees:
+                await db.execute(
+                    insert(PlanInvite).values([
+                        {"plan_id": db_plan.id, "user_id": other.id, "status": "pending"}
+                        for other in invitees
+                    ])
+                )
+                log_operation("invites_created", {"invited_user_ids": [other.id for other in invitees]}, user.id, db_plan.id)
+
+        # 3) Add Location and Penalty
         try:
             loc = plan.location
             db.add(Location(
@@ -88,11 +82,21 @@ async def create_plan(
                 ))
                 log_operation("penalty_added", {"content": pen.content}, user.id, db_plan.id)
 
-            # 5) Commit
+            # Queue plan invitation notifications in the same transaction
+            await enqueue_push(
+                db,
+                [other.id for other in invitees],
+                plan_invite_message(
+                    "New Plan Invitation",
+                    f"{user.display_name} invited you to a new plan: {plan.title}"
+                )
+            )
+
+            # 4) Commit
             await db.commit()
             log_operation("db_commit_success", {}, user.id, db_plan.id)
 
-            # 6) Load relations together
+            # 5) Load relations together
             result = await db.execute(
                 select(Plan)
                 .options(
@@ -105,24 +109,7 @@ async def create_plan(
             )
             full_plan: Plan = result.scalar_one()
             
-            # 7) Send plan invitation notifications
-            notification_count = 0
-            for invite in full_plan.invites:
-                try:
-                    other = await db.get(User, invite.user_id)
-                    if other and other.push_token:
-                        await send_plan_invite_notification(
-                            device_token=other.push_token,
-                            title="New Plan Invitation",
-                            body=f"{user.display_name} invited you to a new plan: {full_plan.title}"
-                        )
-                        notification_count += 1
-                        log_operation("notification_sent", {"to_user_id": other.id}, user.id, db_plan.id)
-                except Exception as e:
-                    logger.error(f"Error sending notification to user {invite.user_id}: {str(e)}", exc_info=True)
-                    continue
-
-            log_operation("create_plan_complete", {"notifications_sent": notification_count}, user.id, db_plan.id)
+            log_operation("create_plan_complete", {"notifications_queued": len(invitees)}, user.id, db_plan.id)
             
             # start_time はtz付きUTCで扱う（無ければUTC化）
             start_utc = plan.start_time.astimezone(timezone.utc)
@@ -130,7 +117,7 @@ async def create_plan(
             
             # Schedule silent notification
             try:
-                success = await schedule_silent_for_plan(db_plan.id, start_utc)
+                success = await schedule_silent_for_plan(db_plan.id, start_utc, is_new=True)
                 if success:
                     logger.info(f"Silent notification scheduled for plan {db_plan.id}")
                 else:
@@ -1,21 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 from app.db.session import get_db
-from app.core.auth import get_current_username
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate, split_page
+from app.db.db_plans import get_invite_summary, invite_summary_from_row, invite_summary_select
+from app.db.db_users import get_current_user
 from app.models import Plan
 from app.models import User
 from app.models import PlanInvite as PlanInviteModel
-from app.schemas import PlanInviteCreate, PlanInvite, PlanInviteResponse
-from typing import List
+from app.schemas import PlanInviteCreate, PlanInvite, PlanInviteResponse, PlanInviteSummaryResponse, PlanView
+from typing import List, Optional, Union
 
 router = APIRouter()
 
 @router.post("/invites/create", response_model=PlanInviteResponse)
 async def create_plan_invite(
     invite: PlanInviteCreate,
-    current_user: str = Depends(get_current_username),
+    current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     # Check if plan exists and user is creator
@@ -52,21 +54,34 @@ async def create_plan_invite(
     
     return new_invite
 
-@router.get("/invites/list", response_model=List[PlanInviteResponse])
+@router.get("/invites/list", response_model=Union[List[PlanInviteResponse], List[PlanInviteSummaryResponse]])
 async def get_plan_invites(
-    current_user: str = Depends(get_current_username),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    view: PlanView = "full",
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    # Invites have no timestamp; ids are increasing, so they are the keyset
+    keyset = (PlanInviteModel.id,)
+    if view == "summary":
+        # One Core query with the slim plan projection
+        query = invite_summary_select().where(
+            PlanInviteModel.user_id == user.id,
+            PlanInviteModel.status == "pending"
+        )
+        if limit is None:
+            result = await db.execute(query.order_by(PlanInviteModel.id.desc()))
+            return [invite_summary_from_row(row) for row in result]
+        result = await db.execute(paginate(query, keyset, cursor, limit))
+        invites, next_cursor = split_page([invite_summary_from_row(row) for row in result], limit, keyset)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return invites
 
-    # Get all pending invites for current user with eager loading
-    result = await db.execute(
+    # Get pending invites for current user with eager loading
+    query = (
         select(PlanInviteModel)
         .options(
             selectinload(PlanInviteModel.plan).selectinload(Plan.participants),
@@ -78,36 +93,38 @@ async def get_plan_invites(
             PlanInviteModel.user_id == user.id,
             PlanInviteModel.status == "pending"
         )
-        .order_by(PlanInviteModel.id.desc())
     )
-    invites = result.scalars().all()
-    
+    if limit is None:
+        # Unpaged, as before
+        result = await db.execute(query.order_by(PlanInviteModel.id.desc()))
+        return result.scalars().all()
+
+    result = await db.execute(paginate(query, keyset, cursor, limit))
+    invites, next_cursor = split_page(result.scalars().all(), limit, keyset)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return invites
 
-@router.put("/invites/{invite_id}", response_model=PlanInviteResponse)
+@router.put("/invites/{invite_id}", response_model=Union[PlanInviteResponse, PlanInviteSummaryResponse])
 async def update_plan_invite(
     invite_id: int,
     status: str,
-    current_user: str = Depends(get_current_username),
+    view: PlanView = "full",
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Get invite with eager loading of plan and its relationships
-    result = await db.execute(
-        select(PlanInviteModel)
-        .options(
-            selectinload(PlanInviteModel.plan).selectinload(Plan.participants),
+    # Get invite with eager loading of plan and its relationships; the
+    # summary view only needs participants here and re-reads the rest below
+    options = [selectinload(PlanInviteModel.plan).selectinload(Plan.participants)]
+    if view == "full":
+        options += [
             selectinload(PlanInviteModel.plan).selectinload(Plan.locations),
             selectinload(PlanInviteModel.plan).selectinload(Plan.penalties),
             selectinload(PlanInviteModel.plan).selectinload(Plan.invites)
-        )
+        ]
+    result = await db.execute(
+        select(PlanInviteModel)
+        .options(*options)
         .where(PlanInviteModel.id == invite_id)
     )
     invite = result.scalar_one_or_none()
@@ -126,5 +143,7 @@ async def update_plan_invite(
         if user not in invite.plan.participants:
             invite.plan.participants.append(user)
             await db.commit()
-    
+
+    if view == "summary":
+        return await get_invite_summary(db, invite.id)
     return invite 
\ No newline at end of file
@@ -3,6 +3,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import Dict, List, Any
 from sqlalchemy import select
 from app.core.auth import get_current_user_ws
+from app.db.db_users import refresh_token_profile
 from app.db.session import AsyncSessionLocal
 from app.models import Plan, User
 from app.schemas import LocationShareMessage, WebSocketErrorResponse, LocationUpdateRequest
@@ -57,8 +58,11 @@ async def plan_location_ws(websocket: WebSocket, plan_id: int):
     db = AsyncSessionLocal()
     user = None
     try:
-        # User authentication
+        # User authentication (claims from the token; no users query for current tokens)
         user = await get_current_user_ws(websocket)
+        if user:
+            # Display fields come from the snapshot once the token's pv is stale
+            user = await refresh_token_profile(user)
         if not user:
             await websocket.close(code=4401)  # Unauthorized
             await db.close()
@@ -72,10 +76,10 @@ async def plan_location_ws(websocket: WebSocket, plan_id: int):
             await db.close()
             return
 
-        # participants.any(User.id == user.id) でチェック
+        # participants.any(User.id == user_id) でチェック
         check_q = select(Plan.id).where(
             Plan.id == plan_id,
-            Plan.participants.any(User.id == user.id)
+            Plan.participants.any(User.id == user.user_id)
         )
         exists = await db.execute(check_q)
         if exists.scalar_one_or_none() is None:
@@ -83,7 +87,7 @@ async def plan_location_ws(websocket: WebSocket, plan_id: int):
             await db.close()
             return
 
-        await manager.connect(websocket, plan_id, user.id)
+        await manager.connect(websocket, plan_id, user.user_id)
         await db.close()
 
         try:
@@ -96,9 +100,9 @@ async def plan_location_ws(websocket: WebSocket, plan_id: int):
                     
                     # Create response using Pydantic model
                     location_message = LocationShareMessage(
-                        user_id=user.id,
+                        user_id=user.user_id,
                         display_name=user.display_name,
-                        profileImageUrl=user.profile_image_url,
+                        profile_image_url=user.profile_image_url,
                         latitude=location_request.latitude,
                         longitude=location_request.longitude
                     )
@@ -113,7 +117,7 @@ async def plan_location_ws(websocket: WebSocket, plan_id: int):
                     )
                     await websocket.send_text(error_response.model_dump_json())
         except WebSocketDisconnect:
-            manager.disconnect(websocket, plan_id, user.id)
+            manager.disconnect(websocket, plan_id, user.user_id)
 
     except Exception as e:
         print("WS error:", e)
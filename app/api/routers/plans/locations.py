@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.auth import get_current_username
+from app.db.db_users import get_current_user_id
 from app.db.session import get_db
 from app.models import User, Plan, Location
 from app.schemas import Location as LocationSchema, LocationCreate
@@ -15,25 +15,14 @@ router = APIRouter()
 async def create_location(
     plan_id: int,
     location: LocationCreate,
-    current_user: str = Depends(get_current_username),
+    user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan
     result = await db.execute(
         select(Plan).where(
             Plan.id == plan_id,
-            Plan.participants.contains(user)
+            Plan.participants.any(User.id == user_id)
         )
     )
     plan = result.scalar_one_or_none()
@@ -47,7 +36,7 @@ async def create_location(
     db_location = Location(
         **location.model_dump(),
         plan_id=plan_id,
-        user_id=user.id
+        user_id=user_id
     )
     db.add(db_location)
     await db.commit()
@@ -58,25 +47,14 @@ async def create_location(
 async def read_locations(
     plan_id: int,
     since: datetime = None,
-    current_user: str = Depends(get_current_username),
+    user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan
     result = await db.execute(
         select(Plan).where(
             Plan.id == plan_id,
-            Plan.participants.contains(user)
+            Plan.participants.any(User.id == user_id)
         )
     )
     plan = result.scalar_one_or_none()
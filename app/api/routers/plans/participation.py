@@ -1,5 +1,5 @@
 # Plan participation endpoints
-from app.core.auth import get_current_username
+from app.db.db_users import get_current_user
 from app.db.session import get_db
 from app.models import User, Plan
 from app.schemas import Plan as PlanSchema
@@ -12,20 +12,9 @@ router = APIRouter()
 @router.post("/{plan_id}/join")
 async def join_plan(
     plan_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan
     result = await db.execute(
         select(Plan).where(Plan.id == plan_id)
@@ -47,20 +36,9 @@ async def join_plan(
 @router.delete("/{plan_id}/leave")
 async def leave_plan(
     plan_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan
     result = await db.execute(
         select(Plan).where(Plan.id == plan_id)
@@ -3,7 +3,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.auth import get_current_username
+from app.db.db_users import get_current_user
 from app.db.session import get_db
 from app.models import User, Plan, Penalty
 from app.schemas import (
@@ -16,20 +16,9 @@ router = APIRouter()
 @router.get("/{plan_id}/penalties", response_model=List[PenaltySchema])
 async def read_penalties(
     plan_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan
     result = await db.execute(
         select(Plan).where(
@@ -55,20 +44,9 @@ async def read_penalties(
 async def create_penalty(
     plan_id: int,
     penalty: PenaltyCreate,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan
     result = await db.execute(
         select(Plan).where(
@@ -99,15 +77,9 @@ async def upload_penalty_proof(
     plan_id: int,
     penalty_id: int,
     proof_url: str,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(select(User).where(User.username == current_user))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
     # Get plan
     result = await db.execute(
         select(Plan).where(
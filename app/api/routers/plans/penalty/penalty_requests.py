@@ -5,6 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select, update
 from app.core.auth import get_current_username
+from app.db.db_users import get_current_user, get_current_user_id
+from app.db.replica import get_read_db
 from app.db.session import get_db
 from app.models import User, Plan, plan_participants, PenaltyApprovalRequest, Penalty
 from app.schemas import (
@@ -12,7 +14,8 @@ from app.schemas import (
     PenaltyApprovalRequestResponse,
     PenaltyApprovalStatus
 )
-from app.services.push_notification import send_penalty_approval_request_notification
+from app.services.push_notification import penalty_approval_request_message
+from app.services.push_notification.outbox import enqueue_push
 from app.core.s3 import upload_proof_image_to_s3
 from datetime import datetime, timezone
 import base64
@@ -23,21 +26,10 @@ router = APIRouter()
 async def send_penalty_approval_request(
     plan_id: int,
     request_data: PenaltyApprovalRequestCreate,
-    current_user: str = Depends(get_current_username),
+    requesting_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Send penalty approval request with optional comment and proof image"""
-    # Get current user (requesting approval)
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    requesting_user = result.scalar_one_or_none()
-    if not requesting_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Verify the plan exists and user is a participant
     result = await db.execute(
         select(Plan)
@@ -106,6 +98,14 @@ async def send_penalty_approval_request(
         proof_image_url=None  # Will be set after S3 upload if image data provided
     )
     db.add(approval_request)
+    await db.flush()  # Flush to get ID
+
+    # Queue push notifications to all other participants with the request
+    await enqueue_push(
+        db,
+        [p.id for p in plan.participants if p.id != requesting_user.id],
+        penalty_approval_request_message(requesting_user.display_name, approval_request.id, plan.title)
+    )
     await db.commit()
     await db.refresh(approval_request)
     
@@ -134,29 +134,6 @@ async def send_penalty_approval_request(
             print(f"Failed to upload proof image: {str(e)}")
             # Continue without failing the entire request
     
-    # Get all participants except the requesting user
-    other_participants = [p for p in plan.participants if p.id != requesting_user.id]
-    
-    # Send push notifications to all other participants
-    notification_count = 0
-    
-    for participant in other_participants:
-        if participant.push_token:
-            try:
-                success = await send_penalty_approval_request_notification(
-                    device_token=participant.push_token,
-                    requesting_user_name=requesting_user.display_name,
-                    request_id=approval_request.id,
-                    plan_title=plan.title
-                )
-                if success:
-                    notification_count += 1
-                    print(f"Penalty approval notification sent to {participant.username}")
-                else:
-                    print(f"Failed to send notification to {participant.username}")
-            except Exception as e:
-                print(f"Failed to send notification to {participant.username}: {str(e)}")
-    
     # Log the approval request
     print(f"Penalty approval requested by {requesting_user.username} for plan {plan.id}")
     return approval_request
@@ -165,21 +142,10 @@ async def send_penalty_approval_request(
 async def send_penalty_approval_request_solo(
     plan_id: int,
     request_data: PenaltyApprovalRequestCreate,
-    current_user: str = Depends(get_current_username),
+    requesting_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Send penalty approval request and auto-approve if plan has only 1 participant"""
-    # Get current user (requesting approval)
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    requesting_user = result.scalar_one_or_none()
-    if not requesting_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Verify the plan exists and user is a participant
     result = await db.execute(
         select(Plan)
@@ -273,6 +239,15 @@ async def send_penalty_approval_request_solo(
     await db.execute(stmt)
     
     db.add(approval_request)
+    await db.flush()  # Flush to get ID
+
+    # Notify other participants only if multiple participants and not auto-approved
+    if participant_count > 1:
+        await enqueue_push(
+            db,
+            [p.id for p in plan.participants if p.id != requesting_user.id],
+            penalty_approval_request_message(requesting_user.display_name, approval_request.id, plan.title)
+        )
     await db.commit()
     await db.refresh(approval_request)
     
@@ -301,38 +276,13 @@ async def send_penalty_approval_request_solo(
             print(f"Failed to upload proof image: {str(e)}")
             # Continue without failing the entire request
     
-    # Send notifications only if multiple participants and not auto-approved
-    if participant_count > 1:
-        # Get all participants except the requesting user
-        other_participants = [p for p in plan.participants if p.id != requesting_user.id]
-        
-        # Send push notifications to all other participants
-        notification_count = 0
-        
-        for participant in other_participants:
-            if participant.push_token:
-                try:
-                    success = await send_penalty_approval_request_notification(
-                        device_token=participant.push_token,
-                        requesting_user_name=requesting_user.display_name,
-                        request_id=approval_request.id,
-                        plan_title=plan.title
-                    )
-                    if success:
-                        notification_count += 1
-                        print(f"Penalty approval notification sent to {participant.username}")
-                    else:
-                        print(f"Failed to send notification to {participant.username}")
-                except Exception as e:
-                    print(f"Failed to send notification to {participant.username}: {str(e)}")
-    
     return approval_request
 
 @router.post("/{plan_id}/penalty-approval/{request_id}", response_model=PenaltyApprovalRequestResponse)
 async def approve_penalty(
     plan_id: int,
     request_id: int,
-    current_user: str = Depends(get_current_username),
+    approver: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -341,23 +291,12 @@ async def approve_penalty(
     Args:
         plan_id: Plan ID
         request_id: Penalty approval request ID
-        current_user: Current authenticated user (approver)
+        approver: Current authenticated user (approver)
         db: Database session
     
     Returns:
         Penalty approval information
     """
-    # Get current user (approver)
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    approver = result.scalar_one_or_none()
-    if not approver:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Approver user not found"
-        )
-    
     # Verify the plan exists
     result = await db.execute(
         select(Plan).where(Plan.id == plan_id)
@@ -469,7 +408,7 @@ async def approve_penalty(
 async def decline_penalty(
     plan_id: int,
     request_id: int,
-    current_user: str = Depends(get_current_username),
+    decliner: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -478,23 +417,12 @@ async def decline_penalty(
     Args:
         plan_id: Plan ID
         request_id: Penalty approval request ID
-        current_user: Current authenticated user (decliner)
+        decliner: Current authenticated user (decliner)
         db: Database session
     
     Returns:
         Success message
     """
-    # Get current user (decliner)
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    decliner = result.scalar_one_or_none()
-    if not decliner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Verify the plan exists
     result = await db.execute(
         select(Plan).where(Plan.id == plan_id)
@@ -579,31 +507,20 @@ async def decline_penalty(
 @router.get("/{plan_id}/penalty-approval-requests", response_model=List[PenaltyApprovalRequestResponse])
 async def get_penalty_approval_requests(
     plan_id: int,
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get all penalty approval requests for a specific plan
     
     Args:
         plan_id: Plan ID
-        current_user: Current authenticated user
-        db: Database session
+        user_id: Current authenticated user's id
+        db: Read-only database session
     
     Returns:
         List of penalty approval requests
     """
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Verify the plan exists and user is a participant
     result = await db.execute(
         select(Plan)
@@ -618,7 +535,7 @@ async def get_penalty_approval_requests(
         )
     
     # Check if user is a participant
-    if user not in plan.participants:
+    if not any(participant.id == user_id for participant in plan.participants):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only plan participants can view penalty approval requests"
@@ -638,7 +555,7 @@ async def get_penalty_approval_requests(
 async def get_penalty_approval_request(
     plan_id: int,
     request_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -647,23 +564,12 @@ async def get_penalty_approval_request(
     Args:
         plan_id: Plan ID
         request_id: Approval request ID
-        current_user: Current authenticated user
+        user: Current authenticated user
         db: Database session
     
     Returns:
         Penalty approval request details
     """
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Verify the plan exists and user is a participant
     result = await db.execute(
         select(Plan)
@@ -703,7 +609,7 @@ async def get_penalty_approval_request(
 @router.get("/penalty-approval-requests/{request_id}", response_model=PenaltyApprovalRequestResponse)
 async def get_penalty_approval_request_by_id(
     request_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -711,23 +617,12 @@ async def get_penalty_approval_request_by_id(
     
     Args:
         request_id: Approval request ID
-        current_user: Current authenticated user
+        user: Current authenticated user
         db: Database session
     
     Returns:
         Penalty approval request details
     """
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Get the specific approval request with penalty information
     result = await db.execute(
         select(PenaltyApprovalRequest)
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from app.core.auth import get_current_username
+from app.db.db_users import get_current_user
 from app.db.session import get_db
 from app.models import User, Plan, plan_participants
 from app.schemas import (
@@ -16,21 +17,10 @@ router = APIRouter()
 @router.get("/{plan_id}/me/penalty-status", response_model=PenaltyStatusResponse)
 async def get_my_penalty_status(
     plan_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get the current user's penalty status for a specific plan"""
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Verify the plan exists
     result = await db.execute(
         select(Plan).where(Plan.id == plan_id)
@@ -1,71 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import desc, select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Union
 from datetime import datetime, UTC
-from app.core.auth import get_current_username
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate, split_page
+from app.db.db_plans import is_participant, plan_summary_from_row, plan_summary_select
+from app.db.db_users import get_current_user, get_current_user_id
+from app.db.replica import get_read_db
 from app.db.session import get_db
 from app.models import User, Plan
-from app.schemas import Plan as PlanSchema, PlanListRequest
+from app.schemas import Plan as PlanSchema, PlanListRequest, PlanSummary
 from fastapi import status as http_status
 
 router = APIRouter()
 
-@router.post("/list", response_model=List[PlanSchema])
+@router.post("/list", response_model=Union[List[PlanSchema], List[PlanSummary]])
 async def read_plans(
     params: PlanListRequest,
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=http_status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    # Get plans with eager loading and order by start_time
-    result = await db.execute(
-        select(Plan)
-        .options(
-            selectinload(Plan.participants),
-            selectinload(Plan.locations),
-            selectinload(Plan.penalties),
-            selectinload(Plan.invites)
+    # Newest start_time first; cursor paging via params.cursor / X-Next-Cursor,
+    # OFFSET via params.skip for older clients
+    keyset = (Plan.start_time, Plan.id)
+    if params.view == "summary":
+        # One Core query, no relationship loading
+        result = await db.execute(
+            paginate(
+                plan_summary_select().where(
+                    is_participant(user_id),
+                    Plan.status.in_(params.plan_status)
+                ),
+                keyset, params.cursor, params.limit, params.skip
+            )
         )
-        .where(
-            Plan.participants.contains(user),
-            Plan.status.in_(params.plan_status)
+        plans = [plan_summary_from_row(row) for row in result]
+    else:
+        # Full plans with eager loading
+        result = await db.execute(
+            paginate(
+                select(Plan)
+                .options(
+                    selectinload(Plan.participants),
+                    selectinload(Plan.locations),
+                    selectinload(Plan.penalties),
+                    selectinload(Plan.invites)
+                )
+                .where(
+                    Plan.participants.any(User.id == user_id),
+                    Plan.status.in_(params.plan_status)
+                ),
+                keyset, params.cursor, params.limit, params.skip
+            )
         )
-        .order_by(Plan.start_time.desc())  # Sort by start_time in descending order
-        .offset(params.skip)
-        .limit(params.limit)
-    )
-    plans = result.scalars().all()
+        plans = result.scalars().all()
+    plans, next_cursor = split_page(plans, params.limit, keyset)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return plans
 
 @router.get("/{plan_id}", response_model=PlanSchema)
 async def read_plan(
     plan_id: int,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=http_status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan
     result = await db.execute(
         select(Plan).where(
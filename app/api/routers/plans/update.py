@@ -1,12 +1,13 @@
+from datetime import timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from app.core.auth import get_current_username
+from app.db.db_users import get_current_user
 from app.db.session import get_db
 from app.models import Plan, User, Location, Penalty
 from app.schemas import PlanUpdate, Plan as PlanSchema
-from app.services.scheduler.eventbridge_scheduler import schedule_silent_for_plan
+from app.services.scheduler.backend import schedule_silent_for_plan
 
 router = APIRouter()
 
@@ -14,20 +15,9 @@ router = APIRouter()
 async def update_plan(
     plan_id: int,
     plan_update: PlanUpdate,
-    current_user: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get plan with eager loading
     result = await db.execute(
         select(Plan)
@@ -93,7 +83,9 @@ async def update_plan(
     await db.commit()
     await db.refresh(plan)
 
-    start_utc = plan.start_time.astimezone(timezone.utc)
-    await schedule_silent_for_plan(plan.id, start_utc, db)
+    # Only a new start time moves the wake-up schedule
+    if 'start_time' in update_data:
+        start_utc = plan.start_time.astimezone(timezone.utc)
+        await schedule_silent_for_plan(plan.id, start_utc)
     
     return plan
\ No newline at end of file
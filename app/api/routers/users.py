@@ -1,27 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select
 from datetime import timedelta
 from botocore.exceptions import ClientError
 import logging
-from typing import List
-from sqlalchemy.orm import selectinload
+from typing import List, Literal, Optional
 
 logger = logging.getLogger(__name__)
 
 from app.core.auth import (
-    verify_password,
-    create_access_token,
+    verify_password_async,
+    create_user_access_token,
     get_password_hash,
     get_current_username
 )
 from app.core.config import settings
+from app.db.db_devices import get_device_tokens, register_device_token
+from app.db.db_users import get_current_user, get_current_user_id, invalidate_user_cache
+from app.db.replica import get_read_db
 from app.db.session import get_db
 from app.models import User, UserTrustStats
 from app.schemas import ProfileImageResponse, User as UserSchema, UserCreate, Token, UserUpdate, UserResponse, UserTrustStatsResponse
 from app.core.s3 import upload_to_s3
-from app.services.push_notification.notificationClient import notificationClient
+from app.services.push_notification import push_notification_client
+from app.services.push_notification.fanout import fan_out
+from app.services.user_search import search_users as search_user_index
 
 router = APIRouter()
 
@@ -36,7 +40,7 @@ async def login_for_access_token(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -44,9 +48,7 @@ async def login_for_access_token(
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    access_token = create_user_access_token(user, expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/", response_model=UserResponse)
@@ -87,112 +89,43 @@ async def create_user(
     return db_user
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+async def read_user_me(
+    user: User = Depends(get_current_user),
 ):
     """
     Get current user information
     """
-    result = await db.execute(
-        select(User)
-        .where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
     return user
 
 @router.put("/me", response_model=UserSchema)
 async def update_user_me(
     user_update: UserUpdate,
-    current_username: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(User).where(User.username == current_username)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    previous_username = user.username
 
     # Update user fields
-    for field, value in user_update.model_dump(exclude_unset=True).items():
+    changes = user_update.model_dump(exclude_unset=True)
+    for field, value in changes.items():
         setattr(user, field, value)
+    if "display_name" in changes or "username" in changes:
+        user.profile_version = User.profile_version + 1
 
     await db.commit()
     await db.refresh(user)
+    await invalidate_user_cache(previous_username, user.username)
     return user
 
 @router.get("/filter", response_model=List[UserResponse])
 async def search_users(
     query: str = Query(..., description="Search query for display_name or username"),
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    current_user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        # Get current user with friends relationship loaded
-        result = await db.execute(
-            select(User)
-            .options(selectinload(User.friends))
-            .where(User.username == current_user)
-        )
-        current_user_obj = result.scalar_one_or_none()
-        if not current_user_obj:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Current user not found"
-            )
-
-        # Search query pattern
-        search_query = f"%{query}%"
-
-        # Get friend IDs
-        friend_ids = [f.id for f in current_user_obj.friends]
-
-        # First, get friends matching the search query
-        friends_result = await db.execute(
-            select(User)
-            .where(
-                and_(
-                    or_(
-                        User.display_name.ilike(search_query),
-                        User.username.ilike(search_query)
-                    ),
-                    User.id != current_user_obj.id,
-                    User.id.in_(friend_ids)
-                )
-            )
-            .limit(10)
-        )
-        friends = friends_result.scalars().all()
-
-        # Then, get other users matching the search query
-        other_users_result = await db.execute(
-            select(User)
-            .where(
-                and_(
-                    or_(
-                        User.display_name.ilike(search_query),
-                        User.username.ilike(search_query)
-                    ),
-                    User.id != current_user_obj.id,
-                    ~User.id.in_(friend_ids),
-                    ~User.id.in_([friend.id for friend in friends])
-                )
-            )
-            .limit(10)
-        )
-        other_users = other_users_result.scalars().all()
-
-        # Combine results with friends first and ensure it's a list
-        return [*friends, *other_users]  # Use list unpacking to ensure it's a list
+        # Friends first, then other users; see app.services.user_search
+        return await search_user_index(db, current_user_id, query)
 
     except Exception as e:
         # Log error details
@@ -222,47 +155,31 @@ async def read_user(
 @router.put("/me/push-token")
 async def update_push_token(
     push_token: str,
-    current_user: str = Depends(get_current_username),
+    device_id: Optional[str] = None,
+    environment: Optional[Literal["sandbox", "production"]] = None,
+    current_user_obj: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Update user's push token
+    Register this device's push token. Every registered device gets pushes;
+    `device_id` lets a device replace its own old token.
     """
-    # Verify the current user is updating their own push token
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    current_user_obj = result.scalar_one_or_none()
-    if not current_user_obj:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this user's push token"
-        )
-
-    # Update push token
+    await register_device_token(db, current_user_obj.id, push_token, device_id, environment)
+    # Kept as the most recent device for code that still reads a single token
     current_user_obj.push_token = push_token
+    current_user_obj.push_token_invalidated_at = None
     await db.commit()
+    await invalidate_user_cache(current_user_obj.username)
     return {"message": "Push token updated successfully"}
 
 @router.get("/me/trust-stats", response_model=UserTrustStatsResponse)
 async def get_my_trust_stats(
-    current_username: str = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get current user's trust statistics
     """
-    # Get user
-    result = await db.execute(
-        select(User).where(User.username == current_username)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Get trust statistics
     result = await db.execute(
         select(UserTrustStats).where(UserTrustStats.user_id == user.id)
@@ -279,7 +196,7 @@ async def get_my_trust_stats(
 @router.post("/profile-image", response_model=ProfileImageResponse)
 async def upload_profile_image(
     file: UploadFile = File(...),
-    current_username: User = Depends(get_current_username),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -289,24 +206,16 @@ async def upload_profile_image(
     if not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    result = await db.execute(
-        select(User).where(User.username == current_username)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     try:
         # Upload to S3
         image_url = await upload_to_s3(file, user.id)
         
         # Update user's profile image URL
         user.profile_image_url = image_url
+        user.profile_version = User.profile_version + 1
         await db.commit()
         await db.refresh(user)
+        await invalidate_user_cache(user.username)
         
         return ProfileImageResponse(
             message="profile image uploaded successfully",
@@ -332,41 +241,35 @@ async def upload_profile_image(
 async def test_push_notification(
     title: str = "Test Notification",
     body: str = "This is a test notification",
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    current_user_obj: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
-    Send test push notification to current user
+    Send test push notification to all of the current user's devices
     """
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    current_user_obj = result.scalar_one_or_none()
-    if not current_user_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    if not current_user_obj.push_token:
+    device_tokens = await get_device_tokens(db, [current_user_obj.id])
+    if not device_tokens:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User has no push token"
         )
 
     # Send test notification
-    success = await notificationClient.send_notification(
-        device_token=current_user_obj.push_token,
-        title=title,
-        body=body,
-        data={"type": "test_notification"}
+    report = await fan_out(
+        [current_user_obj],
+        lambda user, device_token: push_notification_client.send_notification(
+            device_token=device_token,
+            title=title,
+            body=body,
+            data={"type": "test_notification"}
+        ),
+        device_tokens
     )
 
-    if not success:
+    if not report.sent:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to send notification"
         )
 
-    return {"message": "Test notification sent successfully"}
\ No newline at end of file
+    return {"message": f"Test notification sent to {report.sent} device(s)"}
\ No newline at end of file
@@ -1,13 +1,19 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, WebSocket
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
 from app.models import User
+from app.schemas import TokenData
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_db, AsyncSessionLocal
+from app.db.session import get_db, AsyncSessionLocal, request_username
 from sqlalchemy import select
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -19,6 +25,94 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# bcrypt takes hundreds of milliseconds per call, so async handlers hand it to
+# a dedicated pool instead of blocking the event loop.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_password_jobs_in_flight = 0
+
+async def _run_password_job(fn, *args):
+    global _password_jobs_in_flight
+    if _password_jobs_in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        # Shed load instead of queueing requests that will time out anyway
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+    _password_jobs_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, fn, *args)
+    finally:
+        _password_jobs_in_flight -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified JWTs mapped to their decoded claims.
+
+    Entries are dropped once their `exp` passes, so a cached token never
+    outlives the validity jwt.decode would have given it.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return dict(claims)
+
+    def put(self, token: str, claims: dict) -> None:
+        exp = claims.get("exp")
+        if self.max_entries <= 0 or not isinstance(exp, (int, float)):
+            return
+        self._entries[token] = (float(exp), dict(claims))
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+verified_token_cache = VerifiedTokenCache(settings.JWT_CACHE_MAX_ENTRIES)
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify and decode an access token, reusing earlier verifications.
+    Raises JWTError for invalid or expired tokens.
+    """
+    claims = verified_token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        verified_token_cache.put(token, claims)
+    return claims
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -29,30 +123,66 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# Version 2 tokens carry the user id and profile claims next to sub; anything
+# without ver is a legacy username-only token.
+ACCESS_TOKEN_VERSION = 2
+
+def create_user_access_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Issue an access token for a user. pv is the user's profile_version at issue
+    time, so consumers of dn/img can tell which profile the claims reflect.
+    """
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "ver": ACCESS_TOKEN_VERSION,
+            "uid": user.id,
+            "pv": user.profile_version,
+            "dn": user.display_name,
+            "img": user.profile_image_url,
+        },
+        expires_delta=expires_delta,
+    )
+
+def token_data_from_claims(payload: dict) -> TokenData:
+    if payload.get("ver") != ACCESS_TOKEN_VERSION:
+        return TokenData(username=payload.get("sub"))
+    return TokenData(
+        username=payload.get("sub"),
+        user_id=payload.get("uid"),
+        profile_version=payload.get("pv"),
+        display_name=payload.get("dn"),
+        profile_image_url=payload.get("img"),
+    )
+
 def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=30)
-    to_encode.update({"exp": expire})
+    # jti identifies the token in the revocation store
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_username(token: str = Depends(oauth2_scheme)):
+async def get_current_token_data(token: str = Depends(oauth2_scheme)) -> TokenData:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
+        token_data = token_data_from_claims(decode_access_token(token))
     except JWTError:
         raise credentials_exception
+    if token_data.username is None:
+        raise credentials_exception
+    request_username.set(token_data.username)
+    return token_data
+
+async def get_current_username(token_data: TokenData = Depends(get_current_token_data)):
     # Return only username
-    return username 
+    return token_data.username
 
-async def get_current_user_ws(websocket: WebSocket) -> Optional[User]:
+async def get_current_user_ws(websocket: WebSocket) -> Optional[TokenData]:
     try:
         # Get token from query parameters
         token = websocket.query_params.get("token")
@@ -60,16 +190,25 @@ async def get_current_user_ws(websocket: WebSocket) -> Optional[User]:
             return None
             
         # Decode token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+        token_data = token_data_from_claims(decode_access_token(token))
+        if token_data.username is None:
             return None
+        if token_data.user_id is not None:
+            return token_data
             
-        # Get user from database using proper async session
+        # Legacy token: get user from database using proper async session
         async with AsyncSessionLocal() as db:
-            result = await db.execute(select(User).where(User.username == username))
+            result = await db.execute(select(User).where(User.username == token_data.username))
             user = result.scalar_one_or_none()
-            return user
+            if user is None:
+                return None
+            return TokenData(
+                username=user.username,
+                user_id=user.id,
+                profile_version=user.profile_version,
+                display_name=user.display_name,
+                profile_image_url=user.profile_image_url,
+            )
             
     except JWTError:
-        return None 
\ No newline at end of file
+        return None
@@ -1,20 +1,54 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Optional read replica for read-only routes; unset sends everything to DATABASE_URL
+    DATABASE_READ_URL: Optional[str] = None
+    # How long a user's reads stay on the primary after they commit a write
+    READ_AFTER_WRITE_SECONDS: int = 5
     RDS_CA_BUNDLE: str
+    # auto: lambda inside AWS Lambda, queue elsewhere. external: NullPool behind RDS Proxy/pgbouncer
+    DB_POOL_MODE: str = "auto"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
+    # Ping connections idle longer than this on checkout; negative disables the ping
+    DB_PING_IDLE_SECONDS: float = 30
+    # Same statement this many times in one request gets logged as a possible N+1
+    QUERY_REPEAT_THRESHOLD: int = 3
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    JWT_CACHE_MAX_ENTRIES: int = 1024
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 16
 
     # AWS Settings
     AWS_ACCESS_KEY_ID: str
     AWS_SECRET_ACCESS_KEY: str
     AWS_REGION: str = "ap-northeast-1"
     AWS_S3_BUCKET: str
+
+    # Silent wake-up scheduling (app.services.scheduler.backend)
+    SCHEDULER_BACKEND: str = "eventbridge"  # or "apscheduler": in-process, for uvicorn and local runs
+    # EventBridge: the Lambda to invoke and the role it assumes (both required
+    # for that backend), and the dead-letter queue ("" for none)
+    SCHEDULER_TARGET_ARN: str = ""
+    SCHEDULER_ROLE_ARN: str = ""
+    SCHEDULER_DLQ_ARN: str = ""
+    # Read each schedule back after writing it and log it (one more AWS call)
+    SCHEDULER_VERIFY_SCHEDULES: bool = False
+    # APScheduler: job store (a sync SQLAlchemy URL) and how late a missed job may still run
+    SCHEDULER_JOBSTORE_URL: str = "sqlite:///scheduler_jobs.sqlite"
+    SCHEDULER_MISFIRE_GRACE_SECONDS: int = 600
     
     # Redis
     REDIS_URL: str
+    USER_CACHE_TTL_SECONDS: int = 300
+    USER_SEARCH_CACHE_SECONDS: int = 30
 
     # APNs settings
     APNS_SECRET_ARN: str 
@@ -22,6 +56,35 @@ class Settings(BaseSettings):
     APNS_TEAM_ID: str
     APNS_BUNDLE_ID: str
     APNS_USE_SANDBOX: bool
+    # How long the APNs key from Secrets Manager is reused before re-fetching
+    APNS_KEY_CACHE_SECONDS: int = 3600
+    # Send to this host instead of Apple's, e.g. the benchmarks/local_apns.py stand-in
+    APNS_HOST: Optional[str] = None
+    APNS_PORT: int = 443
+    # notificationClient retries (app.services.push_notification.retry)
+    APNS_MAX_RETRIES: int = 3  # silent pushes; alerts are retried by the outbox instead
+    APNS_RETRY_BASE_SECONDS: float = 0.2
+    APNS_RETRY_MAX_SECONDS: float = 2.0
+    APNS_SEND_DEADLINE_SECONDS: float = 10.0  # per push, across all attempts and waits
+
+    # Push outbox (app.services.push_notification.outbox)
+    # Run the in-process dispatcher. Unset: on, except on Lambda, where the
+    # drain_outbox EventBridge schedule (deploy_app.sh) sends the queue instead
+    PUSH_OUTBOX_WORKER: Optional[bool] = None
+    PUSH_OUTBOX_BATCH_SIZE: int = 100
+    PUSH_OUTBOX_MAX_BATCHES_PER_RUN: int = 50
+    PUSH_OUTBOX_MAX_ATTEMPTS: int = 5
+    PUSH_OUTBOX_BACKOFF_SECONDS: int = 5
+    PUSH_OUTBOX_MAX_BACKOFF_SECONDS: int = 600
+    PUSH_OUTBOX_LEASE_SECONDS: int = 60
+    PUSH_OUTBOX_POLL_SECONDS: float = 1.0
+    # Max pushes in flight per fan-out (app.services.push_notification.fanout)
+    APNS_FANOUT_CONCURRENCY: int = 20
+
+    # How often uvicorn logs and resets the metrics window (0 = only at shutdown); Lambda flushes per invocation
+    METRICS_FLUSH_SECONDS: float = 60.0
+    # Bearer token for GET /metrics; unset, the endpoint answers 404
+    METRICS_TOKEN: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+from typing import Coroutine, Optional
+
+# Serves run_sync callers that already sit inside a running loop
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+def _thread_loop() -> asyncio.AbstractEventLoop:
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = None
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_background_loop.run_forever, name="sync-entry-loop", daemon=True
+            ).start()
+        return _background_loop
+
+def run_sync(coro: Coroutine):
+    """
+    Run a coroutine from synchronous code (the Lambda jobs) on a loop that
+    outlives the call, so loop-bound clients like the APNs connection pool and
+    the database engine stay warm between invocations.
+
+    Normally that is the calling thread's own loop, the one Mangum uses too. A
+    caller already inside a running loop can't reuse it, so its coroutine goes
+    to one long-lived loop thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _thread_loop().run_until_complete(coro)
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict
+
+# Upper bounds (seconds) of the histogram buckets every timing is counted in
+TIMING_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+flush_logger = logging.getLogger("puctee.metrics")
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and timing summaries.
+
+    Deliberately small: values live in memory, and snapshot() is what gets
+    logged or returned to whoever wants to look at them. flush() is the
+    export path: it logs what was recorded since the last flush as one JSON
+    line and starts a new window.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._since = time.time()
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = {
+                    "count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(TIMING_BUCKETS) + 1)
+                }
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+            timing["buckets"][bisect_left(TIMING_BUCKETS, seconds)] += 1
+
+    def _snapshot(self) -> dict:
+        timings = {}
+        for name, timing in self._timings.items():
+            # Cumulative "at most <bound> seconds" counts, Prometheus style
+            buckets, running = {}, 0
+            for bound, count in zip(TIMING_BUCKETS + ("+Inf",), timing["buckets"]):
+                running += count
+                buckets[str(bound)] = running
+            timings[name] = {"count": timing["count"], "sum": timing["sum"], "max": timing["max"], "buckets": buckets}
+        return {
+            "counters": dict(self._counters),
+            "gauges": dict(self._gauges),
+            "timings": timings,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return self._snapshot()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+            self._since = time.time()
+
+    def flush(self) -> dict:
+        """
+        Log counters and timings recorded since the last flush, plus current
+        gauges, as one JSON line on the "puctee.metrics" logger, then start
+        a new window. Gauges are kept: they are levels, not deltas.
+        Returns what was flushed; nothing is logged for an empty window.
+        """
+        with self._lock:
+            data = self._snapshot()
+            self._counters.clear()
+            self._timings.clear()
+            data["window"] = {"start": round(self._since, 3), "end": round(time.time(), 3)}
+            self._since = data["window"]["end"]
+        if data["counters"] or data["timings"]:
+            flush_logger.info(json.dumps({"metrics": data}, separators=(",", ":")))
+        return data
+
+metrics = MetricsRegistry()
+
+async def run_metrics_flusher(stop: asyncio.Event, interval_seconds: float) -> None:
+    """
+    Flush every `interval_seconds` until `stop` is set, for long-running
+    servers (uvicorn). Lambda flushes at the end of each invocation instead.
+    """
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval_seconds)
+            return
+        except asyncio.TimeoutError:
+            metrics.flush()
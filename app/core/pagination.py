@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by encode_cursor. Raises 400 for anything else.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor has the wrong shape")
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for value, kind in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def keyset_page(stmt, columns: Sequence, after: Optional[Tuple[Any, ...]], limit: int, descending: bool = True):
+    """
+    Order `stmt` by `columns` and fetch one page after the `after` key.
+
+    One extra row is fetched so split_page can tell whether another page exists.
+    The seek is a row-value comparison, so with an index on `columns` it costs
+    the same on page 1000 as on page 1, unlike OFFSET. Key columns must not
+    be NULL, or those rows drop out of later pages.
+    """
+    if after is not None:
+        key = tuple_(*columns)
+        stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return stmt.order_by(*order).limit(limit + 1)
+
+def paginate(stmt, columns: Sequence, cursor: Optional[str], limit: int, skip: int = 0, descending: bool = True):
+    """
+    Cursor pagination over `columns`, falling back to OFFSET for older
+    clients that send `skip` without a cursor.
+    """
+    if cursor is None and skip:
+        order = [column.desc() if descending else column.asc() for column in columns]
+        return stmt.order_by(*order).offset(skip).limit(limit + 1)
+    after = decode_cursor(cursor, [column.type.python_type for column in columns]) if cursor else None
+    return keyset_page(stmt, columns, after, limit, descending)
+
+def split_page(rows: Sequence, limit: int, columns: Sequence) -> Tuple[List, Optional[str]]:
+    """
+    Trim the look-ahead row and build the cursor for the next page, if any.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor([getattr(page[-1], column.key) for column in columns])
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Integer, String, any_, delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import DeviceToken, User
+
+def current_environment() -> str:
+    return "sandbox" if settings.APNS_USE_SANDBOX else "production"
+
+async def register_device_token(
+    db: AsyncSession,
+    user_id: int,
+    token: str,
+    device_id: Optional[str] = None,
+    environment: Optional[str] = None,
+) -> None:
+    """
+    Upsert a device's token. A token moves to whoever registered it last;
+    a device that got a new token drops its old one. Never commits.
+    """
+    if device_id is not None:
+        await db.execute(
+            delete(DeviceToken).where(
+                DeviceToken.user_id == user_id,
+                DeviceToken.device_id == device_id,
+                DeviceToken.token != token
+            )
+        )
+    stmt = insert(DeviceToken).values(
+        user_id=user_id,
+        device_id=device_id,
+        token=token,
+        environment=environment
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DeviceToken.token],
+            set_={
+                "user_id": stmt.excluded.user_id,
+                "device_id": stmt.excluded.device_id,
+                "environment": func.coalesce(stmt.excluded.environment, DeviceToken.environment),
+                "last_seen_at": func.now(),
+                "invalidated_at": None,
+            }
+        )
+    )
+
+async def get_device_tokens(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """
+    Active tokens for a batch of recipients in one query, keyed by user id.
+    Tokens registered for the other APNs environment are left out: sending
+    them would only come back as BadDeviceToken.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    result = await db.execute(
+        select(DeviceToken.user_id, DeviceToken.token)
+        .where(
+            DeviceToken.user_id == any_(literal(user_ids, ARRAY(Integer))),
+            DeviceToken.invalidated_at.is_(None),
+            or_(DeviceToken.environment.is_(None), DeviceToken.environment == current_environment())
+        )
+        .order_by(DeviceToken.user_id, DeviceToken.last_seen_at.desc())
+    )
+    tokens: Dict[int, List[str]] = {}
+    for user_id, token in result:
+        tokens.setdefault(user_id, []).append(token)
+    return tokens
+
+async def invalidate_device_tokens(db: AsyncSession, tokens: Iterable[str]) -> List[str]:
+    """
+    Mark tokens APNs reported as dead, and clear them from users.push_token,
+    in two statements. Returns the usernames whose cached snapshot (which
+    holds push_token) must be dropped after commit. Never commits.
+    """
+    tokens = list(tokens)
+    if not tokens:
+        return []
+    now = datetime.now(timezone.utc)
+    token_in = literal(tokens, ARRAY(String))
+    await db.execute(
+        update(DeviceToken)
+        .where(DeviceToken.token == any_(token_in), DeviceToken.invalidated_at.is_(None))
+        .values(invalidated_at=now)
+    )
+    result = await db.execute(
+        update(User)
+        .where(User.push_token == any_(token_in))
+        .values(push_token=None, push_token_invalidated_at=now)
+        .returning(User.username)
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+from sqlalchemy import Integer, any_, delete, func, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Notification, User
+
+async def adjust_unread_count(db: AsyncSession, user_id: int, delta: int) -> None:
+    """
+    Shift a user's unread notification counter by `delta`.
+
+    Runs in the caller's transaction, so the counter commits or rolls back
+    together with the notification change that caused it. Never commits.
+    """
+    if not delta:
+        return
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(unread_notification_count=func.greatest(User.unread_notification_count + delta, 0))
+    )
+
+def _id_in(ids: List[int]):
+    # id = ANY(:ids) binds one array parameter, so the statement text is the
+    # same however many ids are passed
+    return Notification.id == any_(literal(ids, ARRAY(Integer)))
+
+async def mark_notifications_read(db: AsyncSession, user_id: int, ids: Optional[List[int]] = None) -> int:
+    """
+    Mark the user's unread notifications (all of them, or those in `ids`) as
+    read in one statement. Returns how many changed. Never commits.
+    """
+    stmt = (
+        update(Notification)
+        .where(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    if ids is not None:
+        stmt = stmt.where(_id_in(ids))
+    result = await db.execute(stmt)
+    await adjust_unread_count(db, user_id, -result.rowcount)
+    return result.rowcount
+
+async def delete_notifications(db: AsyncSession, user_id: int, ids: List[int]) -> int:
+    """
+    Delete the user's notifications in `ids` in one statement. Returns how
+    many were deleted. Never commits.
+    """
+    result = await db.execute(
+        delete(Notification)
+        .where(
+            Notification.user_id == user_id,
+            _id_in(ids)
+        )
+        .returning(Notification.is_read)
+        .execution_options(synchronize_session=False)
+    )
+    was_read = result.scalars().all()
+    await adjust_unread_count(db, user_id, -sum(1 for read in was_read if not read))
+    return len(was_read)
@@ -0,0 +1,106 @@
+from typing import Optional
+
+from sqlalchemy import exists, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Location, Plan, PlanInvite, User, plan_participants
+from app.schemas import PlanInviteSummaryResponse, PlanLocationSummary, PlanParticipantSummary, PlanSummary
+
+def plan_summary_select(*extra_columns):
+    """
+    Core select for the slim plan projection, one row per plan.
+
+    The first location and the participant ids/avatars come from LATERAL
+    subqueries, so the whole thing is a single round trip instead of one
+    selectinload per relationship. Join further tables and add filters on
+    the returned statement; `extra_columns` are selected alongside.
+    """
+    first_location = (
+        select(Location.name, Location.latitude, Location.longitude)
+        .where(Location.plan_id == Plan.id)
+        .order_by(Location.created_at, Location.id)
+        .limit(1)
+        .lateral("first_location")
+    )
+    # Both arrays are ordered by user id so they zip back together
+    participants = (
+        select(
+            array_agg(aggregate_order_by(User.id, User.id)).label("participant_ids"),
+            array_agg(aggregate_order_by(User.profile_image_url, User.id)).label("participant_images"),
+        )
+        .select_from(plan_participants.join(User, User.id == plan_participants.c.user_id))
+        .where(plan_participants.c.plan_id == Plan.id)
+        .lateral("participants")
+    )
+    return (
+        select(
+            Plan.id,
+            Plan.title,
+            Plan.start_time,
+            Plan.status,
+            first_location.c.name.label("location_name"),
+            first_location.c.latitude.label("location_latitude"),
+            first_location.c.longitude.label("location_longitude"),
+            participants.c.participant_ids,
+            participants.c.participant_images,
+            *extra_columns
+        )
+        .select_from(Plan)
+        .outerjoin(first_location, true())
+        .outerjoin(participants, true())
+    )
+
+def plan_summary_from_row(row) -> PlanSummary:
+    location = None
+    if row.location_latitude is not None:
+        location = PlanLocationSummary(
+            name=row.location_name,
+            latitude=row.location_latitude,
+            longitude=row.location_longitude
+        )
+    return PlanSummary(
+        id=row.id,
+        title=row.title,
+        start_time=row.start_time,
+        status=row.status,
+        location=location,
+        participants=[
+            PlanParticipantSummary(id=user_id, profile_image_url=image)
+            for user_id, image in zip(row.participant_ids or [], row.participant_images or [])
+        ]
+    )
+
+def is_participant(user_id: int):
+    # Uses ix_plan_participants_user_id_plan_id
+    return exists().where(
+        plan_participants.c.plan_id == Plan.id,
+        plan_participants.c.user_id == user_id
+    )
+
+def _invite_columns():
+    return (
+        PlanInvite.id.label("invite_id"),
+        PlanInvite.user_id.label("invite_user_id"),
+        PlanInvite.status.label("invite_status"),
+    )
+
+def invite_summary_from_row(row) -> PlanInviteSummaryResponse:
+    return PlanInviteSummaryResponse(
+        id=row.invite_id,
+        plan_id=row.id,
+        user_id=row.invite_user_id,
+        status=row.invite_status,
+        plan=plan_summary_from_row(row)
+    )
+
+def invite_summary_select():
+    """
+    plan_summary_select joined to plan_invites, one row per invite.
+    """
+    return plan_summary_select(*_invite_columns()).join(PlanInvite, PlanInvite.plan_id == Plan.id)
+
+async def get_invite_summary(db: AsyncSession, invite_id: int) -> Optional[PlanInviteSummaryResponse]:
+    result = await db.execute(invite_summary_select().where(PlanInvite.id == invite_id))
+    row = result.first()
+    return invite_summary_from_row(row) if row else None
@@ -1,11 +1,126 @@
+import json
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional
+
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Integer, any_, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import make_transient_to_detached
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .session import get_db
-from app.core.auth import get_current_username
+from .session import AsyncSessionLocal, get_db
+from .redis import get_redis_client
+from app.core.auth import get_current_token_data, get_current_username
+from app.core.config import settings
 from app.models import User
+from app.schemas import TokenData
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_PREFIX = "user:snapshot:v3:"
+
+# Columns kept in the cached snapshot
+_SNAPSHOT_FIELDS = (
+    "id",
+    "email",
+    "display_name",
+    "username",
+    "is_active",
+    "push_token",
+    "profile_image_url",
+    "profile_version",
+)
+_SNAPSHOT_DATETIME_FIELDS = ("created_at", "updated_at", "push_token_invalidated_at")
+# Never cached: the password hash, and the unread count, which is changed with
+# plain UPDATEs that don't invalidate. Read them with an explicit query.
+_UNCACHED_FIELDS = ("hashed_password", "unread_notification_count")
+
+def _user_cache_key(username: str) -> str:
+    return f"{USER_CACHE_PREFIX}{username}"
+
+def _serialize_user(user: User) -> str:
+    snapshot = {field: getattr(user, field) for field in _SNAPSHOT_FIELDS}
+    for field in _SNAPSHOT_DATETIME_FIELDS:
+        value = getattr(user, field)
+        snapshot[field] = value.isoformat() if value else None
+    return json.dumps(snapshot)
+
+def _deserialize_user(raw: str) -> User:
+    snapshot = json.loads(raw)
+    for field in _SNAPSHOT_DATETIME_FIELDS:
+        if snapshot.get(field):
+            snapshot[field] = datetime.fromisoformat(snapshot[field])
+    user = User(**snapshot)
+    # Give the instance an identity so it can be merged without a SELECT;
+    # columns that are not in the snapshot stay expired.
+    make_transient_to_detached(user)
+    return user
+
+async def _read_cached_user(username: str) -> Optional[User]:
+    try:
+        redis = await get_redis_client().connect()
+        raw = await redis.get(_user_cache_key(username))
+    except Exception as e:
+        logger.warning(f"User cache read failed for {username}: {e}")
+        return None
+    if not raw:
+        return None
+    try:
+        return _deserialize_user(raw)
+    except Exception as e:
+        logger.warning(f"Discarding malformed user snapshot for {username}: {e}")
+        return None
+
+async def _write_cached_user(user: User) -> None:
+    try:
+        redis = await get_redis_client().connect()
+        await redis.set(
+            _user_cache_key(user.username),
+            _serialize_user(user),
+            ex=settings.USER_CACHE_TTL_SECONDS,
+        )
+    except Exception as e:
+        logger.warning(f"User cache write failed for {user.username}: {e}")
+
+async def invalidate_user_cache(*usernames: str) -> None:
+    """
+    Drop cached snapshots. Call after committing any change to a cached column.
+    """
+    keys = [_user_cache_key(name) for name in usernames if name]
+    if not keys:
+        return
+    try:
+        redis = await get_redis_client().connect()
+        await redis.delete(*keys)
+    except Exception as e:
+        logger.warning(f"User cache invalidation failed for {usernames}: {e}")
+
+async def get_users_by_ids(db: AsyncSession, user_ids: Iterable[int]) -> List[User]:
+    """
+    Load several users in one `id = ANY(:ids)` query. Unknown ids are skipped.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    result = await db.execute(
+        select(User).where(User.id == any_(literal(user_ids, ARRAY(Integer))))
+    )
+    return list(result.scalars().all())
+
+async def load_user_snapshot(db: AsyncSession, username: str) -> Optional[User]:
+    """
+    The user's cached snapshot, loaded from the database (and cached) on a
+    miss. None once the user no longer exists.
+    """
+    cached = await _read_cached_user(username)
+    if cached is not None:
+        return cached
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if user is not None:
+        await _write_cached_user(user)
+    return user
 
 async def get_current_user(
     current_username: str = Depends(get_current_username),
@@ -13,12 +128,61 @@ async def get_current_user(
 ) -> User:
     """
     Fetch the current User by username. Raises 404 if not found.
+
+    FastAPI caches this dependency per request, and the row itself is served
+    from a Redis snapshot when available, so most requests skip the users query.
+    The _UNCACHED_FIELDS columns are not loaded on a cached user (reading them
+    raises); select them explicitly instead.
     """
+    cached = await _read_cached_user(current_username)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
     result = await db.execute(
         select(User)
         .where(User.username == current_username)
     )
     user = result.scalar_one_or_none()
     if not user:
-        raise HTTPException(404, "User not found")
-    return user
\ No newline at end of file
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+    await _write_cached_user(user)
+    return user
+
+async def get_current_user_id(
+    token_data: TokenData = Depends(get_current_token_data),
+    db: AsyncSession = Depends(get_db),
+) -> int:
+    """
+    Current user's id from the access token, checked against the user
+    snapshot so a token outliving its user is a 401 rather than a foreign key
+    error later. Legacy username-only tokens fall back to get_current_user.
+    """
+    if token_data.user_id is None:
+        user = await get_current_user(token_data.username, db)
+        return user.id
+    user = await load_user_snapshot(db, token_data.username)
+    if user is None or user.id != token_data.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_data.user_id
+
+async def refresh_token_profile(token_data: TokenData) -> Optional[TokenData]:
+    """
+    The token's claims with display_name/profile_image_url taken from the
+    user snapshot when the token's pv is behind the user's profile_version.
+    None if the user no longer exists.
+    """
+    async with AsyncSessionLocal() as db:
+        user = await load_user_snapshot(db, token_data.username)
+    if user is None or user.id != token_data.user_id:
+        return None
+    if token_data.profile_version == user.profile_version:
+        return token_data
+    return token_data.model_copy(update={
+        "profile_version": user.profile_version,
+        "display_name": user.display_name,
+        "profile_image_url": user.profile_image_url,
+    })
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+# Four levels up from __file__ is the project root (see reset_db.py)
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT))
+
+from app.db.session import engine  # AsyncEngine
+from app.models import FriendInvite, Location, Notification, PenaltyApprovalRequest, plan_participants
+
+# (description, statement, index the planner should pick)
+HOT_QUERIES = [
+    (
+        "plans of a user (Plan.participants.contains)",
+        select(plan_participants.c.plan_id).where(plan_participants.c.user_id == 1),
+        "ix_plan_participants_user_id_plan_id",
+    ),
+    (
+        "unread notifications, newest first",
+        select(Notification)
+        .where(Notification.user_id == 1, Notification.is_read.is_(False))
+        .order_by(Notification.created_at.desc()),
+        "ix_notifications_user_id_is_read_created_at",
+    ),
+    (
+        "pending approval requests of a participant",
+        select(PenaltyApprovalRequest).where(
+            PenaltyApprovalRequest.plan_id == 1,
+            PenaltyApprovalRequest.penalty_user_id == 1,
+            PenaltyApprovalRequest.status == "pending",
+        ),
+        "ix_penalty_approval_requests_plan_id_penalty_user_id_status",
+    ),
+    (
+        "plan locations since a timestamp",
+        select(Location)
+        .where(Location.plan_id == 1, Location.created_at >= datetime.now(timezone.utc) - timedelta(hours=1))
+        .order_by(Location.created_at),
+        "ix_locations_plan_id_created_at",
+    ),
+    (
+        "pending received friend invites",
+        select(FriendInvite).where(FriendInvite.receiver_id == 1, FriendInvite.status == "pending"),
+        "ix_friend_invites_receiver_id_status",
+    ),
+]
+
+def _index_names(plan: dict):
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from _index_names(child)
+
+async def explain_hot_queries() -> bool:
+    """
+    EXPLAIN each hot query and check that it can use its index.
+
+    Sequential scans are disabled for the check: on a small dev database the
+    planner would rightly prefer them, which says nothing about production.
+    """
+    ok = True
+    async with engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        for description, stmt, expected in HOT_QUERIES:
+            sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = set(_index_names(plan[0]["Plan"]))
+            if expected in used:
+                print(f"✅ {description}: {expected}")
+            else:
+                ok = False
+                print(f"❌ {description}: expected {expected}, plan used {sorted(used) or 'no index'}")
+    await engine.dispose()
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(explain_hot_queries()) else 1)
@@ -0,0 +1,100 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class QueryStats:
+    """
+    Statements executed and time spent in the database within one scope
+    (usually a request).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float, executions: int = 1) -> None:
+        self.count += executions
+        self.total_seconds += seconds
+        self.shapes[statement] += executions
+
+    def repeated_shapes(self, threshold: int = None) -> List[Tuple[str, int]]:
+        """
+        Statements executed at least `threshold` times, the usual N+1 signature.
+        """
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [(statement, n) for statement, n in self.shapes.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_seconds * 1000:.1f};desc="{self.count} queries"'
+
+# Every tracker active in the current context; nested scopes (a test around a
+# request) all see the same statements.
+_active_stats: ContextVar[Tuple[QueryStats, ...]] = ContextVar("active_query_stats", default=())
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Fail if the block runs more than `limit` statements; tests use it to pin
+    a route's query budget so an N+1 shows up as a failure.
+    """
+    with track_queries() as stats:
+        yield stats
+    assert stats.count <= limit, (
+        f"{stats.count} queries, expected at most {limit}:\n" + "\n".join(stats.shapes)
+    )
+
+def install_query_hooks(engine) -> None:
+    """
+    Count statements run through an (async) engine against the active trackers.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        # executemany runs the statement once per parameter set
+        executions = len(parameters) if executemany and parameters else 1
+        for stats in _active_stats.get():
+            stats.record(statement, elapsed, executions)
+
+async def query_stats_middleware(request, call_next):
+    """
+    Report per-request query count and DB time in Server-Timing and the logs,
+    and warn about statements repeated within the request.
+    """
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = stats.server_timing()
+    logger.info(
+        f"{request.method} {request.url.path}: {stats.count} queries, "
+        f"{stats.total_seconds * 1000:.1f} ms in db"
+    )
+    for statement, n in stats.repeated_shapes():
+        logger.warning(
+            f"{request.method} {request.url.path}: statement ran {n} times in one request "
+            f"(possible N+1): {' '.join(statement.split())[:200]}"
+        )
+    return response
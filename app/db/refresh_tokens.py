@@ -0,0 +1,47 @@
+import hashlib
+import logging
+import time
+
+from fastapi import HTTPException, status
+
+from .redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REVOKED_REFRESH_PREFIX = "revoked_refresh:"
+
+def revocation_key(token: str, payload: dict) -> str:
+    # Tokens issued before jti was added are keyed by a digest of the token itself
+    jti = payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+    return f"{REVOKED_REFRESH_PREFIX}{jti}"
+
+def remaining_lifetime(payload: dict) -> int:
+    """
+    Seconds until the token expires; the revocation entry is kept exactly that long.
+    """
+    return max(1, int(payload["exp"] - time.time()))
+
+async def revoke_refresh_token(token: str, payload: dict) -> bool:
+    """
+    Mark a verified refresh token as revoked.
+
+    Returns True if this call revoked it and False if it was already revoked,
+    so /refresh can check and consume a token with a single atomic SET NX.
+    Fails closed with 503 when Redis is unreachable.
+    """
+    try:
+        redis = await get_redis_client().connect()
+        created = await redis.set(
+            revocation_key(token, payload),
+            "1",
+            ex=remaining_lifetime(payload),
+            nx=True,
+        )
+    except Exception as e:
+        logger.error(f"Refresh token revocation store unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token service temporarily unavailable",
+            headers={"Retry-After": "1"},
+        )
+    return bool(created)
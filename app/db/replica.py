@@ -0,0 +1,34 @@
+import logging
+
+from fastapi import Depends
+
+from .session import AsyncSessionLocal, ReadSessionLocal, engine, read_engine, recent_write_key
+from .redis import get_redis_client
+from app.core.auth import get_current_token_data
+from app.schemas import TokenData
+
+logger = logging.getLogger(__name__)
+
+async def has_recent_write(username: str) -> bool:
+    try:
+        redis = await get_redis_client().connect()
+        return bool(await redis.exists(recent_write_key(username)))
+    except Exception as e:
+        # Can't tell, so don't risk serving the caller stale data
+        logger.warning(f"Recent write check failed for {username}: {e}")
+        return True
+
+async def get_read_db(token_data: TokenData = Depends(get_current_token_data)):
+    """
+    Session for read-only routes. Uses the read replica unless the caller
+    committed a write within the last READ_AFTER_WRITE_SECONDS, in which case
+    it falls back to the primary so they see their own changes.
+    """
+    session_factory = ReadSessionLocal
+    if read_engine is engine or await has_recent_write(token_data.username):
+        session_factory = AsyncSessionLocal
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
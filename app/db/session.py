@@ -1,34 +1,213 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
 from ssl import create_default_context
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from app.core.config import settings
+from app.core.metrics import metrics
+from .redis import get_redis_client
+from .query_stats import install_query_hooks
 
-# Ensure we use asyncpg driver for async operations
-url = settings.DATABASE_URL
-if url.startswith("postgresql://"):
-    url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
-if "localhost" in url:
-    # Disable SSL for local
-    connect_args = { "ssl": False }
-else:
+logger = logging.getLogger(__name__)
+
+def _async_url(url: str) -> str:
+    # Ensure we use asyncpg driver for async operations
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+def _connect_args(url: str) -> dict:
+    if "localhost" in url:
+        # Disable SSL for local
+        return { "ssl": False }
     # Remote has proper certificate validation
     ssl_context = create_default_context(cafile=settings.RDS_CA_BUNDLE)
-    connect_args = { "ssl": ssl_context }
+    return { "ssl": ssl_context }
+
+url = _async_url(settings.DATABASE_URL)
+connect_args = _connect_args(url)
+
+class _InstrumentedPool:
+    """
+    Records how long checkouts wait and how full the pool is.
+    """
+
+    metrics_prefix = "db.pool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            metrics.incr(f"{self.metrics_prefix}.checkout_timeouts")
+            raise
+        metrics.observe(f"{self.metrics_prefix}.checkout_seconds", time.perf_counter() - start)
+        self._record_usage()
+        return record
+
+    def _record_usage(self):
+        pass
+
+class InstrumentedQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    def _record_usage(self):
+        in_use = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        metrics.gauge(f"{self.metrics_prefix}.checked_out", in_use)
+        metrics.gauge(f"{self.metrics_prefix}.saturation", in_use / capacity if capacity else 0.0)
+
+class InstrumentedNullPool(_InstrumentedPool, NullPool):
+    pass
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    metrics_prefix = "db.replica_pool"
+
+class ReplicaNullPool(InstrumentedNullPool):
+    metrics_prefix = "db.replica_pool"
+
+def resolve_pool_mode(mode: str) -> str:
+    if mode == "auto":
+        return "lambda" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "queue"
+    if mode not in ("queue", "lambda", "external"):
+        raise ValueError(f"Unknown DB_POOL_MODE: {mode}")
+    return mode
+
+def pool_options(mode: str, replica: bool = False) -> dict:
+    queue_pool = ReplicaQueuePool if replica else InstrumentedQueuePool
+    if mode == "external":
+        # RDS Proxy / pgbouncer does the pooling; keep nothing open between requests
+        return {"poolclass": ReplicaNullPool if replica else InstrumentedNullPool}
+    if mode == "lambda":
+        # A container serves one request at a time, so a big idle pool only eats server slots
+        return {
+            "poolclass": queue_pool,
+            "pool_size": 1,
+            "max_overflow": 2,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        }
+    return {
+        "poolclass": queue_pool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+pool_mode = resolve_pool_mode(settings.DB_POOL_MODE)
+logger.info(f"Database pool mode: {pool_mode}")
 
 engine = create_async_engine(
     url,
     echo=False,
     future=True,
     connect_args=connect_args,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=3600
+    **pool_options(pool_mode),
 )
 
+def install_idle_ping(engine, idle_seconds: float) -> None:
+    """
+    Replacement for pool_pre_ping: only connections that sat idle longer than
+    idle_seconds (e.g. across a frozen Lambda container) pay the round trip.
+    """
+    def mark_used(dbapi_connection, connection_record, *args):
+        connection_record.info["last_used"] = time.monotonic()
+
+    def ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        last_used = connection_record.info.get("last_used")
+        if last_used is None or time.monotonic() - last_used < idle_seconds:
+            return
+        metrics.incr("db.pool.idle_pings")
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            metrics.incr("db.pool.stale_connections")
+            # The pool discards this connection and retries the checkout with a new one
+            raise exc.DisconnectionError(f"Idle connection failed ping: {e}")
+
+    event.listen(engine.sync_engine, "connect", mark_used)
+    event.listen(engine.sync_engine, "checkin", mark_used)
+    event.listen(engine.sync_engine, "checkout", ping_if_idle)
+
+if settings.DATABASE_READ_URL:
+    read_url = _async_url(settings.DATABASE_READ_URL)
+    read_engine = create_async_engine(
+        read_url,
+        echo=False,
+        future=True,
+        connect_args=_connect_args(read_url),
+        **pool_options(pool_mode, replica=True),
+    )
+else:
+    # No replica configured: reads share the primary engine
+    read_engine = engine
+
+install_query_hooks(engine)
+if read_engine is not engine:
+    install_query_hooks(read_engine)
+
+if pool_mode != "external" and settings.DB_PING_IDLE_SECONDS >= 0:
+    install_idle_ping(engine, settings.DB_PING_IDLE_SECONDS)
+    if read_engine is not engine:
+        install_idle_ping(read_engine, settings.DB_PING_IDLE_SECONDS)
+
+# Username of the authenticated caller, set by app.core.auth. Commits made on
+# the caller's behalf keep their subsequent reads on the primary for a while.
+request_username: ContextVar[Optional[str]] = ContextVar("request_username", default=None)
+
+RECENT_WRITE_PREFIX = "db:recent_write:"
+
+def recent_write_key(username: str) -> str:
+    return f"{RECENT_WRITE_PREFIX}{username}"
+
+async def mark_recent_write(username: Optional[str]) -> None:
+    if read_engine is engine or not username:
+        return
+    try:
+        redis = await get_redis_client().connect()
+        await redis.set(recent_write_key(username), "1", ex=settings.READ_AFTER_WRITE_SECONDS)
+    except Exception as e:
+        logger.warning(f"Could not record recent write for {username}: {e}")
+
+class _TrackedSession(Session):
+    pass
+
+@event.listens_for(_TrackedSession, "after_flush")
+def _flag_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(_TrackedSession, "do_orm_execute")
+def _flag_dml(orm_execute_state):
+    # insert()/update()/delete() passed to session.execute bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+class PrimarySession(AsyncSession):
+    """
+    AsyncSession that remembers whether a commit actually wrote anything, so
+    the caller can be pinned to the primary for read-your-writes.
+    """
+    sync_session_class = _TrackedSession
+
+    async def commit(self) -> None:
+        await super().commit()
+        if self.sync_session.info.pop("has_writes", False):
+            await mark_recent_write(request_username.get())
+
 AsyncSessionLocal = sessionmaker(
     engine,
+    class_=PrimarySession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+ReadSessionLocal = sessionmaker(
+    read_engine,
     class_=AsyncSession,
     expire_on_commit=False,
     autocommit=False,
@@ -40,4 +219,4 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
@@ -1,13 +1,35 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import os
+import secrets
+from typing import Optional
 from app.api.routers import auth, users, friends, notifications, invite
 from app.api.routers.plans import router as plans_router
 from app.api.routers.plans.location_share_ws import router as websocket_router
+from app.core.config import settings
+from app.core.metrics import metrics, run_metrics_flusher
+from app.db.query_stats import query_stats_middleware
+from app.services.push_notification.outbox import outbox_drain_middleware, run_outbox_worker, worker_enabled
+from app.services.scheduler.backend import get_scheduler_backend
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    scheduler = get_scheduler_backend()
+    await scheduler.start()
+    stop = asyncio.Event()
+    tasks = []
+    if worker_enabled():
+        tasks.append(asyncio.create_task(run_outbox_worker(stop)))
+    if settings.METRICS_FLUSH_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_metrics_flusher(stop, settings.METRICS_FLUSH_SECONDS)))
     yield  # API server is now running
+    stop.set()
+    await asyncio.gather(*tasks)
+    await scheduler.shutdown()
+    # Whatever was recorded since the last periodic flush
+    metrics.flush()
 
 app = FastAPI(
     title="Puctee API",
@@ -25,6 +47,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query count / DB time (Server-Timing header + logs)
+app.middleware("http")(query_stats_middleware)
+# Without the in-process worker (Lambda), requests that queue pushes drain them on the way out
+if not worker_enabled() and "AWS_LAMBDA_FUNCTION_NAME" in os.environ:
+    app.middleware("http")(outbox_drain_middleware)
+
 # Register routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
@@ -40,4 +68,18 @@ async def root():
 
 @app.get("/health")
 def health():
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics(authorization: Optional[str] = Header(None)):
+    # Internal only: hidden unless METRICS_TOKEN is set, then bearer-protected
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Since the last flush (see METRICS_FLUSH_SECONDS); gauges are current
+    return metrics.snapshot()
@@ -1,6 +1,6 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Float, Table, JSON, Text
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Float, Table, JSON, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.db.base import Base
 
 # Association tables
@@ -19,11 +19,18 @@ plan_participants = Table(
     Column('arrival_status', String, nullable=True),  # on_time, late, not_arrived
     Column('checked_at', DateTime(timezone=True), nullable=True),  # Time when arrival was confirmed
     Column('penalty_status', String, default='none'),  # none, required, pendingApproval, completed, exempted
-    Column('penalty_completed_at', DateTime(timezone=True), nullable=True)  # When penalty was completed
+    Column('penalty_completed_at', DateTime(timezone=True), nullable=True),  # When penalty was completed
+    # PK is (plan_id, user_id); "plans of this user" lookups need user_id first
+    Index('ix_plan_participants_user_id_plan_id', 'user_id', 'plan_id')
 )
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # pg_trgm indexes for substring search (app.services.user_search)
+        Index('ix_users_username_trgm', 'username', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}),
+        Index('ix_users_display_name_trgm', 'display_name', postgresql_using='gin', postgresql_ops={'display_name': 'gin_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
@@ -31,10 +38,13 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
-    push_token = Column(String, nullable=True)
+    push_token = Column(String, nullable=True)  # Most recently registered device; see DeviceToken for all of them
+    push_token_invalidated_at = Column(DateTime(timezone=True), nullable=True)  # Set when APNs reported the last token dead
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     profile_image_url = Column(String, nullable=True)
+    profile_version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped when token profile claims change
+    unread_notification_count = Column(Integer, nullable=False, default=0, server_default="0")  # Maintained with notifications; APNs badge
 
     # Relationships
     friends = relationship(
@@ -70,6 +80,9 @@ class UserTrustStats(Base):
 
 class FriendInvite(Base):
     __tablename__ = "friend_invites"
+    __table_args__ = (
+        Index('ix_friend_invites_receiver_id_status', 'receiver_id', 'status'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"))
@@ -83,6 +96,9 @@ class FriendInvite(Base):
 
 class Plan(Base):
     __tablename__ = "plans"
+    __table_args__ = (
+        Index('ix_plans_start_time_id', 'start_time', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -123,6 +139,9 @@ class Penalty(Base):
 
 class PenaltyApprovalRequest(Base):
     __tablename__ = "penalty_approval_requests"
+    __table_args__ = (
+        Index('ix_penalty_approval_requests_plan_id_penalty_user_id_status', 'plan_id', 'penalty_user_id', 'status'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     plan_id = Column(Integer, ForeignKey('plans.id'), nullable=False)
@@ -144,6 +163,9 @@ class PenaltyApprovalRequest(Base):
 
 class Location(Base):
     __tablename__ = "locations"
+    __table_args__ = (
+        Index('ix_locations_plan_id_created_at', 'plan_id', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     plan_id = Column(Integer, ForeignKey("plans.id"))
@@ -159,6 +181,10 @@ class Location(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        Index('ix_notifications_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -169,3 +195,45 @@ class Notification(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="notifications")
+
+class PushOutbox(Base):
+    """
+    Pushes waiting to be sent. Rows are added in the same transaction as the
+    change that causes them and sent later by app.services.push_notification.outbox.
+    """
+    __tablename__ = "push_outbox"
+    __table_args__ = (
+        # The dispatcher only ever scans pending rows that are due
+        Index('ix_push_outbox_pending_next_attempt_at', 'next_attempt_at', postgresql_where=text("status = 'pending'")),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False, default="alert")  # alert, silent
+    payload = Column(JSON, nullable=False)  # title/body/category/data for alert; category/data for silent
+    status = Column(String, nullable=False, default="pending", server_default="pending")  # pending, sent, failed, skipped
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+class DeviceToken(Base):
+    """
+    One APNs token per device a user has registered. Pushes go to every
+    active token whose environment matches the server's (APNS_USE_SANDBOX).
+    """
+    __tablename__ = "device_tokens"
+    __table_args__ = (
+        UniqueConstraint('user_id', 'device_id', name='uq_device_tokens_user_id_device_id'),
+        Index('ix_device_tokens_user_id', 'user_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    device_id = Column(String, nullable=True)  # Client-side device identifier; NULL for clients that don't send one
+    token = Column(String, nullable=False, unique=True)
+    environment = Column(String, nullable=True)  # sandbox, production; NULL if unknown (pre-registry tokens)
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    invalidated_at = Column(DateTime(timezone=True), nullable=True)  # Set when APNs reported the token dead
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 # Base schemas
@@ -50,6 +50,11 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    # Only present in versioned tokens; None means look the user up by username
+    user_id: Optional[int] = None
+    profile_version: Optional[int] = None
+    display_name: Optional[str] = None
+    profile_image_url: Optional[str] = None
 
 class RefreshToken(BaseModel):
     refresh_token: str
@@ -152,6 +157,30 @@ class Plan(PlanBase):
             datetime: lambda v: v.strftime("%Y-%m-%dT%H:%M:%SZ")
         }
         
+# Slim plan projection (view=summary); built by app.db.db_plans
+PlanView = Literal["full", "summary"]
+
+class PlanParticipantSummary(BaseModel):
+    id: int
+    profile_image_url: Optional[str] = None
+
+class PlanLocationSummary(BaseModel):
+    name: Optional[str] = None
+    latitude: float
+    longitude: float
+
+class PlanSummary(PlanBase):
+    id: int
+    status: str
+    location: Optional[PlanLocationSummary] = None  # first location of the plan
+    participants: List[PlanParticipantSummary] = []
+
+    class Config:
+        # Same datetime format as the full Plan schema
+        json_encoders = {
+            datetime: lambda v: v.strftime("%Y-%m-%dT%H:%M:%SZ")
+        }
+
 class PlanInvite(BaseModel):
     id: int
     plan_id: int
@@ -174,6 +203,13 @@ class PlanInviteResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class PlanInviteSummaryResponse(BaseModel):
+    id: int
+    plan_id: int
+    user_id: int
+    status: str
+    plan: PlanSummary
         
 class NotificationBase(BaseModel):
     title: str
@@ -183,6 +219,9 @@ class NotificationBase(BaseModel):
 class NotificationCreate(NotificationBase):
     user_id: int
 
+class NotificationIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
 class NotificationResponse(NotificationBase):
     id: int
     user_id: int
@@ -262,7 +301,10 @@ class ProfileImageResponse(BaseModel):
         
 class PlanListRequest(BaseModel):
     skip: int = 0
-    limit: int = 20
+    limit: int = Field(20, ge=1)
+    # X-Next-Cursor from the previous page; takes precedence over skip
+    cursor: Optional[str] = None
+    view: PlanView = "full"
     plan_status: List[str] = ["upcoming", "ongoing", "completed", "cancelled"]
 
 # WebSocket Schemas
@@ -1,11 +1,57 @@
 from app.services.push_notification.notificationClient import notificationClient
 from app.models import Plan
 
-# Create singleton instance
+# Shared instance; cheap to create, the APNs key is fetched on first send
 push_notification_client = notificationClient()
 
+# Message builders: the content of each push, shared by the direct senders
+# below and by enqueue_push (app.services.push_notification.outbox)
+def friend_invite_message(sender_username: str, invite_id: int) -> dict:
+    return {
+        "title": "New Friend Request",
+        "body": f"{sender_username} sent you a friend request",
+        "data": {
+            "invite_id": invite_id,
+            "category": "FRIEND_INVITE"
+        }
+    }
+
+def plan_invite_message(title: str, body: str, plan_id: int = None) -> dict:
+    data = {"category": "PLAN_INVITE"}
+    if plan_id:
+        data["plan_id"] = plan_id
+    return {"title": title, "body": body, "data": data}
+
+def arrival_check_message(plan: Plan, is_arrived: bool) -> dict:
+    # Set different title and body based on arrival status
+    if is_arrived:
+        title = f"Arrival Check - {plan.title}"
+        body = f"You've arrived at {plan.locations[0].name} on time 🔥"
+    else:
+        title = f"Arrival Check - {plan.title}"
+        body = f"You didn't make it to {plan.locations[0].name} on time ❌"
+    return {
+        "title": title,
+        "body": body,
+        "category": "PLAN_ARRIVAL_CHECK",
+        "data": {
+            "plan_id": plan.id,
+            "is_arrived": is_arrived,
+        }
+    }
+
+def penalty_approval_request_message(requesting_user_name: str, request_id: int, plan_title: str) -> dict:
+    return {
+        "title": "Penalty Approval Request",
+        "body": f"{requesting_user_name} is asking for penalty approval for {plan_title}!",
+        "category": "PENALTY_APPROVAL_REQUEST",
+        "data": {
+            "request_id": request_id
+        }
+    }
+
 # Send friend invite notification
-async def send_friend_invite_notification(device_token: str, sender_username: str, invite_id: int) -> bool:
+async def send_friend_invite_notification(device_token: str, sender_username: str, invite_id: int, badge: int = None) -> bool:
     """
     Send friend invite notification
     
@@ -13,22 +59,19 @@ async def send_friend_invite_notification(device_token: str, sender_username: st
         device_token (str): Device token
         sender_username (str): Username of the user who sent the invite
         invite_id (int): Invite ID
+        badge (int, optional): Recipient's unread notification count
         
     Returns:
         bool: True on successful send, False on failure
     """
     return await push_notification_client.send_notification(
         device_token=device_token,
-        title="New Friend Request",
-        body=f"{sender_username} sent you a friend request",
-        data={
-            "invite_id": invite_id,
-            "category": "FRIEND_INVITE"
-        }
+        badge=badge,
+        **friend_invite_message(sender_username, invite_id)
     )
 
 # Send plan invite notification
-async def send_plan_invite_notification(device_token: str, title: str, body: str, plan_id: int = None) -> bool:
+async def send_plan_invite_notification(device_token: str, title: str, body: str, plan_id: int = None, badge: int = None) -> bool:
     """
     Send plan invite notification
     
@@ -37,19 +80,15 @@ async def send_plan_invite_notification(device_token: str, title: str, body: str
         title (str): Notification title
         body (str): Notification body
         plan_id (int, optional): Plan ID
+        badge (int, optional): Recipient's unread notification count
         
     Returns:
         bool: True on successful send, False on failure
     """
-    data = {"category": "PLAN_INVITE"}
-    if plan_id:
-        data["plan_id"] = plan_id
-        
     return await push_notification_client.send_notification(
         device_token=device_token,
-        title=title,       
-        body=body,
-        data=data
+        badge=badge,
+        **plan_invite_message(title, body, plan_id)
     )
     
 # Send silent wakeup notification
@@ -74,7 +113,7 @@ async def send_silent_wakeup_arrival_notification(device_token: str, plan_id: in
     )
     
 # Send arrival check notification
-async def send_arrival_check_notification(plan: Plan, device_token: str, is_arrived: bool) -> bool:
+async def send_arrival_check_notification(plan: Plan, device_token: str, is_arrived: bool, badge: int = None) -> bool:
     """
     Send arrival check notification
     
@@ -82,31 +121,19 @@ async def send_arrival_check_notification(plan: Plan, device_token: str, is_arri
         device_token (str): Device token
         plan_id (int): Plan ID
         is_arrived (bool): Whether the user has arrived
+        badge (int, optional): Recipient's unread notification count
         
     Returns:
         bool: True on successful send, False on failure
     """
-    # Set different title and body based on arrival status
-    if is_arrived:
-        title = f"Arrival Check - {plan.title}"
-        body = f"You've arrived at {plan.locations[0].name} on time 🔥"
-    else:
-        title = f"Arrival Check - {plan.title}"
-        body = f"You didn't make it to {plan.locations[0].name} on time ❌"
-    
     return await push_notification_client.send_notification(
         device_token=device_token,
-        title=title,
-        body=body,
-        category="PLAN_ARRIVAL_CHECK",
-        data={
-            "plan_id": plan.id,
-            "is_arrived": is_arrived,
-        }
+        badge=badge,
+        **arrival_check_message(plan, is_arrived)
     )
 
 # Send penalty approval request notification
-async def send_penalty_approval_request_notification(device_token: str, requesting_user_name: str, request_id: int, plan_title: str) -> bool:
+async def send_penalty_approval_request_notification(device_token: str, requesting_user_name: str, request_id: int, plan_title: str, badge: int = None) -> bool:
     """
     Send penalty approval request notification
     
@@ -115,16 +142,13 @@ async def send_penalty_approval_request_notification(device_token: str, requesti
         requesting_user_name (str): Name of the user requesting approval
         request_id (int): ID of the penalty approval request
         plan_title (str): Title of the plan
+        badge (int, optional): Recipient's unread notification count
         
     Returns:
         bool: True on successful send, False on failure
     """
     return await push_notification_client.send_notification(
         device_token=device_token,
-        title="Penalty Approval Request",
-        body=f"{requesting_user_name} is asking for penalty approval for {plan_title}!",
-        category="PENALTY_APPROVAL_REQUEST",
-        data={
-            "request_id": request_id
-        }
+        badge=badge,
+        **penalty_approval_request_message(requesting_user_name, request_id, plan_title)
     )
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import boto3
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SecretsManagerKeyProvider:
+    """
+    Fetches the APNs auth key (.p8 PEM) from AWS Secrets Manager.
+    """
+
+    def __init__(self, secret_arn: Optional[str] = None):
+        self.secret_arn = secret_arn or settings.APNS_SECRET_ARN
+
+    def fetch(self) -> str:
+        sm = boto3.client("secretsmanager", region_name=settings.AWS_REGION)
+        return sm.get_secret_value(SecretId=self.secret_arn)["SecretString"]
+
+class StaticKeyProvider:
+    """
+    Local stand-in that returns a fixed key, for tests and local runs.
+    """
+
+    def __init__(self, key_pem: str):
+        self.key_pem = key_pem
+        self.fetches = 0
+
+    def fetch(self) -> str:
+        self.fetches += 1
+        return self.key_pem
+
+class CachedAPNsKey:
+    """
+    APNs auth key fetched lazily and kept for the life of the process (one
+    Lambda container), re-fetched after `ttl_seconds` so a rotated secret is
+    picked up without a redeploy.
+
+    aioapns wants a key *file*, so the PEM is written once per distinct key
+    to a content-addressed path under the temp dir and reused after that.
+    """
+
+    def __init__(self, provider=None, ttl_seconds: Optional[int] = None):
+        self.provider = provider or SecretsManagerKeyProvider()
+        self.ttl_seconds = settings.APNS_KEY_CACHE_SECONDS if ttl_seconds is None else ttl_seconds
+        self._lock = threading.Lock()
+        self._path: Optional[str] = None
+        self._fetched_at = 0.0
+
+    def is_fresh(self) -> bool:
+        return self._path is not None and time.monotonic() - self._fetched_at < self.ttl_seconds
+
+    def key_path(self) -> str:
+        """
+        Path of the current key file. Only calls the provider on first use
+        or once the TTL has run out; if that refresh fails, the old key is
+        kept rather than failing the send.
+        """
+        with self._lock:
+            if self.is_fresh():
+                return self._path
+            try:
+                key_pem = self.provider.fetch()
+            except Exception as e:
+                if self._path:
+                    logger.warning(f"APNs key refresh failed, keeping cached key: {e}")
+                    self._fetched_at = time.monotonic()
+                    return self._path
+                raise
+            self._path = self._write(key_pem)
+            self._fetched_at = time.monotonic()
+            return self._path
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._fetched_at = 0.0
+
+    @staticmethod
+    def _write(key_pem: str) -> str:
+        digest = hashlib.sha256(key_pem.encode()).hexdigest()[:16]
+        path = os.path.join(tempfile.gettempdir(), f"apns_{digest}.p8")
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=tempfile.gettempdir(), suffix=".p8")
+            with os.fdopen(fd, "w") as f:
+                f.write(key_pem)
+            os.replace(tmp_path, path)
+        return path
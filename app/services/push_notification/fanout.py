@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models import User
+from app.services.push_notification.feedback import collect_invalid_tokens
+
+logger = logging.getLogger(__name__)
+
+# send(user, device_token) -> True on success, like the helpers in this package
+SendFn = Callable[[User, str], Awaitable[bool]]
+
+class PushResult:
+    """
+    Outcome of one push in a fan-out.
+    """
+
+    def __init__(self, user_id: int, device_token: str, success: bool, seconds: float, error: Optional[str] = None):
+        self.user_id = user_id
+        self.device_token = device_token
+        self.success = success
+        self.seconds = seconds
+        self.error = error
+
+class FanoutReport:
+    """
+    Per-token results plus aggregate timing for one fan-out.
+    """
+
+    def __init__(self, results: List[PushResult], seconds: float):
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for r in self.results if r.success)
+
+    @property
+    def failed(self) -> List[PushResult]:
+        return [r for r in self.results if not r.success]
+
+    def summary(self) -> dict:
+        slowest = max((r.seconds for r in self.results), default=0.0)
+        return {
+            "attempted": len(self.results),
+            "sent": self.sent,
+            "failed": len(self.results) - self.sent,
+            "total_ms": round(self.seconds * 1000, 1),
+            "slowest_ms": round(slowest * 1000, 1),
+        }
+
+def _tokens_for(user: User, device_tokens: Optional[Dict[int, List[str]]]) -> List[str]:
+    if device_tokens is None:
+        return [user.push_token] if user.push_token else []
+    return device_tokens.get(user.id, [])
+
+async def fan_out(
+    users: Iterable[User],
+    send: SendFn,
+    device_tokens: Optional[Dict[int, List[str]]] = None,
+    concurrency: Optional[int] = None,
+    semaphore: Optional[asyncio.Semaphore] = None
+) -> FanoutReport:
+    """
+    Send to every device of every user concurrently, at most `concurrency`
+    (APNS_FANOUT_CONCURRENCY) in flight at once.
+
+    `device_tokens` is db_devices.get_device_tokens for the same users, one
+    query for the whole batch; without it only User.push_token is used.
+
+    The sends share the APNs client's HTTP/2 connections, so N devices take
+    roughly one round trip instead of N. A failing or
+    raising send is recorded in its PushResult and never cancels the others.
+    Pass `semaphore` to share one limit across several concurrent fan-outs.
+    """
+    semaphore = semaphore or asyncio.Semaphore(concurrency or settings.APNS_FANOUT_CONCURRENCY)
+
+    async def _send_one(user: User, device_token: str) -> PushResult:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                success = bool(await send(user, device_token))
+                error = None if success else "rejected"
+            except Exception as e:
+                logger.error(f"Push to user {user.id} failed: {e}", exc_info=True)
+                success, error = False, str(e)
+            seconds = time.perf_counter() - start
+        metrics.observe("push.send_seconds", seconds)
+        return PushResult(user.id, device_token, success, seconds, error)
+
+    start = time.perf_counter()
+    # Dead tokens found by any send are pruned together in one UPDATE
+    async with collect_invalid_tokens():
+        results = await asyncio.gather(*(
+            _send_one(user, device_token)
+            for user in users
+            for device_token in _tokens_for(user, device_tokens)
+        ))
+    report = FanoutReport(list(results), time.perf_counter() - start)
+
+    metrics.observe("push.fanout_seconds", report.seconds)
+    metrics.incr("push.sent", report.sent)
+    metrics.incr("push.failed", len(report.results) - report.sent)
+    return report
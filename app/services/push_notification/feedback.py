@@ -0,0 +1,89 @@
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Set
+
+from app.core.metrics import metrics
+from app.db.db_devices import invalidate_device_tokens
+from app.db.db_users import invalidate_user_cache
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# APNs reasons (response.description) that mean the token will never work
+# again for this app. BadDeviceToken also covers a sandbox token sent to
+# production, so APNS_USE_SANDBOX must match the build being pushed to.
+INVALID_TOKEN_REASONS = {"Unregistered", "BadDeviceToken", "DeviceTokenNotForTopic"}
+# Worth another attempt; anything else is a permanent problem with the message
+RETRYABLE_REASONS = {"TooManyRequests", "InternalServerError", "ServiceUnavailable", "Shutdown", "IdleTimeout"}
+
+INVALID_TOKEN = "invalid_token"
+RETRYABLE = "retryable"
+REJECTED = "rejected"
+
+def classify_failure(reason: Optional[str]) -> str:
+    if reason in INVALID_TOKEN_REASONS:
+        return INVALID_TOKEN
+    if reason in RETRYABLE_REASONS:
+        return RETRYABLE
+    return REJECTED
+
+# Dead tokens waiting to be pruned. Inside a fan-out they are collected and
+# pruned once at the end; a lone send prunes straight away.
+_pending: ContextVar[Optional[Set[str]]] = ContextVar("push_invalid_tokens", default=None)
+
+async def record_failure(device_token: str, reason: Optional[str]) -> str:
+    """
+    Count an APNs rejection and queue the token for pruning if it is dead.
+    Returns the failure class.
+    """
+    kind = classify_failure(reason)
+    metrics.incr(f"push.failures.{kind}")
+    if kind == INVALID_TOKEN:
+        metrics.incr(f"push.invalid_tokens.{reason}")
+        batch = _pending.get()
+        if batch is not None:
+            batch.add(device_token)
+        else:
+            await prune_invalid_tokens({device_token})
+    return kind
+
+@asynccontextmanager
+async def collect_invalid_tokens():
+    """
+    Batch the pruning of every dead token reported inside the block into one
+    UPDATE when it exits. Tasks created inside inherit the batch, and a
+    nested block joins the outer one.
+    """
+    outer = _pending.get()
+    if outer is not None:
+        yield outer
+        return
+    batch: Set[str] = set()
+    reset = _pending.set(batch)
+    try:
+        yield batch
+    finally:
+        _pending.reset(reset)
+        if batch:
+            await prune_invalid_tokens(batch)
+
+async def prune_invalid_tokens(device_tokens: Set[str]) -> int:
+    """
+    Invalidate dead tokens in their own transaction, so pruning never
+    depends on (or rolls back with) the caller's work. Failures are logged,
+    not raised: the tokens will simply be reported again on the next send.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            usernames = await invalidate_device_tokens(db, device_tokens)
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Pruning {len(device_tokens)} dead push tokens failed: {e}", exc_info=True)
+        metrics.incr("push.prune_errors")
+        return 0
+
+    await invalidate_user_cache(*usernames)
+    metrics.incr("push.tokens_pruned", len(device_tokens))
+    logger.info(f"Pruned {len(device_tokens)} dead push tokens")
+    return len(device_tokens)
@@ -1,49 +1,140 @@
-import os
+import asyncio
 import logging
 import ssl
-import boto3
-import tempfile
+import time
 from aioapns import APNs, NotificationRequest, PushType
+from aioapns.exceptions import ConnectionClosed, ConnectionError as APNsConnectionError, MaxAttemptsExceeded
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.push_notification.credentials import CachedAPNsKey
+from app.services.push_notification.feedback import RETRYABLE, record_failure
+from app.services.push_notification.retry import Deadline, DeadlineExceeded, RetryPolicy
 
 logger = logging.getLogger(__name__)
 
+# Failures that mean the connection (not the notification) is bad; only these
+# throw the client away. APNs rejections come back as unsuccessful responses.
+CONNECTION_ERRORS = (ConnectionClosed, APNsConnectionError, MaxAttemptsExceeded, OSError, asyncio.TimeoutError)
+
+# Outcomes that aren't an APNs reason
+SUCCESS = "Success"
+CONNECTION_ERROR = "ConnectionError"
+DEADLINE_EXCEEDED = "DeadlineExceeded"
+ERROR = "Error"
+
+def push_category(category: str = None, data: dict = None) -> str:
+    # Alerts carry it in aps, invites only in the custom data
+    return category or (data or {}).get("category") or "UNCATEGORIZED"
+
+def record_attempt(category: str, outcome: str, seconds: float = None) -> None:
+    """
+    Metrics for one APNs request: its duration (histogram, per category)
+    and its outcome (per category and APNs reason), so latency and failure
+    rates can be charted instead of read out of the log lines.
+    """
+    if seconds is not None:
+        metrics.observe(f"push.apns.seconds.{category}", seconds)
+    metrics.incr(f"push.apns.outcome.{category}.{outcome}")
+
+def _elapsed(start):
+    # None when the request never went out (e.g. building the client failed)
+    return None if start is None else time.perf_counter() - start
+
+def _consume(future: asyncio.Future) -> None:
+    # A request abandoned at the deadline may still fail later; nobody awaits it
+    if not future.cancelled():
+        future.exception()
+
 class notificationClient:
-    def __init__(self):
+    """
+    APNs sender. Nothing happens at construction: the auth key is fetched on
+    the first send (see CachedAPNsKey) and the client, with its HTTP/2
+    connections, is kept for later sends and warm Lambda invocations.
+    """
+
+    def __init__(self, key_provider=None, host: str = None, port: int = None, retry_policy: RetryPolicy = None):
         self.client = None
-        self._initialize_client()
+        self._key = CachedAPNsKey(key_provider)
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Apple's servers unless APNS_HOST points somewhere else (see benchmarks/local_apns.py)
+        self.host = host or settings.APNS_HOST
+        self.port = port or settings.APNS_PORT
+        self._client_key_path = None
+        self._client_loop = None
 
-    def _initialize_client(self):
-        try:
-            # Get authentication key from AWS Secrets Manager
-            sm = boto3.client("secretsmanager")
-            resp = sm.get_secret_value(SecretId=settings.APNS_SECRET_ARN)
-            key_pem = resp["SecretString"]
-            
-            # Temporarily write to Lambda's /tmp directory
-            with tempfile.NamedTemporaryFile(dir="/tmp", suffix=".p8", delete=False) as tf:
-                tf.write(key_pem.encode())
-                key_path = tf.name
-
-            # SSL context configuration
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-
-            # Initialize APNs client
-            self.client = APNs(
-                key=key_path,
-                key_id=settings.APNS_AUTH_KEY_ID,
-                team_id=settings.APNS_TEAM_ID,
-                topic=settings.APNS_BUNDLE_ID,
-                use_sandbox=settings.APNS_USE_SANDBOX,
-                ssl_context=ssl_context
+    def _build_client(self, key_path: str) -> APNs:
+        # SSL context configuration
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+
+        client = APNs(
+            key=key_path,
+            key_id=settings.APNS_AUTH_KEY_ID,
+            team_id=settings.APNS_TEAM_ID,
+            topic=settings.APNS_BUNDLE_ID,
+            use_sandbox=settings.APNS_USE_SANDBOX,
+            ssl_context=ssl_context
+        )
+        if self.host:
+            # aioapns takes the address from the protocol class
+            protocol_class = client.pool.protocol_class
+            client.pool.protocol_class = type(
+                protocol_class.__name__,
+                (protocol_class,),
+                {"APNS_SERVER": self.host, "APNS_PORT": self.port}
             )
+            logger.info(f"APNs client pointed at {self.host}:{self.port}")
+        logger.info("Successfully initialized APNs client")
+        return client
 
-            logger.info("Successfully initialized APNs client")
-        except Exception as e:
-            logger.error(f"Failed to initialize APNs client: {str(e)}", exc_info=True)
-            raise
+    async def _get_client(self) -> APNs:
+        """
+        The live APNs client, built on first use. Rebuilt only when the key
+        was rotated, after reset_client(), or when running on a different
+        event loop than the one its connections belong to.
+        """
+        loop = asyncio.get_running_loop()
+        if self.client is not None and self._client_loop is loop and self._key.is_fresh():
+            return self.client
+
+        # Secrets Manager is a blocking call; keep it off the event loop
+        key_path = await asyncio.to_thread(self._key.key_path)
+        if self.client is None or self._client_loop is not loop or key_path != self._client_key_path:
+            self.reset_client()
+            self.client = self._build_client(key_path)
+            self._client_key_path = key_path
+            self._client_loop = loop
+        return self.client
+
+    def reset_client(self) -> None:
+        """
+        Drop the client after a connection-level failure; the next send
+        builds a new one. The cached key is kept.
+        """
+        if self.client is not None:
+            try:
+                self.client.pool.close()
+            except Exception as e:
+                logger.warning(f"Error closing APNs connections: {e}")
+        self.client = None
+
+    async def _request(self, client: APNs, request: NotificationRequest, deadline: Deadline):
+        """
+        One APNs request, bounded by what is left of the push's deadline.
+        The request itself is shielded: cancelling an aioapns send mid-stream
+        breaks the shared connection for every other push on it, so a reply
+        that comes after the deadline is simply dropped.
+        """
+        send = asyncio.ensure_future(client.send_notification(request))
+        send.add_done_callback(_consume)
+        try:
+            return await asyncio.wait_for(asyncio.shield(send), deadline.remaining())
+        except asyncio.TimeoutError:
+            if send.done():
+                # The request itself timed out (a connection problem)
+                raise
+            raise DeadlineExceeded()
 
     async def send_notification(
         self,
@@ -70,9 +161,10 @@ class notificationClient:
         Returns:
             bool: True on successful send, False on failure
         """
+        category_name = push_category(category, data)
+        start = None
         try:
-            if not self.client:
-                self._initialize_client()
+            client = await self._get_client()
 
             logger.info(f"Sending notification to device token: {device_token}")
             logger.info(f"Notification content - title: {title}, body: {body}")
@@ -84,8 +176,11 @@ class notificationClient:
                     "body": body
                 },
                 "sound": sound,
-                "badge": badge,
             }
+
+            # Omit badge unless given; a null badge isn't a valid count
+            if badge is not None:
+                aps_payload["badge"] = badge
             
             # Add category to aps if provided
             if category:
@@ -102,16 +197,32 @@ class notificationClient:
 
             # Send notification
             logger.info("Sending notification request...")
-            response = await self.client.send_notification(request)
-            
+            start = time.perf_counter()
+            response = await self._request(client, request, self.retry_policy.start())
+            seconds = time.perf_counter() - start
+
             if response.is_successful:
+                record_attempt(category_name, SUCCESS, seconds)
                 logger.info(f"Successfully sent notification to {device_token}")
                 return True
             else:
+                record_attempt(category_name, response.description or ERROR, seconds)
                 logger.error(f"Failed to send notification: {response.description}")
+                # Dead tokens are cleared from the user so later sends skip them
+                await record_failure(device_token, response.description)
                 return False
 
+        except DeadlineExceeded:
+            record_attempt(category_name, DEADLINE_EXCEEDED, _elapsed(start))
+            logger.error(f"No APNs response for {device_token} within {self.retry_policy.deadline_seconds}s")
+            return False
+        except CONNECTION_ERRORS as e:
+            record_attempt(category_name, CONNECTION_ERROR, _elapsed(start))
+            logger.error(f"APNs connection error, resetting client: {str(e)}", exc_info=True)
+            self.reset_client()
+            return False
         except Exception as e:
+            record_attempt(category_name, ERROR, _elapsed(start))
             logger.error(f"Error sending push notification: {str(e)}", exc_info=True)
             return False
 
@@ -120,25 +231,43 @@ class notificationClient:
         device_token: str,
         data: dict = None,
         category: str = None,
-        max_retries: int = 3
+        max_retries: int = None
     ) -> bool:
         """
         Send silent push notification with retry logic
-        
+
+        Only retryable APNs reasons and connection errors are retried, with
+        the client's RetryPolicy: jittered exponential backoff, all attempts
+        within one deadline. The client and its connections are kept across
+        retries unless the connection itself broke.
+
         Args:
             device_token (str): Device token
             data (dict, optional): Additional data
             category (str, optional): Notification category identifier
-            max_retries (int): Maximum number of retry attempts
-            
+            max_retries (int, optional): Maximum number of retry attempts
+                (default: the policy's, APNS_MAX_RETRIES)
+
         Returns:
             bool: True on successful send, False on failure
         """
+        policy = self.retry_policy
+        max_retries = policy.max_retries if max_retries is None else max_retries
+        deadline = policy.start()
+        category_name = push_category(category, data)
         for attempt in range(max_retries + 1):
+            if attempt:
+                delay = policy.delay(attempt)
+                if not deadline.allows(delay):
+                    metrics.incr(f"push.apns.deadline_exceeded.{category_name}")
+                    logger.error(f"[APNS_RETRY] ⏱ Deadline reached after {attempt} attempt(s) for device {device_token}")
+                    return False
+                metrics.incr(f"push.apns.retries.{category_name}")
+                logger.info(f"[APNS_RETRY] 🔄 Retrying in {delay:.2f}s...")
+                await asyncio.sleep(delay)
+            start = None
             try:
-                if not self.client or attempt > 0:
-                    logger.info(f"[APNS_RETRY] Initializing APNs client (attempt {attempt + 1}/{max_retries + 1}) for device {device_token}")
-                    self._initialize_client()
+                client = await self._get_client()
 
                 logger.info(f"[APNS_RETRY] Sending silent notification to device token: {device_token} (attempt {attempt + 1}/{max_retries + 1})")
 
@@ -163,25 +292,41 @@ class notificationClient:
 
                 # Send notification
                 logger.info(f"[APNS_RETRY] Sending silent notification request (attempt {attempt + 1})...")
-                response = await self.client.send_notification(request)
-                
+                start = time.perf_counter()
+                response = await self._request(client, request, deadline)
+                record_attempt(
+                    category_name,
+                    SUCCESS if response.is_successful else response.description or ERROR,
+                    time.perf_counter() - start
+                )
+
                 if response.is_successful:
                     logger.info(f"[APNS_RETRY] ✅ Successfully sent silent notification to {device_token} on attempt {attempt + 1}")
                     return True
                 else:
                     logger.error(f"[APNS_RETRY] ❌ Failed to send silent notification (attempt {attempt + 1}): {response.description}")
+                    if await record_failure(device_token, response.description) != RETRYABLE:
+                        # Retrying won't change a dead token or a bad payload
+                        return False
                     if attempt == max_retries:
+                        metrics.incr(f"push.apns.retries_exhausted.{category_name}")
                         logger.error(f"[APNS_RETRY] 🚫 All {max_retries + 1} attempts failed for device {device_token}")
                         return False
 
+            except DeadlineExceeded:
+                record_attempt(category_name, DEADLINE_EXCEEDED, _elapsed(start))
+                metrics.incr(f"push.apns.deadline_exceeded.{category_name}")
+                logger.error(f"[APNS_RETRY] ⏱ No APNs response within {policy.deadline_seconds}s for device {device_token}")
+                return False
             except Exception as e:
+                record_attempt(category_name, CONNECTION_ERROR if isinstance(e, CONNECTION_ERRORS) else ERROR, _elapsed(start))
                 logger.error(f"[APNS_RETRY] ❌ Error sending silent push notification (attempt {attempt + 1}/{max_retries + 1}): {str(e)}")
+                if isinstance(e, CONNECTION_ERRORS):
+                    # Only a broken connection warrants a new client
+                    self.reset_client()
                 if attempt == max_retries:
+                    metrics.incr(f"push.apns.retries_exhausted.{category_name}")
                     logger.error(f"[APNS_RETRY] 🚫 All {max_retries + 1} attempts failed for device {device_token}")
                     return False
-                else:
-                    logger.info(f"[APNS_RETRY] 🔄 Retrying in next attempt...")
-                    # Reset client for retry
-                    self.client = None
-        
+
         return False
\ No newline at end of file
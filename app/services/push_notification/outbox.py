@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
+import boto3
+from sqlalchemy import Integer, any_, case, event, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.event_loop import run_sync
+from app.core.metrics import metrics
+from app.db.db_devices import get_device_tokens
+from app.db.db_users import get_users_by_ids
+from app.db.session import AsyncSessionLocal
+from app.models import PushOutbox
+from app.services.push_notification import push_notification_client
+from app.services.push_notification.fanout import FanoutReport, fan_out
+from app.services.push_notification.feedback import collect_invalid_tokens
+
+logger = logging.getLogger(__name__)
+
+async def enqueue_push(db: AsyncSession, user_ids: Iterable[int], message: dict, kind: str = "alert") -> None:
+    """
+    Queue one push per user in the caller's transaction: nothing is sent
+    unless the transaction commits, and the request never waits on APNs.
+
+    `message` is one of the *_message builders in this package (or, for
+    kind="silent", a dict with category/data). The badge is filled in from
+    the recipient's unread count when the push is actually sent. Never commits.
+    """
+    rows = [{"user_id": user_id, "kind": kind, "payload": message} for user_id in user_ids]
+    if not rows:
+        return
+    await db.execute(PushOutbox.__table__.insert().values(rows))
+    # Lets the in-process worker wake up as soon as this commits
+    db.sync_session.info["push_outbox"] = True
+
+def worker_enabled() -> bool:
+    """
+    Whether this process should run the in-process dispatcher. A Lambda
+    container is frozen between invocations, so there each request that
+    queued pushes invokes the function to drain them (outbox_drain_middleware),
+    and the {"job": "drain_outbox"} schedule picks up anything left over.
+    """
+    if settings.PUSH_OUTBOX_WORKER is not None:
+        return settings.PUSH_OUTBOX_WORKER
+    return "AWS_LAMBDA_FUNCTION_NAME" not in os.environ
+
+# In-process worker wake-up; set after a commit that queued pushes
+_wakeup: Optional[asyncio.Event] = None
+# Set by outbox_drain_middleware for the current request; marked after a
+# commit that queued pushes
+_queued_in_request: ContextVar[Optional[dict]] = ContextVar("push_outbox_queued", default=None)
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session):
+    if not session.info.pop("push_outbox", False):
+        return
+    if _wakeup is not None:
+        _wakeup.set()
+    queued = _queued_in_request.get()
+    if queued is not None:
+        queued["pushes"] = True
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueue(session):
+    session.info.pop("push_outbox", None)
+
+def _backoff():
+    # base * 2^(attempts - 1) seconds, capped; computed in SQL so one UPDATE
+    # covers every failed row whatever its attempt count
+    seconds = func.least(
+        settings.PUSH_OUTBOX_BACKOFF_SECONDS * func.power(2, PushOutbox.attempts - 1),
+        settings.PUSH_OUTBOX_MAX_BACKOFF_SECONDS
+    )
+    return seconds * literal(timedelta(seconds=1))
+
+async def _claim(db: AsyncSession, batch_size: int) -> List:
+    """
+    Take up to `batch_size` due rows. Claimed rows are pushed out by the
+    lease, so a crashed dispatcher's rows come back on their own, and
+    SKIP LOCKED lets several dispatchers drain the table side by side.
+    """
+    due = (
+        select(PushOutbox.id)
+        .where(PushOutbox.status == "pending", PushOutbox.next_attempt_at <= func.now())
+        .order_by(PushOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(PushOutbox)
+        .where(PushOutbox.id.in_(due))
+        .values(
+            attempts=PushOutbox.attempts + 1,
+            next_attempt_at=func.now() + timedelta(seconds=settings.PUSH_OUTBOX_LEASE_SECONDS)
+        )
+        .returning(PushOutbox.id, PushOutbox.user_id, PushOutbox.kind, PushOutbox.payload, PushOutbox.attempts)
+    )
+    rows = result.all()
+    await db.commit()
+    return rows
+
+async def _send(row, user, device_token: str) -> bool:
+    if row.kind == "silent":
+        # The outbox does the retrying; no inline retries
+        return await push_notification_client.send_silent_notification(
+            device_token=device_token, max_retries=0, **row.payload
+        )
+    return await push_notification_client.send_notification(
+        device_token=device_token, badge=user.unread_notification_count, **row.payload
+    )
+
+def _ids(ids: List[int]):
+    return PushOutbox.id == any_(literal(ids, ARRAY(Integer)))
+
+async def dispatch_batch(batch_size: Optional[int] = None) -> dict:
+    """
+    Claim one batch, send it to every active device of each recipient
+    concurrently and record the outcome. A row counts as sent once any device
+    took it; rows where every device failed go back to pending with
+    exponential backoff until PUSH_OUTBOX_MAX_ATTEMPTS.
+
+    No transaction (or pooled connection) is held while APNs sends are in
+    flight: the claim is committed first, and results are written in a
+    short transaction of their own. The lease covers the gap.
+    """
+    batch_size = batch_size or settings.PUSH_OUTBOX_BATCH_SIZE
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        rows = await _claim(db, batch_size)
+        if not rows:
+            return {"claimed": 0, "sent": 0, "failed": 0, "skipped": 0}
+
+        # One query each for the recipients and all of their devices
+        user_ids = {row.user_id for row in rows}
+        users = {user.id: user for user in await get_users_by_ids(db, user_ids)}
+        device_tokens = await get_device_tokens(db, user_ids)
+
+    # One limit for the whole batch, however many rows it fans out to
+    semaphore = asyncio.Semaphore(settings.APNS_FANOUT_CONCURRENCY)
+
+    async def _send_row(row) -> Optional[FanoutReport]:
+        # None when the recipient has no device to send to
+        user = users.get(row.user_id)
+        if user is None or not device_tokens.get(row.user_id):
+            return None
+        return await fan_out(
+            [user],
+            lambda user, device_token: _send(row, user, device_token),
+            device_tokens,
+            semaphore=semaphore
+        )
+
+    async with collect_invalid_tokens():
+        reports = await asyncio.gather(*(_send_row(row) for row in rows))
+
+    # A row counts as sent once any of its devices took it
+    sent = [row.id for row, report in zip(rows, reports) if report is not None and report.sent]
+    failed = [row.id for row, report in zip(rows, reports) if report is not None and not report.sent]
+    skipped = [row.id for row, report in zip(rows, reports) if report is None]
+
+    async with AsyncSessionLocal() as db:
+        if sent:
+            await db.execute(update(PushOutbox).where(_ids(sent)).values(status="sent", sent_at=func.now()))
+        if skipped:
+            await db.execute(update(PushOutbox).where(_ids(skipped)).values(status="skipped", last_error="no push token"))
+        if failed:
+            await db.execute(
+                update(PushOutbox)
+                .where(_ids(failed))
+                .values(
+                    status=case((PushOutbox.attempts >= settings.PUSH_OUTBOX_MAX_ATTEMPTS, "failed"), else_="pending"),
+                    next_attempt_at=func.now() + _backoff(),
+                    last_error="send failed"
+                )
+            )
+        await db.commit()
+
+    metrics.incr("push.outbox.sent", len(sent))
+    metrics.incr("push.outbox.failed", len(failed))
+    metrics.incr("push.outbox.skipped", len(skipped))
+    metrics.observe("push.outbox.batch_seconds", time.perf_counter() - start)
+    return {"claimed": len(rows), "sent": len(sent), "failed": len(failed), "skipped": len(skipped)}
+
+async def drain_outbox(max_batches: Optional[int] = None) -> dict:
+    """
+    Dispatch batches until nothing is due or `max_batches` have run.
+    """
+    max_batches = max_batches or settings.PUSH_OUTBOX_MAX_BATCHES_PER_RUN
+    batch_size = settings.PUSH_OUTBOX_BATCH_SIZE
+    totals = {"batches": 0, "claimed": 0, "sent": 0, "failed": 0, "skipped": 0}
+    while totals["batches"] < max_batches:
+        result = await dispatch_batch(batch_size)
+        totals["batches"] += 1
+        for key, value in result.items():
+            totals[key] += value
+        if result["claimed"] < batch_size:
+            break
+    return totals
+
+async def run_outbox_worker(stop: asyncio.Event) -> None:
+    """
+    In-process dispatcher for long-running servers (uvicorn). Drains after
+    every commit that queued pushes, and polls every PUSH_OUTBOX_POLL_SECONDS
+    for retries that come due.
+    """
+    global _wakeup
+    _wakeup = asyncio.Event()
+    logger.info("Push outbox worker started")
+    while not stop.is_set():
+        _wakeup.clear()
+        try:
+            await drain_outbox()
+        except Exception as e:
+            logger.error(f"Push outbox worker error: {e}", exc_info=True)
+        waiters = [asyncio.ensure_future(_wakeup.wait()), asyncio.ensure_future(stop.wait())]
+        await asyncio.wait(waiters, timeout=settings.PUSH_OUTBOX_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+    _wakeup = None
+    logger.info("Push outbox worker stopped")
+
+_lambda_client = None
+
+def _invoke_drain() -> None:
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = boto3.client("lambda", region_name=settings.AWS_REGION)
+    _lambda_client.invoke(
+        FunctionName=os.environ["AWS_LAMBDA_FUNCTION_NAME"],
+        InvocationType="Event",
+        Payload=json.dumps({"job": "drain_outbox"}).encode()
+    )
+
+async def outbox_drain_middleware(request, call_next):
+    """
+    Lambda only: after a request that queued pushes, start an asynchronous
+    drain_outbox invocation so they go out now, not on the next scheduled drain.
+    Costs the request one Invoke call; needs lambda:InvokeFunction on itself.
+    """
+    queued = {}
+    token = _queued_in_request.set(queued)
+    try:
+        response = await call_next(request)
+    finally:
+        _queued_in_request.reset(token)
+    if queued:
+        try:
+            await asyncio.to_thread(_invoke_drain)
+        except Exception as e:
+            # The every-minute schedule still sends them
+            logger.warning(f"Push outbox drain invoke failed: {e}")
+    return response
+
+def run_drain_outbox(max_batches: Optional[int] = None) -> dict:
+    """
+    Synchronous entry point for the Lambda "drain_outbox" job.
+    """
+    return run_sync(drain_outbox(max_batches))
@@ -0,0 +1,60 @@
+import random
+import time
+from typing import Optional
+
+from app.core.config import settings
+
+class DeadlineExceeded(Exception):
+    """
+    The push ran out of time before APNs answered.
+    """
+
+class RetryPolicy:
+    """
+    How notificationClient retries a push: exponential backoff with full
+    jitter between attempts, bounded by an overall deadline per push.
+
+    Full jitter (a random delay between 0 and the exponential cap) spreads
+    the retries of a large fan-out instead of sending them back at APNs in
+    lockstep. The deadline covers every attempt and every wait, so a burst
+    of failures can't stretch one push (or a Lambda invocation) past it.
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        base_seconds: Optional[float] = None,
+        max_seconds: Optional[float] = None,
+        deadline_seconds: Optional[float] = None,
+        rng: Optional[random.Random] = None
+    ):
+        self.max_retries = settings.APNS_MAX_RETRIES if max_retries is None else max_retries
+        self.base_seconds = settings.APNS_RETRY_BASE_SECONDS if base_seconds is None else base_seconds
+        self.max_seconds = settings.APNS_RETRY_MAX_SECONDS if max_seconds is None else max_seconds
+        self.deadline_seconds = settings.APNS_SEND_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+        self._rng = rng or random.Random()
+
+    def delay(self, retry: int) -> float:
+        """
+        Wait before retry number `retry` (1 for the first retry).
+        """
+        cap = min(self.max_seconds, self.base_seconds * 2 ** (retry - 1))
+        return self._rng.uniform(0, cap)
+
+    def start(self) -> "Deadline":
+        return Deadline(self.deadline_seconds)
+
+class Deadline:
+    """
+    Time left for one push, across all of its attempts.
+    """
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def allows(self, seconds: float) -> bool:
+        # Room to wait `seconds` and still have time left for the request
+        return self.remaining() > seconds
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.core.config import settings
+from app.services.scheduler import silent_notification
+from app.services.scheduler.backend import SchedulerBackend, silent_job_name
+
+logger = logging.getLogger(__name__)
+
+async def run_silent_job(plan_id: int) -> None:
+    """
+    What a stored job runs. Jobs are persisted by reference to this
+    function, so its module and name must stay put.
+    """
+    result = await silent_notification.send_silent(plan_id)
+    logger.info(f"[APSCHEDULER] Silent notification job for plan {plan_id}: {result}")
+
+class APSchedulerBackend(SchedulerBackend):
+    """
+    In-process scheduling: an AsyncIOScheduler on the app's event loop,
+    with jobs kept in SCHEDULER_JOBSTORE_URL so they survive restarts. A job
+    that came due while the process was down still runs on the next start
+    if it is at most SCHEDULER_MISFIRE_GRACE_SECONDS late.
+
+    Every scheduler runs whatever it finds in the store, so only one process
+    per job store may use this backend (the push outbox worker, by contrast,
+    is safe to run in every process).
+    """
+
+    def __init__(self, jobstore_url: Optional[str] = None, misfire_grace_seconds: Optional[int] = None):
+        self.misfire_grace_seconds = (
+            settings.SCHEDULER_MISFIRE_GRACE_SECONDS if misfire_grace_seconds is None else misfire_grace_seconds
+        )
+        self.scheduler = AsyncIOScheduler(
+            jobstores={"default": SQLAlchemyJobStore(url=jobstore_url or settings.SCHEDULER_JOBSTORE_URL)},
+            timezone=timezone.utc
+        )
+
+    async def start(self) -> None:
+        if not self.scheduler.running:
+            self.scheduler.start()
+            logger.info(f"APScheduler started with {len(self.scheduler.get_jobs())} stored job(s)")
+
+    async def shutdown(self) -> None:
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def _add_job(self, plan_id: int, when_utc: datetime) -> None:
+        self.scheduler.add_job(
+            run_silent_job,
+            trigger="date",
+            run_date=when_utc,
+            args=[plan_id],
+            id=silent_job_name(plan_id),
+            name=f"Silent notification for plan {plan_id}",
+            replace_existing=True,
+            misfire_grace_time=self.misfire_grace_seconds
+        )
+
+    async def schedule_silent_notification(self, plan_id: int, when_utc: datetime, is_new: bool = False) -> bool:
+        try:
+            if when_utc.tzinfo is None:
+                when_utc = when_utc.replace(tzinfo=timezone.utc)
+            # A start time already in the past runs right away
+            when_utc = max(when_utc, datetime.now(timezone.utc))
+            # The job store is a blocking (sync SQLAlchemy) write
+            await asyncio.to_thread(self._add_job, plan_id, when_utc)
+            logger.info(f"Scheduled {silent_job_name(plan_id)} at {when_utc.isoformat()}")
+            return True
+        except Exception as e:
+            logger.exception(f"Failed to schedule silent notification for plan {plan_id}: {e}")
+            return False
+
+    def _remove_job(self, plan_id: int) -> None:
+        try:
+            self.scheduler.remove_job(silent_job_name(plan_id))
+        except JobLookupError:
+            logger.info(f"No existing job to remove: {silent_job_name(plan_id)}")
+
+    async def cancel_silent_notification(self, plan_id: int) -> bool:
+        try:
+            await asyncio.to_thread(self._remove_job, plan_id)
+            return True
+        except Exception as e:
+            logger.exception(f"Failed to cancel silent notification for plan {plan_id}: {e}")
+            return False
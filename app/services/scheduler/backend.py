@@ -0,0 +1,79 @@
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def silent_job_name(plan_id: int) -> str:
+    # One job per plan: scheduling again moves it instead of adding another
+    return f"puctee-plan-silent-{plan_id}"
+
+class SchedulerBackend(ABC):
+    """
+    Where a plan's silent wake-up job is scheduled.
+
+    - EventBridgeSchedulerService (eventbridge_scheduler): AWS EventBridge
+      Scheduler invokes the Lambda at the plan's start time.
+    - APSchedulerBackend (apscheduler_backend): the job runs in this
+      process, for uvicorn deployments, local runs and tests.
+
+    Selected with SCHEDULER_BACKEND; use schedule_silent_for_plan and
+    cancel_silent_for_plan rather than a backend directly.
+    """
+
+    async def start(self) -> None:
+        """
+        Called from the app lifespan; in-process backends start running jobs here.
+        """
+
+    async def shutdown(self) -> None:
+        pass
+
+    @abstractmethod
+    async def schedule_silent_notification(self, plan_id: int, when_utc: datetime, is_new: bool = False) -> bool:
+        """
+        Schedule (or move) the plan's wake-up. `is_new` says the plan can't
+        have a job yet. Returns False on failure instead of raising.
+        """
+
+    @abstractmethod
+    async def cancel_silent_notification(self, plan_id: int) -> bool:
+        pass
+
+_backend: Optional[SchedulerBackend] = None
+
+def get_scheduler_backend() -> SchedulerBackend:
+    """
+    The configured backend, built on first use.
+    """
+    global _backend
+    if _backend is None:
+        if settings.SCHEDULER_BACKEND == "apscheduler":
+            from app.services.scheduler.apscheduler_backend import APSchedulerBackend
+            _backend = APSchedulerBackend()
+        elif settings.SCHEDULER_BACKEND == "eventbridge":
+            missing = [name for name in ("SCHEDULER_TARGET_ARN", "SCHEDULER_ROLE_ARN") if not getattr(settings, name)]
+            if missing:
+                raise ValueError(f"SCHEDULER_BACKEND=eventbridge needs {', '.join(missing)}")
+            from app.services.scheduler.eventbridge_scheduler import EventBridgeSchedulerService
+            _backend = EventBridgeSchedulerService()
+        else:
+            raise ValueError(f"Unknown SCHEDULER_BACKEND: {settings.SCHEDULER_BACKEND}")
+        logger.info(f"Scheduler backend: {type(_backend).__name__}")
+    return _backend
+
+def set_scheduler_backend(backend: Optional[SchedulerBackend]) -> None:
+    """
+    Replace the backend (tests, local tooling); None goes back to the configured one.
+    """
+    global _backend
+    _backend = backend
+
+async def schedule_silent_for_plan(plan_id: int, when_utc: datetime, is_new: bool = False) -> bool:
+    return await get_scheduler_backend().schedule_silent_notification(plan_id, when_utc, is_new)
+
+async def cancel_silent_for_plan(plan_id: int) -> bool:
+    return await get_scheduler_backend().cancel_silent_notification(plan_id)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 from datetime import datetime, timezone, timedelta
@@ -6,75 +7,99 @@ import uuid
 
 import boto3
 from app.core.config import settings
+from app.services.scheduler.backend import SchedulerBackend, silent_job_name
 
 logger = logging.getLogger(__name__)
 
 SCHEDULE_GROUP = "default"
 
-class EventBridgeSchedulerService:
-    def __init__(self):
-        self.client = boto3.client('scheduler', region_name=settings.AWS_REGION)
-        self.lambda_arn = f"arn:aws:lambda:{settings.AWS_REGION}:002066576827:function:puctee-app"
-        self.role_arn = "arn:aws:iam::002066576827:role/puctee-scheduler-invoke-role"
-        self.dlq_sqs_arn = "arn:aws:sqs:ap-northeast-1:002066576827:puctee-scheduler-dlq"
+class EventBridgeSchedulerService(SchedulerBackend):
+    """
+    One-shot EventBridge Scheduler schedules that invoke the Lambda
+    ({"job": "send_silent"}) for a plan. boto3 is blocking, so every AWS
+    call runs in a worker thread instead of on the event loop.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or boto3.client('scheduler', region_name=settings.AWS_REGION)
+        self.lambda_arn = settings.SCHEDULER_TARGET_ARN
+        self.role_arn = settings.SCHEDULER_ROLE_ARN
+        self.dlq_sqs_arn = settings.SCHEDULER_DLQ_ARN
 
     def _get_schedule_name(self, plan_id: int) -> str:
-        return f"puctee-plan-silent-{plan_id}"
+        return silent_job_name(plan_id)
 
     def _ensure_utc_future(self, when_utc: datetime) -> datetime:
         if when_utc.tzinfo is None:
             when_utc = when_utc.replace(tzinfo=timezone.utc)
         else:
             when_utc = when_utc.astimezone(timezone.utc)
-
         now = datetime.now(timezone.utc)
         if (when_utc - now) < timedelta(seconds=20):
             when_utc = (now + timedelta(seconds=30)).replace(microsecond=0)
         return when_utc
 
-    async def schedule_silent_notification(self, plan_id: int, when_utc: datetime) -> bool:
+    def _schedule_params(self, plan_id: int, schedule_name: str, when_utc: datetime) -> dict:
+        # create_schedule and update_schedule take the same full definition
+        payload = {"job": "send_silent", "plan_id": plan_id, "schedule": schedule_name}
+        target = {
+            "Arn": self.lambda_arn,
+            "RoleArn": self.role_arn,
+            "Input": json.dumps(payload),
+            "RetryPolicy": {
+                "MaximumEventAgeInSeconds": 86400,
+                "MaximumRetryAttempts": 10
+            },
+        }
+        if self.dlq_sqs_arn:
+            target["DeadLetterConfig"] = {"Arn": self.dlq_sqs_arn}
+        return {
+            "Name": schedule_name,
+            "GroupName": SCHEDULE_GROUP,
+            "ScheduleExpression": f"at({when_utc.strftime('%Y-%m-%dT%H:%M:%S')})",
+            "ScheduleExpressionTimezone": "UTC",
+            "FlexibleTimeWindow": {"Mode": "OFF"},
+            "Target": target,
+            "State": "ENABLED",
+            "Description": f"Silent notification for plan {plan_id}",
+            "ClientToken": str(uuid.uuid4()),
+        }
+
+    def _upsert_schedule(self, params: dict, is_new: bool) -> dict:
+        """
+        Create or replace the schedule, starting with the call that is
+        expected to succeed: create for a new plan, update otherwise. Only a
+        wrong guess costs a second call.
+        """
+        errors = self.client.exceptions
+        if is_new:
+            try:
+                return self.client.create_schedule(**params)
+            except errors.ConflictException:
+                return self.client.update_schedule(**params)
+        try:
+            return self.client.update_schedule(**params)
+        except errors.ResourceNotFoundException:
+            return self.client.create_schedule(**params)
+
+    async def schedule_silent_notification(self, plan_id: int, when_utc: datetime, is_new: bool = False) -> bool:
+        """
+        Schedule (or move) the plan's silent wake-up, normally in one AWS call.
+        Pass is_new=True for a plan that can't have a schedule yet.
+        """
         try:
             schedule_name = self._get_schedule_name(plan_id)
             when_utc = self._ensure_utc_future(when_utc)
+            params = self._schedule_params(plan_id, schedule_name, when_utc)
 
-            ok = await self._delete_schedule_if_exists(schedule_name)
-            if not ok:
-                logger.warning(f"Delete existing schedule failed: {schedule_name}")
-
-            schedule_expression = f"at({when_utc.strftime('%Y-%m-%dT%H:%M:%S')})"
-
-            payload = {"job": "send_silent", "plan_id": plan_id, "schedule": schedule_name}
-
-            target = {
-                "Arn": self.lambda_arn,
-                "RoleArn": self.role_arn,
-                "Input": json.dumps(payload),
-                "RetryPolicy": {
-                    "MaximumEventAgeInSeconds": 86400,
-                    "MaximumRetryAttempts": 10
-                },
-            }
-            if self.dlq_sqs_arn:
-                target["DeadLetterConfig"] = {"Arn": self.dlq_sqs_arn}
-
-            resp = self.client.create_schedule(
-                Name=schedule_name,
-                GroupName=SCHEDULE_GROUP,
-                ScheduleExpression=schedule_expression,
-                ScheduleExpressionTimezone="UTC",
-                FlexibleTimeWindow={"Mode":  "OFF"},
-                Target=target,
-                State="ENABLED",
-                Description=f"Silent notification for plan {plan_id}",
-                ClientToken=str(uuid.uuid4()),
-            )
-            logger.info(f"Created schedule {schedule_name}: {resp.get('ScheduleArn')} at {when_utc.isoformat()}")
-
-            info = self.client.get_schedule(Name=schedule_name, GroupName=SCHEDULE_GROUP)
-            logger.info(f"Schedule next={info.get('NextInvocationTime')} last={info.get('LastRunTime')}")
+            resp = await asyncio.to_thread(self._upsert_schedule, params, is_new)
+            logger.info(f"Scheduled {schedule_name}: {resp.get('ScheduleArn')} at {when_utc.isoformat()}")
 
+            if settings.SCHEDULER_VERIFY_SCHEDULES:
+                # Diagnostics only; an extra round trip per schedule
+                info = await asyncio.to_thread(self.client.get_schedule, Name=schedule_name, GroupName=SCHEDULE_GROUP)
+                logger.info(f"Schedule {schedule_name} expression={info.get('ScheduleExpression')} state={info.get('State')}")
             return True
-
         except Exception as e:
             logger.exception(f"Failed to schedule silent notification for plan {plan_id}: {e}")
             return False
@@ -82,12 +107,12 @@ class EventBridgeSchedulerService:
     async def cancel_silent_notification(self, plan_id: int) -> bool:
         try:
             schedule_name = self._get_schedule_name(plan_id)
-            return await self._delete_schedule_if_exists(schedule_name)
+            return await asyncio.to_thread(self._delete_schedule_if_exists, schedule_name)
         except Exception as e:
             logger.exception(f"Failed to cancel silent notification for plan {plan_id}: {e}")
             return False
 
-    async def _delete_schedule_if_exists(self, schedule_name: str) -> bool:
+    def _delete_schedule_if_exists(self, schedule_name: str) -> bool:
         try:
             self.client.delete_schedule(Name=schedule_name, GroupName=SCHEDULE_GROUP)
             logger.info(f"Deleted existing schedule: {schedule_name}")
@@ -98,13 +123,3 @@ class EventBridgeSchedulerService:
         except Exception as e:
             logger.exception(f"Failed to delete schedule {schedule_name}: {e}")
             return False
-
-
-# Facade
-eventbridge_scheduler = EventBridgeSchedulerService()
-
-async def schedule_silent_for_plan(plan_id: int, when_utc: datetime) -> bool:
-    return await eventbridge_scheduler.schedule_silent_notification(plan_id, when_utc)
-
-async def cancel_silent_for_plan(plan_id: int) -> bool:
-    return await eventbridge_scheduler.cancel_silent_notification(plan_id)
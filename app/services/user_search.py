@@ -0,0 +1,132 @@
+import json
+import logging
+from typing import List
+
+from sqlalchemy import and_, func, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.db.redis import get_redis_client
+from app.models import User, user_friends
+from app.schemas import UserResponse
+
+logger = logging.getLogger(__name__)
+
+USER_SEARCH_CACHE_PREFIX = "user_search:"
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Shorter queries hold no complete trigram for the GIN index or similarity()
+MIN_RANKED_QUERY_LENGTH = 3
+
+def _matches(pattern: str):
+    return or_(
+        User.display_name.ilike(pattern, escape="\\"),
+        User.username.ilike(pattern, escape="\\"),
+    )
+
+def _build_short_search_statement(user_id: int, pattern: str, limit: int):
+    """
+    Unranked substring match for short queries: each group walks users in id
+    order and stops at `limit` rows instead of scoring every match.
+    """
+    friend_ids = select(user_friends.c.friend_id).where(user_friends.c.user_id == user_id)
+    friends = (
+        select(User, literal(1).label("is_friend"))
+        .where(_matches(pattern), User.id.in_(friend_ids))
+        .order_by(User.id)
+        .limit(limit)
+        .subquery()
+    )
+    others = (
+        select(User, literal(0).label("is_friend"))
+        .where(_matches(pattern), User.id != user_id, User.id.not_in(friend_ids))
+        .order_by(User.id)
+        .limit(limit)
+        .subquery()
+    )
+    matched = union_all(select(friends), select(others)).subquery()
+    matched_user = aliased(User, matched)
+    return select(matched_user).order_by(matched.c.is_friend.desc(), matched.c.id)
+
+def build_search_statement(user_id: int, query: str, limit: int):
+    """
+    One query for the search box: up to `limit` matching friends followed by
+    up to `limit` other matching users, each group ranked by trigram similarity.
+    """
+    pattern = f"%{_escape_like(query)}%"
+    if len(query) < MIN_RANKED_QUERY_LENGTH:
+        return _build_short_search_statement(user_id, pattern, limit)
+
+    is_friend = user_friends.c.friend_id.isnot(None)
+    similarity = func.greatest(
+        func.similarity(User.username, query),
+        func.similarity(User.display_name, query),
+    )
+    ranked = (
+        select(
+            User,
+            is_friend.label("is_friend"),
+            func.row_number().over(
+                partition_by=is_friend,
+                order_by=(similarity.desc(), User.id),
+            ).label("position"),
+        )
+        .outerjoin(
+            user_friends,
+            and_(user_friends.c.user_id == user_id, user_friends.c.friend_id == User.id),
+        )
+        .where(_matches(pattern), User.id != user_id)
+        .subquery()
+    )
+    ranked_user = aliased(User, ranked)
+    return (
+        select(ranked_user)
+        .where(ranked.c.position <= limit)
+        .order_by(ranked.c.is_friend.desc(), ranked.c.position)
+    )
+
+async def _read_cached(key: str):
+    try:
+        redis = await get_redis_client().connect()
+        raw = await redis.get(key)
+    except Exception as e:
+        logger.warning(f"User search cache read failed: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+async def _write_cached(key: str, results: List[dict]) -> None:
+    try:
+        redis = await get_redis_client().connect()
+        await redis.set(key, json.dumps(results), ex=settings.USER_SEARCH_CACHE_SECONDS)
+    except Exception as e:
+        logger.warning(f"User search cache write failed: {e}")
+
+async def search_users(db: AsyncSession, user_id: int, query: str, limit: int = 10) -> List[dict]:
+    """
+    Search users by display name or username, friends first.
+
+    Results are cached per user and normalized query for a few seconds, so
+    repeated keystrokes (and backspacing) in the search box don't re-query.
+    """
+    normalized = normalize_query(query)
+    if not normalized:
+        return []
+
+    key = f"{USER_SEARCH_CACHE_PREFIX}{user_id}:{normalized}"
+    cached = await _read_cached(key)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(build_search_statement(user_id, normalized, limit))
+    results = [
+        UserResponse.model_validate(user).model_dump(mode="json")
+        for user in result.scalars().all()
+    ]
+    await _write_cached(key, results)
+    return results
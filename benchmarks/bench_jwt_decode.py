@@ -0,0 +1,57 @@
+"""
+Microbenchmark: cached vs uncached access token decoding.
+
+Usage (from the project root, with the usual .env in place):
+    python -m benchmarks.bench_jwt_decode [--tokens 50] [--iterations 20000]
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from jose import jwt
+
+from app.core.auth import VerifiedTokenCache, create_access_token
+from app.core.config import settings
+
+
+def _uncached(tokens, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        jwt.decode(tokens[i % len(tokens)], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return time.perf_counter() - start
+
+
+def _cached(tokens, iterations):
+    cache = VerifiedTokenCache(max_entries=len(tokens))
+    start = time.perf_counter()
+    for i in range(iterations):
+        token = tokens[i % len(tokens)]
+        claims = cache.get(token)
+        if claims is None:
+            claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            cache.put(token, claims)
+    return time.perf_counter() - start, cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=50, help="distinct tokens (simulated sessions)")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    tokens = [
+        create_access_token({"sub": f"user{i}"}, expires_delta=timedelta(minutes=30))
+        for i in range(args.tokens)
+    ]
+
+    uncached = _uncached(tokens, args.iterations)
+    cached, stats = _cached(tokens, args.iterations)
+
+    print(f"tokens={args.tokens} iterations={args.iterations}")
+    print(f"uncached: {args.iterations / uncached:>12,.0f} decodes/s  ({uncached * 1e6 / args.iterations:.1f} us/op)")
+    print(f"cached:   {args.iterations / cached:>12,.0f} decodes/s  ({cached * 1e6 / args.iterations:.1f} us/op)")
+    print(f"speedup:  {uncached / cached:.1f}x  cache={stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Marking a large inbox as read: per-row ORM updates vs the set-based helpers
+in app.db.db_notifications. Reports statements executed (an executemany
+counts once per row) and wall time.
+
+Needs a throwaway Postgres database; pg_trgm is created if missing, since
+the users table has trigram indexes. Tables are created in a separate
+`bench_notifications` schema, which is dropped at the end.
+
+Usage (from the project root):
+    python -m benchmarks.bench_notification_bulk --database-url postgresql+asyncpg://... [--sizes 100 1000 5000]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.db_notifications import delete_notifications, mark_notifications_read
+from app.db.query_stats import install_query_hooks, track_queries
+from app.models import Notification, User
+
+SCHEMA = "bench_notifications"
+USER_ID = 1
+
+
+async def _seed(db, count):
+    await db.execute(text("TRUNCATE notifications"))
+    await db.execute(text(f"""
+        INSERT INTO notifications (user_id, title, content, type, is_read)
+        SELECT {USER_ID}, 'title ' || i, 'content', 'bench', false
+        FROM generate_series(1, {count}) AS i
+    """))
+    await db.execute(text(f"UPDATE users SET unread_notification_count = {count} WHERE id = {USER_ID}"))
+    await db.commit()
+
+
+async def _legacy_read_all(db):
+    # What mark_all_notifications_as_read used to do
+    result = await db.execute(
+        select(Notification).where(Notification.user_id == USER_ID, Notification.is_read == False)
+    )
+    for notification in result.scalars().all():
+        notification.is_read = True
+    await db.commit()
+
+
+async def _bulk_read_all(db):
+    await mark_notifications_read(db, USER_ID)
+    await db.commit()
+
+
+async def _bulk_delete(db):
+    ids = (await db.execute(select(Notification.id).where(Notification.user_id == USER_ID))).scalars().all()
+    with track_queries() as stats:
+        start = time.perf_counter()
+        await delete_notifications(db, USER_ID, ids)
+        await db.commit()
+        return stats.count, time.perf_counter() - start
+
+
+async def _measure(db, operation):
+    with track_queries() as stats:
+        start = time.perf_counter()
+        await operation(db)
+        return stats.count, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    install_query_hooks(engine)
+    async with engine.connect() as conn:
+        # users carries trigram indexes
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        await conn.run_sync(lambda sync_conn: User.__table__.create(sync_conn))
+        await conn.run_sync(lambda sync_conn: Notification.__table__.create(sync_conn))
+        await conn.execute(text(f"INSERT INTO users (id, username, email) VALUES ({USER_ID}, 'bench', 'bench@example.com')"))
+        await conn.commit()
+
+        db = AsyncSession(bind=conn, expire_on_commit=False)
+        for size in args.sizes:
+            await _seed(db, size)
+            legacy = await _measure(db, _legacy_read_all)
+            await _seed(db, size)
+            bulk = await _measure(db, _bulk_read_all)
+            await _seed(db, size)
+            delete = await _bulk_delete(db)
+            print(
+                f"unread={size:>6}  "
+                f"orm read-all: {legacy[0]:>3} statements {legacy[1] * 1000:8.1f}ms  "
+                f"bulk read-all: {bulk[0]:>3} statements {bulk[1] * 1000:8.1f}ms  "
+                f"bulk delete: {delete[0]:>3} statements {delete[1] * 1000:8.1f}ms"
+            )
+            db.expunge_all()
+        await db.close()
+
+        await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        await conn.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Page-N latency for the notifications list: OFFSET (skip) vs cursor paging
+via app.core.pagination. OFFSET has to walk past every earlier row, so its
+latency grows with N; the keyset seek should stay flat.
+
+Needs a throwaway Postgres database. Tables are created in a separate
+`bench_pagination` schema, which is dropped at the end.
+
+Usage (from the project root):
+    python -m benchmarks.bench_pagination --database-url postgresql+asyncpg://... [--rows 200000] [--pages 1 10 100 1000]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.pagination import encode_cursor, paginate, split_page
+from app.models import Notification, User
+
+SCHEMA = "bench_pagination"
+USER_ID = 1
+KEYSET = (Notification.created_at, Notification.id)
+
+
+def _page_query(cursor, skip, limit):
+    return paginate(select(Notification).where(Notification.user_id == USER_ID), KEYSET, cursor, limit, skip)
+
+
+async def _cursor_for_page(db, page, limit):
+    # Cursor a client would hold after reading pages 1..page-1 (not timed)
+    if page == 1:
+        return None
+    result = await db.execute(
+        select(*KEYSET)
+        .where(Notification.user_id == USER_ID)
+        .order_by(*[column.desc() for column in KEYSET])
+        .offset((page - 1) * limit - 1)
+        .limit(1)
+    )
+    return encode_cursor(result.one())
+
+
+async def _median_ms(db, stmt, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = (await db.execute(stmt)).scalars().all()
+        samples.append(time.perf_counter() - start)
+        db.expunge_all()
+    return statistics.median(samples) * 1000, rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    async with engine.connect() as conn:
+        # users carries trigram indexes
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        await conn.run_sync(lambda sync_conn: User.__table__.create(sync_conn))
+        await conn.run_sync(lambda sync_conn: Notification.__table__.create(sync_conn))
+        await conn.execute(text(f"INSERT INTO users (id, username, email) VALUES ({USER_ID}, 'bench', 'bench@example.com')"))
+        # A second user's rows make the user_id filter matter
+        await conn.execute(text(f"INSERT INTO users (id, username, email) VALUES ({USER_ID + 1}, 'other', 'other@example.com')"))
+        await conn.execute(text(f"""
+            INSERT INTO notifications (user_id, title, content, type, is_read, created_at)
+            SELECT {USER_ID} + (i % 2), 'title ' || i, 'content', 'bench', false,
+                   now() - (i || ' seconds')::interval
+            FROM generate_series(1, {args.rows * 2}) AS i
+        """))
+        await conn.execute(text("ANALYZE notifications"))
+        await conn.commit()
+
+        db = AsyncSession(bind=conn, expire_on_commit=False)
+        print(f"rows={args.rows} limit={args.limit}")
+        for page in args.pages:
+            if (page - 1) * args.limit >= args.rows:
+                print(f"page={page:>6}  skipped (past the last row)")
+                continue
+            offset_ms, offset_rows = await _median_ms(
+                db, _page_query(None, (page - 1) * args.limit, args.limit), args.repeat
+            )
+            cursor = await _cursor_for_page(db, page, args.limit)
+            cursor_ms, cursor_rows = await _median_ms(
+                db, _page_query(cursor, 0, args.limit), args.repeat
+            )
+            offset_page, _ = split_page(offset_rows, args.limit, KEYSET)
+            cursor_page, _ = split_page(cursor_rows, args.limit, KEYSET)
+            assert [n.id for n in offset_page] == [n.id for n in cursor_page]
+            print(f"page={page:>6}  offset: {offset_ms:8.2f}ms  cursor: {cursor_ms:8.2f}ms")
+        await db.close()
+
+        await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        await conn.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
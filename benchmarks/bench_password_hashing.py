@@ -0,0 +1,81 @@
+"""
+Login latency under concurrent load: inline bcrypt vs the password worker pool.
+
+A burst of simulated logins each verifies a bcrypt hash while trivial "other
+requests" fall due every 10 ms. Latencies are measured from arrival (or due
+time), so they include any time spent waiting for a blocked event loop.
+
+Usage (from the project root, with the usual .env in place):
+    python -m benchmarks.bench_password_hashing [--logins 32] [--ticks 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import HTTPException
+
+from app.core.auth import get_password_hash, verify_password, verify_password_async
+
+
+def _p99(samples):
+    return statistics.quantiles(samples, n=100)[98] if len(samples) > 1 else samples[0]
+
+
+async def _login_inline(hashed, arrived):
+    verify_password("correct horse battery staple", hashed)
+    return time.perf_counter() - arrived
+
+
+async def _login_offloaded(hashed, arrived):
+    try:
+        await verify_password_async("correct horse battery staple", hashed)
+    except HTTPException:
+        return None  # shed with 503
+    return time.perf_counter() - arrived
+
+
+async def _other_requests(ticks, interval):
+    # Trivial requests due every `interval`; lateness is time spent waiting on the loop
+    latencies = []
+    start = time.perf_counter()
+    for i in range(ticks):
+        due = start + i * interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        latencies.append(time.perf_counter() - due)
+    return latencies
+
+
+async def _run(login, hashed, logins, ticks, interval=0.01):
+    start = time.perf_counter()
+    other_task = asyncio.create_task(_other_requests(ticks, interval))
+    login_tasks = [asyncio.create_task(login(hashed, time.perf_counter())) for _ in range(logins)]
+    login_latencies = await asyncio.gather(*login_tasks)
+    other_latencies = await other_task
+    return time.perf_counter() - start, login_latencies, other_latencies
+
+
+def _report(label, elapsed, login_latencies, other_latencies):
+    shed = sum(1 for latency in login_latencies if latency is None)
+    login_latencies = [latency for latency in login_latencies if latency is not None]
+    print(
+        f"{label:<10} wall={elapsed:6.2f}s  shed={shed:<3} "
+        f"login p50={statistics.median(login_latencies) * 1000:7.1f}ms p99={_p99(login_latencies) * 1000:7.1f}ms  "
+        f"other-request p99={_p99(other_latencies) * 1000:7.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login attempts")
+    parser.add_argument("--ticks", type=int, default=200, help="concurrent lightweight requests")
+    args = parser.parse_args()
+
+    hashed = get_password_hash("correct horse battery staple")
+
+    _report("inline", *await _run(_login_inline, hashed, args.logins, args.ticks))
+    _report("offloaded", *await _run(_login_offloaded, hashed, args.logins, args.ticks))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
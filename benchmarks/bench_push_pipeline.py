@@ -0,0 +1,115 @@
+"""
+Silent wake-up fan-out (what run_send_silent does for a plan) against the
+local APNs stand-in: pushes per second, per-push latency percentiles and
+how many extra requests the retries cost, for plans of 10 to 10,000
+participants.
+
+Goes through the real pieces: fan_out, send_silent_wakeup_arrival_notification
+and notificationClient over HTTP/2, only with the stand-in in place of Apple.
+No database is needed: participants are built in memory, and dead tokens
+are counted instead of pruned.
+
+Usage (from the project root):
+    python -m benchmarks.bench_push_pipeline [--sizes 10 100 1000 10000] [--concurrency 20 100]
+        [--latency-ms 20] [--jitter-ms 10] [--error-rate 0.01] [--unregistered-rate 0.02]
+"""
+import argparse
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import app.services.push_notification as push
+from app.services.push_notification import feedback, send_silent_wakeup_arrival_notification
+from app.services.push_notification.fanout import fan_out
+from app.services.push_notification.credentials import StaticKeyProvider
+from benchmarks.local_apns import LocalAPNsServer, generate_auth_key
+from app.services.push_notification.notificationClient import notificationClient
+
+PLAN_ID = 1
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _run(server, size, devices_per_user, concurrency):
+    users = [SimpleNamespace(id=i, push_token=None) for i in range(size)]
+    device_tokens = {
+        user.id: [f"{user.id:08x}{device:056x}" for device in range(devices_per_user)]
+        for user in users
+    }
+    server.stats.reset()
+    report = await fan_out(
+        users,
+        lambda user, device_token: send_silent_wakeup_arrival_notification(device_token=device_token, plan_id=PLAN_ID),
+        device_tokens,
+        concurrency=concurrency
+    )
+    latencies = [r.seconds for r in report.results]
+    return report, latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--devices-per-user", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--unregistered-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Every failed send logs an error; that is noise here
+    logging.disable(logging.ERROR)
+
+    pruned = []
+
+    async def count_prunes(device_tokens):
+        pruned.append(len(device_tokens))
+        return len(device_tokens)
+
+    feedback.prune_invalid_tokens = count_prunes
+
+    server = LocalAPNsServer(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        unregistered_rate=args.unregistered_rate,
+        seed=args.seed
+    )
+    async with server:
+        # The send helpers use the package-level client; point it at the stand-in
+        push.push_notification_client = notificationClient(
+            StaticKeyProvider(generate_auth_key()), host=server.host, port=server.port
+        )
+        # Warm up: key file, JWT and the first connection
+        await send_silent_wakeup_arrival_notification(device_token="warmup", plan_id=PLAN_ID)
+
+        for concurrency in args.concurrency:
+            for size in args.sizes:
+                pruned.clear()
+                report, latencies = await _run(server, size, args.devices_per_user, concurrency)
+                stats = server.stats
+                pushes = len(report.results)
+                print(
+                    f"participants={size:>6}  concurrency={concurrency:>4}  "
+                    f"{pushes / report.seconds:8.0f} pushes/s  "
+                    f"p50 {_percentile(latencies, 0.50) * 1000:6.1f}ms  "
+                    f"p95 {_percentile(latencies, 0.95) * 1000:6.1f}ms  "
+                    f"p99 {_percentile(latencies, 0.99) * 1000:6.1f}ms  "
+                    f"max {max(latencies, default=0) * 1000:6.1f}ms  "
+                    f"sent {report.sent:>6}/{pushes:<6}  "
+                    f"requests {stats.requests:>6} (retries {stats.retried})  "
+                    f"pruned {sum(pruned):>5} in {len(pruned)} batch(es)  "
+                    f"connections {stats.open_connections} (new {stats.connections})  max in flight {stats.max_in_flight}"
+                )
+        push.push_notification_client.reset_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+User search on a synthetic million-user table: the old two-query ILIKE path
+vs build_search_statement, with and without the pg_trgm indexes.
+
+Needs a throwaway Postgres database with pg_trgm available. Everything is
+created in a separate `bench_user_search` schema, which is dropped at the end.
+
+Usage (from the project root):
+    python -m benchmarks.bench_user_search --database-url postgresql+asyncpg://... [--users 1000000]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models import User, user_friends
+from app.services.user_search import build_search_statement
+
+SCHEMA = "bench_user_search"
+SEARCHER_ID = 1
+QUERIES = ["ta", "tanaka", "user12", "yuki", "ka", "suzuki9"]
+NAMES = ["tanaka", "suzuki", "sato", "takahashi", "watanabe", "ito", "yamamoto", "nakamura", "kobayashi", "yuki"]
+
+
+async def _legacy_search(conn, query):
+    # The previous implementation: friend ids, then two ILIKE scans
+    pattern = f"%{query}%"
+    friend_ids = (await conn.execute(
+        select(user_friends.c.friend_id).where(user_friends.c.user_id == SEARCHER_ID)
+    )).scalars().all()
+    match = or_(User.display_name.ilike(pattern), User.username.ilike(pattern))
+    friends = (await conn.execute(
+        select(User.id).where(and_(match, User.id != SEARCHER_ID, User.id.in_(friend_ids))).limit(10)
+    )).scalars().all()
+    await conn.execute(
+        select(User.id).where(and_(match, User.id != SEARCHER_ID, ~User.id.in_(friend_ids), ~User.id.in_(friends))).limit(10)
+    )
+
+
+async def _ranked_search(conn, query):
+    await conn.execute(build_search_statement(SEARCHER_ID, query, 10))
+
+
+async def _time(conn, search, rounds):
+    samples = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            await search(conn, query)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, max(samples) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--friends", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        await conn.run_sync(lambda sync_conn: User.__table__.create(sync_conn))
+        await conn.run_sync(lambda sync_conn: user_friends.create(sync_conn))
+        # Drop the trigram indexes created with the table; they're added back below
+        await conn.execute(text("DROP INDEX ix_users_username_trgm, ix_users_display_name_trgm"))
+
+        names = "ARRAY[" + ", ".join(f"'{name}'" for name in NAMES) + "]"
+        print(f"Generating {args.users:,} users...")
+        await conn.execute(text(f"""
+            INSERT INTO users (id, email, username, display_name, hashed_password, is_active, profile_version)
+            SELECT i, 'user' || i || '@example.com', 'user' || i,
+                   initcap(({names})[1 + i % 10]) || ' ' || substr(md5(i::text), 1, 6),
+                   'x', true, 1
+            FROM generate_series(1, {args.users}) AS i
+        """))
+        await conn.execute(text(f"""
+            INSERT INTO user_friends (user_id, friend_id)
+            SELECT {SEARCHER_ID}, i FROM generate_series(2, {args.friends + 1}) AS i
+        """))
+        await conn.execute(text("ANALYZE users"))
+        await conn.commit()
+
+        for label, search in (("legacy", _legacy_search), ("ranked", _ranked_search)):
+            p50, worst = await _time(conn, search, args.rounds)
+            print(f"no index    {label:<7} p50={p50:8.1f}ms max={worst:8.1f}ms")
+
+        await conn.execute(text("CREATE INDEX ix_users_username_trgm ON users USING gin (username gin_trgm_ops)"))
+        await conn.execute(text("CREATE INDEX ix_users_display_name_trgm ON users USING gin (display_name gin_trgm_ops)"))
+        await conn.execute(text("ANALYZE users"))
+        await conn.commit()
+
+        for label, search in (("legacy", _legacy_search), ("ranked", _ranked_search)):
+            p50, worst = await _time(conn, search, args.rounds)
+            print(f"trgm index  {label:<7} p50={p50:8.1f}ms max={worst:8.1f}ms")
+
+        await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        await conn.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,283 @@
+"""
+HTTP/2 APNs stand-in for load tests: point APNS_HOST/APNS_PORT at it.
+Usage: python -m benchmarks.local_apns --port 8443 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import ssl
+import tempfile
+import zlib
+from typing import Dict, Iterable, Optional
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import ConnectionTerminated, DataReceived, RequestReceived, StreamEnded, StreamReset
+from h2.settings import SettingCodes
+
+logger = logging.getLogger(__name__)
+
+class LocalAPNsStats:
+    """
+    What the stand-in saw, for benchmarks and tests.
+    """
+
+    def __init__(self):
+        self.open_connections = 0
+        self.reset()
+
+    def reset(self) -> None:
+        # open_connections is live state, not a count, so it survives a reset
+        self.requests = 0
+        self.by_reason: Dict[str, int] = {}
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # requests per device token, to see retries
+        self.by_token: Dict[str, int] = {}
+
+    @property
+    def retried(self) -> int:
+        return sum(count - 1 for count in self.by_token.values() if count > 1)
+
+class _APNsProtocol(asyncio.Protocol):
+    def __init__(self, server: "LocalAPNsServer"):
+        self.server = server
+        self.conn = H2Connection(config=H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.transport = None
+        self.headers: Dict[int, dict] = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.stats.connections += 1
+        self.server.stats.open_connections += 1
+        self.conn.initiate_connection()
+        self.conn.update_settings({SettingCodes.MAX_CONCURRENT_STREAMS: self.server.max_concurrent_streams})
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, RequestReceived):
+                self.headers[event.stream_id] = dict(event.headers)
+            elif isinstance(event, DataReceived):
+                # The body is not inspected, but the window has to be given back
+                self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, StreamEnded):
+                self._respond_later(event.stream_id)
+            elif isinstance(event, StreamReset):
+                self.headers.pop(event.stream_id, None)
+            elif isinstance(event, ConnectionTerminated):
+                self.transport.close()
+        self._flush()
+
+    def connection_lost(self, exc):
+        self.server.stats.open_connections -= 1
+        self.transport = None
+
+    def _flush(self):
+        if self.transport is not None:
+            self.transport.write(self.conn.data_to_send())
+
+    def _respond_later(self, stream_id: int) -> None:
+        headers = self.headers.pop(stream_id, {})
+        token = headers.get(":path", "").rsplit("/", 1)[-1]
+        stats = self.server.stats
+        stats.requests += 1
+        stats.by_token[token] = stats.by_token.get(token, 0) + 1
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+
+        status, reason = self.server.outcome(token)
+        asyncio.get_running_loop().call_later(
+            self.server.latency(), self._respond, stream_id, headers.get("apns-id", ""), status, reason
+        )
+
+    def _respond(self, stream_id: int, apns_id: str, status: int, reason: Optional[str]) -> None:
+        stats = self.server.stats
+        stats.in_flight -= 1
+        key = reason or "Success"
+        stats.by_reason[key] = stats.by_reason.get(key, 0) + 1
+        if self.transport is None:
+            return
+
+        response_headers = [(":status", str(status)), ("apns-id", apns_id)]
+        if reason is None:
+            self.conn.send_headers(stream_id, response_headers, end_stream=True)
+        else:
+            body = {"reason": reason}
+            if reason == "Unregistered":
+                body["timestamp"] = int(datetime.datetime.now().timestamp() * 1000)
+            payload = json.dumps(body).encode()
+            self.conn.send_headers(stream_id, response_headers + [("content-type", "application/json")])
+            self.conn.send_data(stream_id, payload, end_stream=True)
+        self._flush()
+
+class LocalAPNsServer:
+    """
+    Answers /3/device/<token> like Apple, with configurable latency and failures.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,  # Share answered 503 (or 429, half the time); both retryable
+        unregistered_rate: float = 0.0,  # Share of tokens that are always 410, picked by token hash
+        unregistered_tokens: Iterable[str] = (),  # Always 410 Unregistered
+        bad_tokens: Iterable[str] = (),  # Always 400 BadDeviceToken
+        max_concurrent_streams: int = 1000,  # Per connection, like Apple's
+        seed: Optional[int] = None  # For repeatable error_rate draws
+    ):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.unregistered_rate = unregistered_rate
+        self.unregistered_tokens = set(unregistered_tokens)
+        self.bad_tokens = set(bad_tokens)
+        self.max_concurrent_streams = max_concurrent_streams
+        self.stats = LocalAPNsStats()
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def latency(self) -> float:
+        return (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+
+    def is_unregistered(self, token: str) -> bool:
+        if token in self.unregistered_tokens:
+            return True
+        return zlib.crc32(token.encode()) / 0xFFFFFFFF < self.unregistered_rate
+
+    def outcome(self, token: str):
+        """
+        (status, reason) for one request; reason is None on success.
+        """
+        if token in self.bad_tokens:
+            return 400, "BadDeviceToken"
+        if self.is_unregistered(token):
+            return 410, "Unregistered"
+        if self._random.random() < self.error_rate:
+            if self._random.random() < 0.5:
+                return 429, "TooManyRequests"
+            return 503, "ServiceUnavailable"
+        return 200, None
+
+    async def start(self) -> "LocalAPNsServer":
+        self._server = await asyncio.get_running_loop().create_server(
+            lambda: _APNsProtocol(self), self.host, self.port, ssl=_server_ssl_context()
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Local APNs listening on {self.host}:{self.port}")
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+def generate_auth_key() -> str:
+    """
+    A fresh ES256 (P-256) private key in PEM form, shaped like an APNs .p8,
+    for StaticKeyProvider when talking to the stand-in.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+
+_ssl_context: Optional[ssl.SSLContext] = None
+
+def _server_ssl_context() -> ssl.SSLContext:
+    # aioapns always connects over TLS, so the stand-in needs a certificate;
+    # a self-signed one, made once per process, is enough
+    global _ssl_context
+    if _ssl_context is not None:
+        return _ssl_context
+
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=30))
+        .sign(key, hashes.SHA256())
+    )
+
+    fd, path = tempfile.mkstemp(suffix=".pem")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption()
+            ))
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(path)
+    finally:
+        os.remove(path)
+    context.set_alpn_protocols(["h2"])
+    _ssl_context = context
+    return context
+
+async def _serve(args) -> None:
+    server = LocalAPNsServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        unregistered_rate=args.unregistered_rate,
+        seed=args.seed
+    )
+    async with server:
+        print(f"Local APNs on {server.host}:{server.port} (APNS_HOST={server.host} APNS_PORT={server.port})")
+        await asyncio.Event().wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--unregistered-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,12 @@ set -e
 # エラーメッセージを表示
 trap 'echo "Error occurred at line $LINENO. Command: $BASH_COMMAND"' ERR
 
+# アウトボックス送信スケジュール用の設定（デプロイ前に確認）
+REGION=${AWS_REGION:-ap-northeast-1}
+# 呼び出し先 Lambda と EventBridge が引き受けるロールは必須（アカウント固有のため既定値なし）
+LAMBDA_ARN=${SCHEDULER_TARGET_ARN:?SCHEDULER_TARGET_ARN を設定してください（例: arn:aws:lambda:REGION:ACCOUNT_ID:function:puctee-app）}
+ROLE_ARN=${SCHEDULER_ROLE_ARN:?SCHEDULER_ROLE_ARN を設定してください（例: arn:aws:iam::ACCOUNT_ID:role/puctee-scheduler-invoke-role）}
+
 # 一時ディレクトリを作成
 mkdir -p deploy
 
@@ -32,4 +38,23 @@ aws lambda update-function-code \
 # 一時ディレクトリを削除
 rm -rf deploy app.zip
 
+# プッシュ通知アウトボックスを毎分送信する EventBridge スケジュール（{"job":"drain_outbox"}）
+# Lambda では通知を登録したリクエストが drain_outbox を非同期で呼び出す。再送や呼び出し失敗分はこのスケジュールで送信する
+OUTBOX_SCHEDULE=puctee-push-outbox-drain
+OUTBOX_TARGET="{\"Arn\":\"$LAMBDA_ARN\",\"RoleArn\":\"$ROLE_ARN\",\"Input\":\"{\\\"job\\\":\\\"drain_outbox\\\"}\",\"RetryPolicy\":{\"MaximumRetryAttempts\":0}}"
+
+# 既にあれば更新、無ければ作成
+if aws scheduler get-schedule --name $OUTBOX_SCHEDULE --region $REGION > /dev/null 2>&1; then
+  OUTBOX_ACTION=update-schedule
+else
+  OUTBOX_ACTION=create-schedule
+fi
+aws scheduler $OUTBOX_ACTION \
+  --name $OUTBOX_SCHEDULE \
+  --region $REGION \
+  --schedule-expression "rate(1 minute)" \
+  --flexible-time-window '{"Mode":"OFF"}' \
+  --target "$OUTBOX_TARGET" \
+  --state ENABLED
+
 echo "Deployment completed successfully!" 
\ No newline at end of file
@@ -1,8 +1,10 @@
 import json
 import logging
 from mangum import Mangum
+from app.core.metrics import metrics
 from app.main import app
 from app.services.scheduler.silent_notification import run_send_silent
+from app.services.push_notification.outbox import run_drain_outbox
 
 # Configure logging for Lambda - Force INFO level
 root_logger = logging.getLogger()
@@ -24,10 +26,21 @@ logger = logging.getLogger(__name__)
 _asgi = Mangum(app)
 
 def handler(event, context):
+    """
+    Lambda entry point. Metrics are flushed before every return: the
+    container may be frozen (or never thawed) once the invocation ends.
+    """
+    try:
+        return _handle(event, context)
+    finally:
+        metrics.flush()
+
+def _handle(event, context):
     """
     Lambda handler:
     1) Process custom events {"job":"send_silent","plan_id":...} with highest priority
-    2) Delegate other events to FastAPI as API Gateway compatible events
+    2) Drain the push outbox on {"job":"drain_outbox"} (EventBridge rate schedule)
+    3) Delegate other events to FastAPI as API Gateway compatible events
     """
     # A. Handle string events from EventBridge Scheduler
     if isinstance(event, str):
@@ -60,7 +73,17 @@ def handler(event, context):
             logger.exception(f"[LAMBDA_HANDLER] send_silent failed for plan {plan_id}: %s", e)
             return {"statusCode": 500, "body": json.dumps({"ok": False, "error": "internal"})}
 
-    # C. Delegate other events (API Gateway/Function URL) to FastAPI
+    # C. Send queued pushes from the outbox
+    if isinstance(event, dict) and event.get("job") == "drain_outbox":
+        try:
+            result = run_drain_outbox(event.get("max_batches"))
+            logger.info(f"[LAMBDA_HANDLER] Push outbox drained: {result}")
+            return {"statusCode": 200, "body": json.dumps(result)}
+        except Exception as e:
+            logger.exception("[LAMBDA_HANDLER] drain_outbox failed: %s", e)
+            return {"statusCode": 500, "body": json.dumps({"ok": False, "error": "internal"})}
+
+    # D. Delegate other events (API Gateway/Function URL) to FastAPI
     #    Add missing sourceIp to prevent Mangum KeyError
     if isinstance(event, dict) and "requestContext" in event:
         rc = event["requestContext"]
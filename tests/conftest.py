@@ -1,15 +1,18 @@
 import pytest
-import asyncio
-from typing import AsyncGenerator, Generator
+import pytest_asyncio
+from typing import AsyncGenerator
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.core.config import settings
+from app.db import db_users
 from app.db.base import Base
+from app.db.query_stats import install_query_hooks
 from app.db.session import get_db
 from app.main import app
+from app.services import user_search
 
 # Database URL for testing
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -20,22 +23,14 @@ engine = create_async_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+# Lets tests assert query budgets with app.db.query_stats.assert_max_queries
+install_query_hooks(engine)
 
 # Create session for testing
 TestingSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
-@pytest.fixture(scope="session")
-def event_loop() -> Generator:
-    """Fixture to create event loop"""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
-
 @pytest.fixture(scope="session")
 async def db_engine():
     """Fixture to create database engine"""
@@ -61,4 +56,52 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides[get_db] = override_get_db
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
-    app.dependency_overrides.clear() 
\ No newline at end of file
+    app.dependency_overrides.clear() 
+
+@pytest_asyncio.fixture
+async def sqlite_engine():
+    """Fresh in-memory database with every table, counted by assert_max_queries"""
+    test_engine = create_async_engine(TEST_DATABASE_URL, poolclass=StaticPool)
+    install_query_hooks(test_engine)
+    async with test_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield test_engine
+    await test_engine.dispose()
+
+@pytest.fixture
+def sqlite_sessions(sqlite_engine):
+    """Session factory for sqlite_engine, for tests that need several sessions"""
+    return sessionmaker(sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+
+@pytest_asyncio.fixture
+async def sqlite_session(sqlite_sessions) -> AsyncSession:
+    """One session on sqlite_engine"""
+    async with sqlite_sessions() as session:
+        yield session
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis calls the caches make"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def connect(self):
+        return self
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+@pytest.fixture
+def fake_redis(monkeypatch) -> FakeRedis:
+    """Route the user snapshot and user search caches to an in-memory FakeRedis"""
+    redis = FakeRedis()
+    for module in (db_users, user_search):
+        monkeypatch.setattr(module, "get_redis_client", lambda: redis)
+    return redis
@@ -0,0 +1,60 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.auth import create_access_token, create_user_access_token, decode_access_token, token_data_from_claims
+from app.db import db_users
+from app.db.db_users import get_current_user_id, refresh_token_profile
+from app.models import User
+
+def _user():
+    return User(
+        id=42,
+        username="testuser",
+        display_name="Test User",
+        profile_image_url="https://example.com/u/42.png",
+        profile_version=3,
+    )
+
+def test_versioned_token_carries_user_claims():
+    token_data = token_data_from_claims(decode_access_token(create_user_access_token(_user())))
+
+    assert token_data.username == "testuser"
+    assert token_data.user_id == 42
+    assert token_data.profile_version == 3
+    assert token_data.display_name == "Test User"
+    assert token_data.profile_image_url == "https://example.com/u/42.png"
+
+def test_legacy_token_has_no_user_id():
+    token_data = token_data_from_claims(decode_access_token(create_access_token({"sub": "testuser"})))
+
+    assert token_data.username == "testuser"
+    assert token_data.user_id is None
+
+@pytest.mark.asyncio
+async def test_user_id_is_checked_against_the_snapshot(fake_redis):
+    await db_users._write_cached_user(_user())
+    token_data = token_data_from_claims(decode_access_token(create_user_access_token(_user())))
+
+    assert await get_current_user_id(token_data, db=None) == 42
+
+@pytest.mark.asyncio
+async def test_token_of_deleted_user_is_rejected(sqlite_session, fake_redis):
+    token_data = token_data_from_claims(decode_access_token(create_user_access_token(_user())))
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user_id(token_data, db=sqlite_session)
+    assert exc.value.status_code == 401
+
+@pytest.mark.asyncio
+async def test_stale_profile_claims_come_from_the_snapshot(fake_redis):
+    token_data = token_data_from_claims(decode_access_token(create_user_access_token(_user())))
+    renamed = _user()
+    renamed.display_name = "Renamed"
+    renamed.profile_version = 4
+    await db_users._write_cached_user(renamed)
+
+    refreshed = await refresh_token_profile(token_data)
+
+    assert refreshed.display_name == "Renamed"
+    assert refreshed.profile_version == 4
+    assert refreshed.profile_image_url == "https://example.com/u/42.png"
@@ -0,0 +1,19 @@
+import pytest
+
+from app.db.session import InstrumentedNullPool, InstrumentedQueuePool, pool_options, resolve_pool_mode
+
+def test_auto_mode_detects_lambda(monkeypatch):
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "puctee-api")
+    assert resolve_pool_mode("auto") == "lambda"
+
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME")
+    assert resolve_pool_mode("auto") == "queue"
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_pool_mode("bogus")
+
+def test_pool_options_per_mode():
+    assert pool_options("external") == {"poolclass": InstrumentedNullPool}
+    assert pool_options("lambda")["pool_size"] == 1
+    assert pool_options("queue")["poolclass"] is InstrumentedQueuePool
@@ -0,0 +1,21 @@
+import asyncio
+
+from app.core.event_loop import run_sync
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+def test_sync_callers_reuse_one_loop():
+    first = run_sync(_current_loop())
+    assert run_sync(_current_loop()) is first
+    assert not first.is_closed()
+
+def test_callers_inside_a_running_loop_share_one_loop_thread():
+    async def main():
+        return asyncio.get_running_loop(), run_sync(_current_loop()), run_sync(_current_loop())
+
+    outer, first, second = asyncio.run(main())
+
+    assert first is second
+    assert first is not outer
+    assert first.is_running()
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import boto3
+from botocore.stub import ANY, Stubber
+
+from app.services.scheduler.eventbridge_scheduler import EventBridgeSchedulerService
+
+ARN = "arn:aws:scheduler:ap-northeast-1:000000000000:schedule/default/puctee-plan-silent-1"
+
+def _service():
+    client = boto3.client(
+        "scheduler", region_name="ap-northeast-1", aws_access_key_id="test", aws_secret_access_key="test"
+    )
+    service = EventBridgeSchedulerService(client)
+    service.lambda_arn = "arn:aws:lambda:ap-northeast-1:000000000000:function:puctee-app"
+    service.role_arn = "arn:aws:iam::000000000000:role/puctee-scheduler-invoke-role"
+    return service, Stubber(client)
+
+def _schedule(service, is_new=False):
+    when = datetime.now(timezone.utc) + timedelta(hours=1)
+    return asyncio.run(service.schedule_silent_notification(1, when, is_new=is_new))
+
+def _params():
+    return {
+        "Name": "puctee-plan-silent-1", "GroupName": "default", "ScheduleExpression": ANY,
+        "ScheduleExpressionTimezone": "UTC", "FlexibleTimeWindow": {"Mode": "OFF"}, "Target": ANY,
+        "State": "ENABLED", "Description": ANY, "ClientToken": ANY,
+    }
+
+def test_reschedule_is_one_update_off_the_event_loop():
+    service, stubber = _service()
+    threads = []
+    service.client.meta.events.register("before-parameter-build.scheduler.*", lambda **kwargs: threads.append(threading.get_ident()))
+    stubber.add_response("update_schedule", {"ScheduleArn": ARN}, _params())
+
+    with stubber:
+        assert _schedule(service) is True
+        stubber.assert_no_pending_responses()
+    assert threads and threading.get_ident() not in threads
+
+def test_new_plan_is_one_create():
+    service, stubber = _service()
+    stubber.add_response("create_schedule", {"ScheduleArn": ARN}, _params())
+
+    with stubber:
+        assert _schedule(service, is_new=True) is True
+        stubber.assert_no_pending_responses()
+
+def test_missing_schedule_falls_back_to_create():
+    service, stubber = _service()
+    stubber.add_client_error("update_schedule", "ResourceNotFoundException", http_status_code=404)
+    stubber.add_response("create_schedule", {"ScheduleArn": ARN}, _params())
+
+    with stubber:
+        assert _schedule(service) is True
+        stubber.assert_no_pending_responses()
+
+def test_failure_is_reported_not_raised():
+    service, stubber = _service()
+    stubber.add_client_error("update_schedule", "ThrottlingException", http_status_code=429)
+
+    with stubber:
+        assert _schedule(service) is False
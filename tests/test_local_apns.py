@@ -0,0 +1,115 @@
+import asyncio
+
+from app.core.metrics import metrics
+
+from app.services.push_notification import feedback
+from app.services.push_notification.credentials import StaticKeyProvider
+from benchmarks.local_apns import LocalAPNsServer, generate_auth_key
+from app.services.push_notification.notificationClient import notificationClient
+from app.services.push_notification.retry import RetryPolicy
+
+FAST_RETRIES = RetryPolicy(base_seconds=0.01, max_seconds=0.02, deadline_seconds=5)
+
+def _run(server, scenario, retry_policy=FAST_RETRIES):
+    # Real aioapns client over HTTP/2 + TLS against the stand-in
+    async def main():
+        async with server:
+            client = notificationClient(
+                StaticKeyProvider(generate_auth_key()), host=server.host, port=server.port, retry_policy=retry_policy
+            )
+            try:
+                return await scenario(client)
+            finally:
+                client.reset_client()
+
+    return asyncio.run(main())
+
+def test_client_sends_through_the_stand_in(monkeypatch):
+    pruned = []
+
+    async def prune(device_tokens):
+        pruned.append(set(device_tokens))
+        return len(device_tokens)
+
+    monkeypatch.setattr(feedback, "prune_invalid_tokens", prune)
+    server = LocalAPNsServer(unregistered_tokens={"dead"})
+
+    async def scenario(client):
+        ok = await asyncio.gather(*(client.send_notification(f"token-{i}", "title", "body") for i in range(20)))
+        dead = await client.send_notification("dead", "title", "body")
+        return ok, dead
+
+    ok, dead = _run(server, scenario)
+
+    assert all(ok)
+    assert dead is False
+    assert pruned == [{"dead"}]
+    assert server.stats.requests == 21
+    assert server.stats.by_reason == {"Success": 20, "Unregistered": 1}
+    assert server.stats.connections == 1
+
+def test_silent_sends_retry_retryable_errors():
+    metrics.reset()
+    server = LocalAPNsServer(error_rate=1.0, seed=1)
+
+    async def scenario(client):
+        return await client.send_silent_notification("token", max_retries=2)
+
+    assert _run(server, scenario) is False
+    assert server.stats.by_token == {"token": 3}
+    assert server.stats.retried == 2
+
+    snapshot = metrics.snapshot()
+    outcomes = {
+        name.rsplit(".", 1)[-1]: count
+        for name, count in snapshot["counters"].items()
+        if name.startswith("push.apns.outcome.UNCATEGORIZED.")
+    }
+    assert sum(outcomes.values()) == 3
+    assert set(outcomes) <= {"TooManyRequests", "ServiceUnavailable"}
+    assert snapshot["counters"]["push.apns.retries.UNCATEGORIZED"] == 2
+    assert snapshot["counters"]["push.apns.retries_exhausted.UNCATEGORIZED"] == 1
+    assert snapshot["timings"]["push.apns.seconds.UNCATEGORIZED"]["count"] == 3
+
+def test_retry_delays_are_jittered_and_capped():
+    policy = RetryPolicy(base_seconds=0.1, max_seconds=0.3)
+    for retry, cap in ((1, 0.1), (2, 0.2), (3, 0.3), (8, 0.3)):
+        delays = [policy.delay(retry) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert len(set(delays)) > 1
+
+def test_deadline_bounds_retries():
+    server = LocalAPNsServer(error_rate=1.0, seed=1)
+    policy = RetryPolicy(max_retries=50, base_seconds=0.05, max_seconds=0.05, deadline_seconds=0.3)
+
+    async def scenario(client):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        ok = await client.send_silent_notification("token")
+        return ok, loop.time() - start
+
+    ok, elapsed = _run(server, scenario, policy)
+
+    assert ok is False
+    assert elapsed < 0.5
+    assert 1 < server.stats.requests < 51
+
+def test_slow_reply_hits_the_deadline_without_dropping_the_connection():
+    metrics.reset()
+    server = LocalAPNsServer(latency_ms=300)
+
+    async def scenario(client):
+        client.retry_policy = RetryPolicy(deadline_seconds=0.05)
+        late = await client.send_silent_notification("token", max_retries=3)
+        server.latency_ms = 0
+        client.retry_policy = FAST_RETRIES
+        # Let the abandoned reply land first; it must not break the connection
+        await asyncio.sleep(0.3)
+        return late, await client.send_notification("token", "title", "body")
+
+    late, ok = _run(server, scenario)
+
+    assert late is False
+    assert ok is True
+    assert server.stats.connections == 1
+    assert metrics.snapshot()["counters"]["push.apns.outcome.UNCATEGORIZED.DeadlineExceeded"] == 1
@@ -0,0 +1,52 @@
+import json
+import logging
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import MetricsRegistry
+from app.main import read_metrics
+
+def test_timings_are_bucketed_cumulatively():
+    registry = MetricsRegistry()
+    for seconds in (0.004, 0.02, 0.02, 3.0, 30.0):
+        registry.observe("push.apns.seconds.PLAN_INVITE", seconds)
+
+    timing = registry.snapshot()["timings"]["push.apns.seconds.PLAN_INVITE"]
+    assert timing["count"] == 5
+    assert timing["max"] == 30.0
+    assert timing["buckets"]["0.005"] == 1
+    assert timing["buckets"]["0.025"] == 3
+    assert timing["buckets"]["5.0"] == 4
+    assert timing["buckets"]["+Inf"] == 5
+
+def test_flush_logs_the_window_and_keeps_gauges(caplog):
+    registry = MetricsRegistry()
+    registry.incr("push.apns.outcome.PLAN_INVITE.Success", 3)
+    registry.observe("push.apns.seconds.PLAN_INVITE", 0.1)
+    registry.gauge("db.pool.primary.saturation", 0.5)
+
+    with caplog.at_level(logging.INFO, logger="puctee.metrics"):
+        flushed = registry.flush()
+        registry.flush()
+
+    assert flushed["counters"] == {"push.apns.outcome.PLAN_INVITE.Success": 3}
+    # Only the non-empty window is logged, as one JSON line
+    assert len(caplog.records) == 1
+    assert json.loads(caplog.records[0].getMessage())["metrics"]["counters"] == flushed["counters"]
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == {} and snapshot["timings"] == {}
+    assert snapshot["gauges"] == {"db.pool.primary.saturation": 0.5}
+
+def test_metrics_endpoint_needs_the_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    with pytest.raises(HTTPException) as exc:
+        read_metrics("Bearer anything")
+    assert exc.value.status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    with pytest.raises(HTTPException) as exc:
+        read_metrics(None)
+    assert exc.value.status_code == 401
+    assert "counters" in read_metrics("Bearer s3cret")
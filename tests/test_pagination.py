@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.pagination import decode_cursor, encode_cursor, paginate, split_page
+from app.models import Notification
+
+KEYSET = (Notification.created_at, Notification.id)
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor([created_at, 42])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, (datetime, int)) == (created_at, 42)
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor([1]), encode_cursor(["x", 1])])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, (datetime, int))
+    assert exc.value.status_code == 400
+
+def test_split_page_only_returns_cursor_when_more_rows_exist():
+    rows = [SimpleNamespace(created_at=datetime(2026, 1, day), id=day) for day in (3, 2, 1)]
+
+    page, cursor = split_page(rows, 3, KEYSET)
+    assert len(page) == 3 and cursor is None
+
+    page, cursor = split_page(rows, 2, KEYSET)
+    assert [row.id for row in page] == [3, 2]
+    assert decode_cursor(cursor, (datetime, int)) == (datetime(2026, 1, 2), 2)
+
+def test_paginate_uses_keyset_with_cursor_and_offset_without():
+    cursor = encode_cursor([datetime(2026, 1, 2), 2])
+    keyset_sql = str(paginate(select(Notification), KEYSET, cursor, 10, skip=20))
+    assert "OFFSET" not in keyset_sql
+    assert "(notifications.created_at, notifications.id) <" in keyset_sql
+
+    offset_sql = str(paginate(select(Notification), KEYSET, None, 10, skip=20))
+    assert "OFFSET" in offset_sql
+    assert "ORDER BY notifications.created_at DESC, notifications.id DESC" in offset_sql
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import auth
+
+@pytest.mark.asyncio
+async def test_full_pool_sheds_load_and_drains(monkeypatch):
+    monkeypatch.setattr(auth.settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(auth.settings, "PASSWORD_HASH_MAX_QUEUE", 1)
+    release = threading.Event()
+
+    jobs = [asyncio.create_task(auth._run_password_job(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert auth._password_jobs_in_flight == 2
+
+    with pytest.raises(HTTPException) as exc:
+        await auth._run_password_job(release.wait)
+    release.set()
+    await asyncio.gather(*jobs)
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers == {"Retry-After": "1"}
+    assert auth._password_jobs_in_flight == 0
+
+@pytest.mark.asyncio
+async def test_failed_job_frees_its_slot():
+    def broken_hash(password):
+        raise ValueError("bad hash")
+
+    with pytest.raises(ValueError):
+        await auth._run_password_job(broken_hash, "secret")
+    assert auth._password_jobs_in_flight == 0
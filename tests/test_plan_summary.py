@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.db.db_plans import invite_summary_from_row, plan_summary_from_row, plan_summary_select
+
+def _row(**overrides):
+    row = dict(
+        id=7,
+        title="Dinner",
+        start_time=datetime(2026, 10, 17, 19, 0, tzinfo=timezone.utc),
+        status="upcoming",
+        location_name="Shibuya",
+        location_latitude=35.658,
+        location_longitude=139.701,
+        participant_ids=[1, 2],
+        participant_images=["https://example.com/1.png", None],
+    )
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+def test_summary_row_maps_location_and_participants():
+    summary = plan_summary_from_row(_row())
+
+    assert summary.location.name == "Shibuya"
+    assert [(p.id, p.profile_image_url) for p in summary.participants] == [
+        (1, "https://example.com/1.png"),
+        (2, None),
+    ]
+
+def test_plan_without_location_or_participants():
+    summary = plan_summary_from_row(_row(
+        location_name=None, location_latitude=None, location_longitude=None,
+        participant_ids=None, participant_images=None,
+    ))
+
+    assert summary.location is None
+    assert summary.participants == []
+
+def test_invite_summary_uses_invite_columns():
+    invite = invite_summary_from_row(_row(invite_id=3, invite_user_id=2, invite_status="pending"))
+
+    assert (invite.id, invite.plan_id, invite.user_id, invite.status) == (3, 7, 2, "pending")
+    assert invite.plan.id == 7
+
+def test_summary_is_a_single_statement_with_lateral_joins():
+    sql = str(plan_summary_select().compile(dialect=postgresql.dialect()))
+
+    assert sql.count("LEFT OUTER JOIN LATERAL") == 2
+    assert "hashed_password" not in sql
@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.push_notification.fanout import fan_out
+
+def _users(n):
+    return [SimpleNamespace(id=i, push_token=f"token-{i}" if i % 4 else None) for i in range(n)]
+
+def test_sends_concurrently_within_the_cap():
+    in_flight = peak = 0
+
+    async def send(user, device_token):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return True
+
+    report = asyncio.run(fan_out(_users(40), send, concurrency=5))
+
+    assert report.sent == 30  # users without a token are skipped
+    assert peak == 5
+
+def test_failures_are_reported_per_token():
+    async def send(user, device_token):
+        if user.id == 1:
+            raise RuntimeError("boom")
+        return user.id != 2
+
+    report = asyncio.run(fan_out(_users(4), send))
+
+    assert {(r.user_id, r.error) for r in report.failed} == {(1, "boom"), (2, "rejected")}
+    assert report.summary()["attempted"] == 3
+
+def test_every_registered_device_gets_the_push():
+    sent = []
+
+    async def send(user, device_token):
+        sent.append((user.id, device_token))
+        return True
+
+    users = [SimpleNamespace(id=1, push_token="iphone"), SimpleNamespace(id=2, push_token="old")]
+    device_tokens = {1: ["iphone", "ipad"]}  # user 2 has no active device left
+
+    report = asyncio.run(fan_out(users, send, device_tokens))
+
+    assert sorted(sent) == [(1, "ipad"), (1, "iphone")]
+    assert report.sent == 2
@@ -0,0 +1,57 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.push_notification import feedback
+from app.services.push_notification.fanout import fan_out
+from app.services.push_notification.credentials import StaticKeyProvider
+from app.services.push_notification.notificationClient import notificationClient
+
+def _capture_prunes(monkeypatch):
+    pruned = []
+
+    async def prune(device_tokens):
+        pruned.append(set(device_tokens))
+        return len(device_tokens)
+
+    monkeypatch.setattr(feedback, "prune_invalid_tokens", prune)
+    return pruned
+
+def test_failure_classes():
+    assert feedback.classify_failure("Unregistered") == feedback.INVALID_TOKEN
+    assert feedback.classify_failure("BadDeviceToken") == feedback.INVALID_TOKEN
+    assert feedback.classify_failure("TooManyRequests") == feedback.RETRYABLE
+    assert feedback.classify_failure("PayloadTooLarge") == feedback.REJECTED
+    assert feedback.classify_failure(None) == feedback.REJECTED
+
+def test_dead_tokens_in_a_fan_out_are_pruned_in_one_batch(monkeypatch):
+    pruned = _capture_prunes(monkeypatch)
+    users = [SimpleNamespace(id=i, push_token=f"token-{i}") for i in range(4)]
+
+    async def send(user, device_token):
+        if user.id % 2:
+            await feedback.record_failure(device_token, "Unregistered")
+            return False
+        return True
+
+    report = asyncio.run(fan_out(users, send))
+
+    assert report.sent == 2
+    assert pruned == [{"token-1", "token-3"}]
+
+def test_dead_token_stops_silent_retries(monkeypatch):
+    pruned = _capture_prunes(monkeypatch)
+    attempts = []
+
+    class _APNs:
+        pool = SimpleNamespace(close=lambda: None)
+
+        async def send_notification(self, request):
+            attempts.append(request)
+            return SimpleNamespace(is_successful=False, description="BadDeviceToken")
+
+    client = notificationClient(key_provider=StaticKeyProvider("key"))
+    client._build_client = lambda key_path: _APNs()
+
+    assert asyncio.run(client.send_silent_notification(device_token="dead", max_retries=3)) is False
+    assert len(attempts) == 1
+    assert pruned == [{"dead"}]
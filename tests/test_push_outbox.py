@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.models import PushOutbox
+from app.services.push_notification import friend_invite_message
+from app.services.push_notification import outbox
+
+@pytest.mark.asyncio
+async def test_enqueued_pushes_commit_with_the_transaction(sqlite_session):
+    await outbox.enqueue_push(sqlite_session, [1, 2], friend_invite_message("alice", 7))
+    await sqlite_session.commit()
+    rows = (await sqlite_session.execute(select(PushOutbox).order_by(PushOutbox.user_id))).scalars().all()
+
+    assert [(row.user_id, row.status, row.attempts) for row in rows] == [(1, "pending", 0), (2, "pending", 0)]
+    assert rows[0].payload["data"] == {"invite_id": 7, "category": "FRIEND_INVITE"}
+
+@pytest.mark.asyncio
+async def test_rolled_back_pushes_are_never_sent(sqlite_session):
+    await outbox.enqueue_push(sqlite_session, [1], friend_invite_message("alice", 7))
+    await sqlite_session.rollback()
+
+    assert (await sqlite_session.execute(select(PushOutbox))).scalars().all() == []
+
+@pytest.mark.asyncio
+async def test_commit_wakes_the_in_process_worker(monkeypatch, sqlite_session):
+    wakeup = asyncio.Event()
+    monkeypatch.setattr(outbox, "_wakeup", wakeup)
+    await outbox.enqueue_push(sqlite_session, [1], friend_invite_message("alice", 7))
+    assert not wakeup.is_set()
+
+    await sqlite_session.commit()
+    assert wakeup.is_set()
+
+def test_worker_runs_by_default_except_on_lambda(monkeypatch):
+    monkeypatch.setattr(outbox.settings, "PUSH_OUTBOX_WORKER", None)
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    assert outbox.worker_enabled()
+
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "puctee-app")
+    assert not outbox.worker_enabled()
+
+    monkeypatch.setattr(outbox.settings, "PUSH_OUTBOX_WORKER", True)
+    assert outbox.worker_enabled()
+
+@pytest.mark.asyncio
+async def test_request_that_queued_pushes_invokes_a_drain(monkeypatch, sqlite_session):
+    invokes = []
+    monkeypatch.setattr(outbox, "_invoke_drain", lambda: invokes.append("drain_outbox"))
+
+    async def handler(request):
+        # Like BaseHTTPMiddleware, the route runs in a task of its own
+        async def route():
+            if request == "queues":
+                await outbox.enqueue_push(sqlite_session, [1], friend_invite_message("alice", 7))
+            await sqlite_session.commit()
+            return "response"
+        return await asyncio.create_task(route())
+
+    responses = [await outbox.outbox_drain_middleware(request, handler) for request in ("reads", "queues")]
+
+    assert responses == ["response", "response"]
+    assert invokes == ["drain_outbox"]
+
+@pytest.mark.asyncio
+async def test_batch_rows_are_sent_through_one_fan_out_limit(monkeypatch):
+    rows = [
+        SimpleNamespace(id=10, user_id=1, kind="alert", payload={}),
+        SimpleNamespace(id=11, user_id=2, kind="alert", payload={}),
+        SimpleNamespace(id=12, user_id=3, kind="alert", payload={}),
+    ]
+    users = [SimpleNamespace(id=1, unread_notification_count=0), SimpleNamespace(id=2, unread_notification_count=0)]
+    updates = []
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            pass
+
+        async def execute(self, statement):
+            updates.append(statement.compile().params.get("status"))
+
+        async def commit(self):
+            pass
+
+    async def claim(db, batch_size):
+        return rows
+
+    async def users_by_ids(db, user_ids):
+        return users
+
+    async def device_tokens(db, user_ids):
+        return {1: ["a", "b"], 2: ["c"]}
+
+    async def send(row, user, device_token):
+        # user 1 gets through on one of two devices, user 2 on none
+        return device_token == "b"
+
+    monkeypatch.setattr(outbox, "AsyncSessionLocal", Session)
+    monkeypatch.setattr(outbox, "_claim", claim)
+    monkeypatch.setattr(outbox, "get_users_by_ids", users_by_ids)
+    monkeypatch.setattr(outbox, "get_device_tokens", device_tokens)
+    monkeypatch.setattr(outbox, "_send", send)
+
+    result = await outbox.dispatch_batch(3)
+
+    assert result == {"claimed": 3, "sent": 1, "failed": 1, "skipped": 1}
+    assert updates == ["sent", "skipped", None]
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import Response
+from sqlalchemy import insert
+
+from app.api.routers import notifications as notifications_router
+from app.api.routers import users as users_router
+from app.api.routers.plans import read as plans_router
+from app.db.query_stats import assert_max_queries
+from app.models import Location, Notification, Penalty, Plan, PlanInvite, User, user_friends
+from app.schemas import NotificationBase, Plan as PlanSchema, PlanListRequest
+
+def _postgres_functions(sync_conn):
+    # Just enough of pg_trgm for the search statement to run on SQLite
+    dbapi_connection = sync_conn.connection.dbapi_connection
+    dbapi_connection.create_function("similarity", 2, lambda value, query: float(query in (value or "").lower()))
+    dbapi_connection.create_function("greatest", -1, max)
+
+@pytest_asyncio.fixture
+async def db(sqlite_engine, sqlite_sessions, fake_redis):
+    """Five users (1 is friends with 2 and 3), eight plans, fifteen notifications"""
+    async with sqlite_engine.connect() as conn:
+        await conn.run_sync(_postgres_functions)
+    now = datetime.now(timezone.utc)
+    async with sqlite_sessions() as seed:
+        users = [
+            User(id=i, username=f"user{i}", email=f"user{i}@example.com", display_name=f"User {i}", hashed_password="x")
+            for i in range(1, 6)
+        ]
+        seed.add_all(users)
+        await seed.flush()
+        await seed.execute(insert(user_friends), [{"user_id": 1, "friend_id": 2}, {"user_id": 1, "friend_id": 3}])
+        for n in range(8):
+            plan = Plan(title=f"Plan {n}", start_time=now + timedelta(days=n), participants=users[:3])
+            plan.locations = [Location(user_id=1, name="Shibuya", latitude=35.6, longitude=139.7)]
+            plan.penalties = [Penalty(user_id=2, content="Coffee")]
+            plan.invites = [PlanInvite(user_id=4), PlanInvite(user_id=5)]
+            seed.add(plan)
+        seed.add_all(Notification(user_id=1, title=f"n{n}", content="c", type="plan_invite") for n in range(15))
+        await seed.commit()
+    async with sqlite_sessions() as session:
+        yield session
+
+@pytest.mark.asyncio
+async def test_notification_list_is_one_query(db):
+    with assert_max_queries(1):
+        notifications = await notifications_router.read_notifications(Response(), limit=10, user_id=1, db=db)
+        notifications = [NotificationBase.model_validate(n, from_attributes=True) for n in notifications]
+
+    assert len(notifications) == 10
+
+@pytest.mark.asyncio
+async def test_full_plan_list_query_count_does_not_grow_with_plans(db):
+    # The page query plus one selectinload per relationship
+    with assert_max_queries(5):
+        plans = await plans_router.read_plans(PlanListRequest(limit=5), Response(), user_id=1, db=db)
+        plans = [PlanSchema.model_validate(plan) for plan in plans]
+
+    assert len(plans) == 5
+    assert all(len(plan.participants) == 3 and len(plan.invites) == 2 for plan in plans)
+
+@pytest.mark.asyncio
+async def test_user_search_is_one_query(db):
+    with assert_max_queries(1):
+        results = await users_router.search_users("user", current_user_id=1, db=db)
+
+    # Friends first
+    assert [user["username"] for user in results[:2]] == ["user2", "user3"]
+    assert len(results) == 4
+
+@pytest.mark.asyncio
+async def test_short_user_search_matches_substrings_friends_first(db):
+    with assert_max_queries(1):
+        r4 = await users_router.search_users("r4", current_user_id=1, db=db)
+    with assert_max_queries(1):
+        u = await users_router.search_users("u", current_user_id=1, db=db)
+
+    assert [user["username"] for user in r4] == ["user4"]
+    assert [user["username"] for user in u] == ["user2", "user3", "user4", "user5"]
@@ -0,0 +1,27 @@
+import pytest
+from sqlalchemy import text
+
+from app.db.query_stats import track_queries
+
+async def _run_selects(engine, n):
+    async with engine.connect() as conn:
+        for _ in range(n):
+            await conn.execute(text("SELECT 1"))
+
+@pytest.mark.asyncio
+async def test_statements_are_counted_per_scope(sqlite_engine):
+    with track_queries() as outer:
+        with track_queries() as inner:
+            await _run_selects(sqlite_engine, 2)
+        await _run_selects(sqlite_engine, 1)
+
+    assert inner.count == 2
+    assert outer.count == 3
+    assert outer.server_timing().endswith('desc="3 queries"')
+
+@pytest.mark.asyncio
+async def test_repeated_statements_are_flagged(sqlite_engine):
+    with track_queries() as stats:
+        await _run_selects(sqlite_engine, 3)
+
+    assert stats.repeated_shapes(threshold=3) == [("SELECT 1", 3)]
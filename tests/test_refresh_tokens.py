@@ -0,0 +1,32 @@
+import time
+
+from jose import jwt
+
+from app.core.auth import create_refresh_token
+from app.core.config import settings
+from app.db.refresh_tokens import REVOKED_REFRESH_PREFIX, remaining_lifetime, revocation_key
+
+def _decode(token):
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+def test_refresh_tokens_carry_unique_jti():
+    first = _decode(create_refresh_token({"sub": "testuser"}))
+    second = _decode(create_refresh_token({"sub": "testuser"}))
+
+    assert first["jti"] != second["jti"]
+
+def test_revocation_key_uses_jti():
+    token = create_refresh_token({"sub": "testuser"})
+    payload = _decode(token)
+
+    assert revocation_key(token, payload) == f"{REVOKED_REFRESH_PREFIX}{payload['jti']}"
+
+def test_revocation_key_falls_back_to_token_digest():
+    key = revocation_key("legacy-token", {"sub": "testuser"})
+
+    assert key.startswith(REVOKED_REFRESH_PREFIX)
+    assert len(key) == len(REVOKED_REFRESH_PREFIX) + 64
+
+def test_revocation_ttl_matches_remaining_lifetime():
+    assert 3590 <= remaining_lifetime({"exp": time.time() + 3600}) <= 3600
+    assert remaining_lifetime({"exp": time.time() - 10}) == 1
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.scheduler import backend, silent_notification
+from app.services.scheduler.apscheduler_backend import APSchedulerBackend
+
+def _backend(tmp_path):
+    return APSchedulerBackend(jobstore_url=f"sqlite:///{tmp_path}/jobs.sqlite")
+
+def test_silent_wakeup_runs_in_process(tmp_path, monkeypatch):
+    sent = []
+
+    async def send_silent(plan_id):
+        sent.append(plan_id)
+        return {"success": True}
+
+    monkeypatch.setattr(silent_notification, "send_silent", send_silent)
+
+    async def main():
+        scheduler = _backend(tmp_path)
+        backend.set_scheduler_backend(scheduler)
+        await scheduler.start()
+        try:
+            soon = datetime.now(timezone.utc) + timedelta(milliseconds=200)
+            assert await backend.schedule_silent_for_plan(42, soon, is_new=True)
+            for _ in range(50):
+                if sent:
+                    break
+                await asyncio.sleep(0.1)
+        finally:
+            await scheduler.shutdown()
+            backend.set_scheduler_backend(None)
+
+    asyncio.run(main())
+    assert sent == [42]
+
+def test_jobs_are_moved_cancelled_and_survive_restarts(tmp_path):
+    later = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(hours=2)
+
+    async def schedule():
+        scheduler = _backend(tmp_path)
+        await scheduler.start()
+        await scheduler.schedule_silent_notification(7, later - timedelta(hours=1), is_new=True)
+        await scheduler.schedule_silent_notification(7, later)
+        await scheduler.shutdown()
+
+    async def reload_and_cancel():
+        scheduler = _backend(tmp_path)
+        await scheduler.start()
+        jobs = scheduler.scheduler.get_jobs()
+        assert await scheduler.cancel_silent_notification(7)
+        assert await scheduler.cancel_silent_notification(7)
+        remaining = scheduler.scheduler.get_jobs()
+        await scheduler.shutdown()
+        return jobs, remaining
+
+    asyncio.run(schedule())
+    jobs, remaining = asyncio.run(reload_and_cancel())
+
+    assert [(job.id, job.next_run_time) for job in jobs] == [("puctee-plan-silent-7", later)]
+    assert remaining == []
+
+def test_eventbridge_without_target_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(backend.settings, "SCHEDULER_BACKEND", "eventbridge")
+    monkeypatch.setattr(backend.settings, "SCHEDULER_TARGET_ARN", "")
+    monkeypatch.setattr(backend.settings, "SCHEDULER_ROLE_ARN", "")
+    backend.set_scheduler_backend(None)
+
+    with pytest.raises(ValueError, match="SCHEDULER_TARGET_ARN, SCHEDULER_ROLE_ARN"):
+        backend.get_scheduler_backend()
+
+def test_backend_missing_a_method_cannot_be_created():
+    class OnlySchedules(backend.SchedulerBackend):
+        async def schedule_silent_notification(self, plan_id, when_utc, is_new=False):
+            return True
+
+    with pytest.raises(TypeError):
+        OnlySchedules()
@@ -0,0 +1,36 @@
+import time
+
+from app.core.auth import VerifiedTokenCache
+
+def test_cache_hit_and_miss_counters():
+    cache = VerifiedTokenCache(max_entries=10)
+    assert cache.get("token") is None
+
+    cache.put("token", {"sub": "testuser", "exp": time.time() + 60})
+    assert cache.get("token")["sub"] == "testuser"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+def test_entry_is_evicted_at_exp():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("token", {"sub": "testuser", "exp": time.time() - 1})
+
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(max_entries=2)
+    exp = time.time() + 60
+    cache.put("a", {"sub": "a", "exp": exp})
+    cache.put("b", {"sub": "b", "exp": exp})
+    cache.get("a")
+    cache.put("c", {"sub": "c", "exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+def test_tokens_without_exp_are_not_cached():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("token", {"sub": "testuser"})
+
+    assert cache.get("token") is None
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect
+from starlette.datastructures import Headers, UploadFile
+
+from app.api.routers import users as users_router
+from app.db import db_users
+from app.db.query_stats import track_queries
+from app.models import User
+from app.schemas import UserUpdate
+
+@pytest_asyncio.fixture
+async def alice(sqlite_sessions, fake_redis):
+    async with sqlite_sessions() as db:
+        db.add(User(id=1, username="alice", email="alice@example.com", display_name="Alice", hashed_password="x"))
+        await db.commit()
+
+async def _current_user(sessions):
+    async with sessions() as db:
+        with track_queries() as stats:
+            user = await db_users.get_current_user("alice", db)
+        return user, stats.count
+
+def test_every_user_column_is_cached_or_explicitly_not():
+    columns = {column.key for column in inspect(User).column_attrs}
+    cached = set(db_users._SNAPSHOT_FIELDS) | set(db_users._SNAPSHOT_DATETIME_FIELDS)
+
+    assert cached | set(db_users._UNCACHED_FIELDS) == columns
+    assert not cached & set(db_users._UNCACHED_FIELDS)
+
+@pytest.mark.asyncio
+async def test_miss_queries_then_hit_does_not(sqlite_sessions, alice):
+    _, miss_queries = await _current_user(sqlite_sessions)
+    user, hit_queries = await _current_user(sqlite_sessions)
+
+    assert (miss_queries, hit_queries) == (1, 0)
+    assert user.display_name == "Alice"
+    assert user.created_at is not None
+
+@pytest.mark.asyncio
+async def test_malformed_snapshot_falls_back_to_the_database(sqlite_sessions, fake_redis, alice):
+    fake_redis.data[db_users._user_cache_key("alice")] = "{not json"
+
+    user, queries = await _current_user(sqlite_sessions)
+
+    assert (user.display_name, queries) == ("Alice", 1)
+
+@pytest.mark.asyncio
+async def test_profile_changes_invalidate_the_snapshot(monkeypatch, sqlite_sessions, alice):
+    async def upload_to_s3(file, user_id):
+        return f"https://example.com/u/{user_id}.png"
+
+    monkeypatch.setattr(users_router, "upload_to_s3", upload_to_s3)
+    seen = []
+
+    async def after(change):
+        async with sqlite_sessions() as db:
+            user = await db_users.get_current_user("alice", db)
+            await change(user, db)
+        user, queries = await _current_user(sqlite_sessions)
+        seen.append((queries, user.display_name, user.push_token, user.profile_image_url))
+
+    await _current_user(sqlite_sessions)
+    await after(lambda user, db: users_router.update_user_me(UserUpdate(display_name="Alice B"), user, db))
+    await after(lambda user, db: users_router.update_push_token("tok", "phone", None, user, db))
+    image = UploadFile(io.BytesIO(b"png"), headers=Headers({"content-type": "image/png"}))
+    await after(lambda user, db: users_router.upload_profile_image(image, user, db))
+
+    assert seen == [
+        (1, "Alice B", None, None),
+        (1, "Alice B", "tok", None),
+        (1, "Alice B", "tok", "https://example.com/u/1.png"),
+    ]
@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql
+
+from app.services.user_search import build_search_statement, normalize_query
+
+def _patterns(query):
+    params = build_search_statement(1, query, 10).compile(dialect=postgresql.dialect()).params
+    return {value for value in params.values() if isinstance(value, str) and value.endswith("%")}
+
+def test_query_is_normalized():
+    assert normalize_query("  Tanaka   Yuki ") == "tanaka yuki"
+
+def test_long_queries_match_substrings():
+    assert _patterns("tanaka") == {"%tanaka%"}
+
+def test_short_queries_still_match_substrings():
+    assert _patterns("ta") == {"%ta%"}
+    assert _patterns("k") == {"%k%"}
+
+def test_like_wildcards_are_escaped():
+    assert "%a\\_b\\%%" in _patterns("a_b%")
+
+def test_short_queries_stop_at_the_limit_without_ranking():
+    sql = str(build_search_statement(1, "ta", 10).compile(dialect=postgresql.dialect()))
+
+    assert "similarity" not in sql
+    assert "row_number" not in sql
+    assert sql.count("LIMIT") == 2